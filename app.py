@@ -1,36 +1,133 @@
-import os
+import re
+import mimetypes
+import hmac
 import json
 import time
-from datetime import datetime
-from flask import Flask, render_template, jsonify
-from github_commit_tracker import GitHubTracker
+import threading
+from datetime import datetime, timedelta
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context, g, url_for
+from flask.json.provider import DefaultJSONProvider
+import metrics
+from assets import PRECOMPRESSED_SUFFIXES, StaticAssets, build as build_assets
+from compression import compress, negotiate
+from github_commit_tracker import GitHubTracker, DB_PATH, REPOSITORY_FIELDS, ACTIVITY_FIELDS
+from profiling import PROFILER
+from event_stream import EventBroadcaster
+from read_model import ReadModel
+from webhooks import verify_signature, parse_push, SIGNATURE_HEADER, EVENT_HEADER
 from dotenv import load_dotenv
-from config import load_team_configs, WEB_CONFIG, GITHUB_CONFIG, GITHUB_TOKEN
+from team_sync import TeamsWatcher
+from config import TEAMS_CSV_PATH, WEB_CONFIG, SERVE_CONFIG, GITHUB_CONFIG, GITHUB_TOKEN, PROFILING_CONFIG
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Initialize Flask app
 app = Flask(__name__)
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # Disable caching for development
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # Unfingerprinted /static/ files always revalidate
+
+# Fingerprinted, precompressed copies of static/ (built by assets.py), served from /assets/
+static_assets = StaticAssets(app.static_folder)
+static_assets.load()
+ASSET_MAX_AGE = 365 * 24 * 3600  # A fingerprinted file never changes
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain'}
+
+class ProfiledJSONProvider(DefaultJSONProvider):
+    """jsonify(), with its encoding timed as the serialize phase of profiled requests."""
+    
+    def dumps(self, obj, **kwargs):
+        with PROFILER.phase("serialize"):
+            return super().dumps(obj, **kwargs)
+
+app.json = ProfiledJSONProvider(app)
+
+# Opt-in profiling of poll cycles, repository checks and requests
+PROFILER.configure(PROFILING_CONFIG["sample_rate"], PROFILING_CONFIG["interval_ms"] / 1000, PROFILING_CONFIG["keep"])
+PROFILE_DUMP_PREFIX = DB_PATH + ".profile-"  # The poller dumps its traces here, one file pair per poller
+PROFILE_SKIP_ROUTES = {'/api/stream', '/api/export/activity.ndjson'}  # Streams that last as long as the client
 
 # Initialize tracker
-tracker = GitHubTracker(GITHUB_TOKEN)
+tracker = GitHubTracker(
+    GITHUB_TOKEN,
+    max_workers=GITHUB_CONFIG["max_concurrent_requests"],
+    per_host_limit=GITHUB_CONFIG["max_requests_per_host"],
+    count_source=GITHUB_CONFIG["count_source"],
+    graphql_batch_size=GITHUB_CONFIG["graphql_batch_size"],
+    graphql_endpoint=GITHUB_CONFIG["graphql_url"],
+    api_url=GITHUB_CONFIG["api_url"],
+    max_polling_interval=GITHUB_CONFIG["max_polling_interval"],
+    rate_limit_reserve=GITHUB_CONFIG["rate_limit_reserve"],
+    event_retention_hours=GITHUB_CONFIG["event_retention_hours"],
+    webhook_active_window=GITHUB_CONFIG["webhook_active_window"],
+    webhook_reconcile_interval=GITHUB_CONFIG["webhook_reconcile_interval"],
+    instance_id=GITHUB_CONFIG["instance_id"],
+    activity_retention_hours=GITHUB_CONFIG["activity_retention_hours"],
+    archive_dir=GITHUB_CONFIG["archive_dir"],
+    poller=GITHUB_CONFIG["role"] != "web",
+)
+
+# Keeps teams and repositories in line with teams.csv, applying edits without a restart
+teams_watcher = TeamsWatcher(tracker, TEAMS_CSV_PATH, GITHUB_CONFIG["teams_reload_interval"])
 
 # Configure tracker with teams
 def setup_tracker():
-    teams = load_team_configs()
-    print(f"Setting up tracker with {len(teams)} teams...")
+    print("Setting up tracker from teams.csv...")
     start_time = time.time()
     
-    for team in teams:
-        team_id = tracker.add_team(team["name"])
-        for repo_url in team["repos"]:
-            repo_id = tracker.add_repository(team_id, repo_url)
-            print(f"Added repository {repo_url} for {team['name']}")
+    # Only rows that differ from the database are validated and applied
+    diff = teams_watcher.reload()
     
     duration = time.time() - start_time
-    print(f"Setup completed in {duration:.2f} seconds")
+    print(f"Setup completed in {duration:.2f} seconds ({diff.summary() if diff else 'no changes'})")
+    teams_watcher.start()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule is not None else None
+    g.trace = PROFILER.begin("request", route) if route and route not in PROFILE_SKIP_ROUTES else None
+
+@app.after_request
+def compress_response(response):
+    """
+    Compress larger JSON, HTML and text responses in the best encoding the
+    client accepts. Snapshots and assets arrive already compressed.
+    """
+    if (response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.status_code in (204, 304) or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    body = response.get_data()
+    if len(body) < WEB_CONFIG["compress_min_bytes"]:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is not None:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.teardown_request
+def end_request_trace(exc):
+    PROFILER.end(g.pop('trace', None))
+
+@app.after_request
+def record_request_metrics(response):
+    """Per-route latency and status counts for /metrics."""
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, route=route, method=request.method)
+    metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+def asset_url(filename):
+    """URL of a static file: fingerprinted under /assets/ if it's in the build, plain /static/ otherwise."""
+    fingerprinted = static_assets.url_path(filename)
+    if fingerprinted is None:
+        return url_for('static', filename=filename)
+    return url_for('get_asset', filename=fingerprinted)
+
+@app.context_processor
+def template_helpers():
+    return {'asset_url': asset_url}
 
 # Routes
 @app.route('/')
@@ -38,60 +135,389 @@ def index():
     print("Index route accessed!")
     return render_template('index.html')
 
+def build_leaderboard():
+    """Return the top 15 teams by commit count."""
+    return [
+        {"team_name": entry["team_name"], "total_commits": entry["total_commits"]}
+        for entry in tracker.ranking.top(15)
+    ]
+
+# Single producer that pushes new events to every /api/stream client
+broadcaster = EventBroadcaster(tracker, build_leaderboard)
+metrics.STREAM_CLIENTS.set_function(broadcaster.client_count)
+STREAM_RETRY_AFTER = 60  # seconds a client turned away at the stream cap is told to wait
+
+@app.route('/assets/<path:filename>')
+def get_asset(filename):
+    """A fingerprinted static file, cached for a year and precompressed if the client accepts it."""
+    variants = static_assets.variants(filename)
+    if variants is None:
+        return Response(status=404)
+    encoding = negotiate(request.accept_encodings, [enc for enc in PRECOMPRESSED_SUFFIXES if enc in variants])
+    response = Response(variants[encoding], mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    return response
+
+MAX_RANK_LIMIT = 500  # Teams per ?mode=ranked page
+MAX_RANK_RADIUS = 50  # Teams either side of ?around=
+
 @app.route('/api/leaderboard')
 def get_leaderboard():
-    leaderboard = tracker.get_leaderboard()
+    """
+    Top 15 teams. With ?mode=ranked, return ranks and rank changes instead:
+    ?limit= for the top K, or ?around=<team>&radius= for the teams either
+    side of one team; ?since_minutes= sets the window for rank_change.
+    """
+    if request.args.get('mode') != 'ranked':
+        return snapshot_response('leaderboard')
     
-    # Make sure None values are converted to 0 for sorting
-    for team in leaderboard:
-        if team["total_commits"] is None:
-            team["total_commits"] = 0
+    since_minutes = request.args.get('since_minutes', 10, type=float)
+    radius = request.args.get('radius', 2, type=int)
+    limit = request.args.get('limit', 15, type=int)
+    if since_minutes < 0 or radius < 0 or limit < 0:
+        return jsonify({"error": "since_minutes, radius and limit must not be negative"}), 400
+    since_minutes = min(since_minutes, 60)
     
-    # Sort and limit to top 15 teams
-    sorted_leaderboard = sorted(leaderboard, key=lambda x: x["total_commits"], reverse=True)
-    top_teams = sorted_leaderboard[:15]
+    around = request.args.get('around')
+    if around:
+        entries = tracker.ranking.around(around, min(radius, MAX_RANK_RADIUS), since_minutes)
+        if not entries:
+            return jsonify({"error": f"Unknown team: {around}"}), 404
+        return jsonify(entries)
     
-    return jsonify(top_teams)
+    return jsonify(tracker.ranking.top(min(limit, MAX_RANK_LIMIT), since_minutes))
+
+@app.route('/api/stream')
+def stream():
+    """
+    Push commit events and leaderboard updates as Server-Sent Events. Each
+    stream holds a worker thread, so past MAX_STREAMS per worker new ones
+    get a 503 and the page polls instead.
+    """
+    if broadcaster.client_count() >= SERVE_CONFIG["max_streams"]:
+        metrics.STREAMS_REJECTED.inc()
+        return (jsonify({"error": "Too many open streams, poll /api/leaderboard instead"}), 503,
+                {'Retry-After': str(STREAM_RETRY_AFTER)})
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    return Response(
+        stream_with_context(broadcaster.stream(last_event_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # Stop nginx from buffering the stream
+        }
+    )
 
 @app.route('/api/events')
 def get_events():
-    events = tracker.get_unprocessed_events()
-    event_ids = [event['id'] for event in events]
-    
-    # Mark events as processed
-    if event_ids:
-        tracker.mark_events_processed(event_ids)
+    """
+    Return events after the since_id cursor, oldest first. Read-only, so every
+    viewer sees every event. Without since_id the feed starts at the newest
+    event; pass next_since_id back on the following call.
+    """
+    limit = min(request.args.get('limit', 100, type=int), 500)
+    since_id = request.args.get('since_id', type=int)
+    if since_id is None:
+        return jsonify({"events": [], "next_since_id": tracker.get_latest_event_id()})
     
-    return jsonify(events)
-
-@app.route('/api/repositories')
-def get_repositories():
-    repos = tracker.get_all_repositories()
-    return jsonify(repos)
+    events = tracker.get_events_since(since_id, limit=limit)
+    next_since_id = events[-1]['id'] if events else since_id
+    return jsonify({"events": events, "next_since_id": next_since_id})
 
-@app.route('/api/stats')
-def get_stats():
+def build_stats():
     """Return some statistics about the tracker."""
     repos = tracker.get_all_repositories()
     
     # Calculate stats
-    stats = {
+    return {
         "total_teams": len(set([repo["team_name"] for repo in repos])),
         "total_repos": len(repos),
-        "total_commits": sum(repo["total_commits"] or 0 for repo in repos)
+        "total_commits": sum(repo["total_commits"] or 0 for repo in repos),
     }
-    
-    return jsonify(stats)
+
+# Serialized API responses, rebuilt only when the tracker's data changes
+read_model = ReadModel()
+read_model.register('leaderboard', build_leaderboard, lambda: tracker.data_version)
+read_model.register('repositories', tracker.get_all_repositories, lambda: tracker.data_version)
+read_model.register('stats', build_stats, lambda: tracker.data_version)
+read_model.register('recent-activity', lambda: tracker.get_recent_activity(limit=50), lambda: tracker.data_version)
+
+def snapshot_response(name):
+    """
+    Serve a cached view with a strong ETag, or a 304 if the client already
+    has it. Larger views are compressed once per version and encoding, and
+    each encoding gets its own ETag.
+    """
+    snapshot = read_model.get(name)
+    encoding = None
+    if len(snapshot.body) >= WEB_CONFIG["compress_min_bytes"]:
+        encoding = negotiate(request.accept_encodings)
+    etag = f"{snapshot.etag}-{encoding}" if encoding else snapshot.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot.encoded(encoding) if encoding else snapshot.body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate; the ETag makes it cheap
+    return response
+
+# Query arguments that switch a list endpoint from its cached snapshot to keyset pages
+PAGE_ARGS = ('after', 'limit', 'fields')
+MAX_PAGE_LIMIT = 1000
+
+def parse_fields(allowed):
+    """The ?fields= projection as a list of names, or None for every field. Raises ValueError on unknown names."""
+    value = request.args.get('fields')
+    if not value:
+        return None
+    fields = list(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (choose from {', '.join(allowed)})")
+    return fields
+
+def page_response(name, fetch_page, allowed_fields):
+    """
+    One keyset page as {name: rows, "next_after": cursor}. Pass next_after
+    back as ?after= for the following page; it is null on the last page.
+    """
+    try:
+        fields = parse_fields(allowed_fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = min(max(request.args.get('limit', 100, type=int), 1), MAX_PAGE_LIMIT)
+    rows, last_id = fetch_page(request.args.get('after', type=int), limit, fields)
+    return jsonify({name: rows, "next_after": last_id if len(rows) == limit else None})
+
+@app.route('/api/repositories')
+def get_repositories():
+    """
+    Every repository. With ?after=, ?limit= or ?fields=, one page in ID order
+    instead, with only the listed fields.
+    """
+    if not any(arg in request.args for arg in PAGE_ARGS):
+        return snapshot_response('repositories')
+    return page_response('repositories', tracker.get_repositories_page, REPOSITORY_FIELDS)
+
+@app.route('/api/stats')
+def get_stats():
+    """Return some statistics about the tracker."""
+    return snapshot_response('stats')
 
 @app.route('/api/recent-activity')
 def get_recent_activity():
-    """Return recent activity history."""
-    activity = tracker.get_recent_activity(limit=50)
-    return jsonify(activity)
+    """
+    Return the 50 most recent activity rows. With ?after=, ?limit= or
+    ?fields=, page back through the whole history instead, newest first.
+    """
+    if not any(arg in request.args for arg in PAGE_ARGS):
+        return snapshot_response('recent-activity')
+    return page_response('activity', tracker.get_activity_page, ACTIVITY_FIELDS)
+
+@app.route('/api/export/activity.ndjson')
+def export_activity():
+    """
+    Stream the whole activity history, oldest first, as newline-delimited
+    JSON (?fields= to project, ?after= to resume after an ID). Rows are read
+    and sent a batch at a time, so memory stays flat however long the
+    history is. Rows already archived by retention are in ARCHIVE_DIR.
+    """
+    try:
+        fields = parse_fields(ACTIVITY_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    after = request.args.get('after', type=int)
+    
+    def generate():
+        for rows in tracker.iter_activity(after, fields):
+            yield ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={
+            'Content-Disposition': 'attachment; filename=activity.ndjson',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+def parse_local_time(value):
+    """Parse an ISO 8601 time as the naive local time the database stores."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+# Default window per timeline bucket size when ?from= is omitted
+TIMELINE_DEFAULT_WINDOWS = {"minute": timedelta(hours=2), "hour": timedelta(hours=48)}
+
+@app.route('/api/timeline')
+def get_timeline():
+    """
+    Commits per bucket (?bucket=minute|hour) for buckets starting between
+    ?from= and ?to= (ISO times), for one ?team= or all teams. Served from the rollup tables; buckets
+    without commits are omitted. A range with too many minute buckets comes
+    back in hour buckets (the response's "bucket" says which); if even those
+    don't fit, "truncated" is true and the points stop early.
+    """
+    bucket = request.args.get('bucket', 'hour')
+    if bucket not in TIMELINE_DEFAULT_WINDOWS:
+        return jsonify({"error": f"Unknown bucket: {bucket}"}), 400
+    try:
+        end = parse_local_time(request.args['to']) if 'to' in request.args else datetime.now()
+        start = (parse_local_time(request.args['from']) if 'from' in request.args
+                 else end - TIMELINE_DEFAULT_WINDOWS[bucket])
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 times"}), 400
+    
+    team = request.args.get('team')
+    result = tracker.get_timeline(bucket, start.isoformat(), end.isoformat(), team)
+    return jsonify({
+        "bucket": result["bucket"],
+        "team": team,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "points": result["points"],
+        "truncated": result["truncated"],
+    })
+
+@app.route('/api/commits/authors')
+def get_commits_by_author():
+    """Return ingested commit counts per author (?team= to filter)."""
+    return jsonify(tracker.get_commits_by_author(request.args.get('team')))
+
+@app.route('/api/commits/hourly')
+def get_commits_by_hour():
+    """Return ingested commit counts per hour (?team= to filter)."""
+    return jsonify(tracker.get_commits_by_hour(request.args.get('team')))
+
+@app.route('/webhooks/github', methods=['POST'])
+def github_webhook():
+    """Apply commits from a GitHub push webhook as soon as they're pushed."""
+    secret = GITHUB_CONFIG["webhook_secret"]
+    if not secret:
+        return jsonify({"error": "Webhooks are not configured"}), 404
+    
+    body = request.get_data()
+    if not verify_signature(secret, body, request.headers.get(SIGNATURE_HEADER)):
+        metrics.WEBHOOK_DELIVERIES.inc(outcome="bad_signature")
+        return jsonify({"error": "Invalid signature"}), 401
+    
+    event = request.headers.get(EVENT_HEADER)
+    if event == 'ping':
+        return jsonify({"status": "pong"})
+    if event != 'push':
+        metrics.WEBHOOK_DELIVERIES.inc(outcome="ignored")
+        return jsonify({"status": "ignored", "reason": f"Unhandled event: {event}"}), 202
+    
+    payload = request.get_json(force=True, silent=True)
+    if not isinstance(payload, dict):
+        metrics.WEBHOOK_DELIVERIES.inc(outcome="bad_payload")
+        return jsonify({"error": "Expected a JSON payload"}), 400
+    
+    push = parse_push(payload)
+    if push is None:
+        metrics.WEBHOOK_DELIVERIES.inc(outcome="ignored")
+        return jsonify({"status": "ignored", "reason": "Not a push to the default branch"}), 202
+    
+    result = tracker.apply_push(push["owner"], push["name"], push)
+    if result is None:
+        metrics.WEBHOOK_DELIVERIES.inc(outcome="untracked")
+        return jsonify({"status": "ignored", "reason": "Repository is not tracked"}), 202
+    
+    metrics.WEBHOOK_DELIVERIES.inc(outcome=result["status"])
+    return jsonify(result)
+
+def admin_error():
+    """An error response unless the request carries the admin bearer token."""
+    token = PROFILING_CONFIG["admin_token"]
+    if not token:
+        return jsonify({"error": "Admin endpoints are not configured"}), 404
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+def read_profile_dump(process, suffix):
+    """A poller's dumped profile, or None if it has written none."""
+    if not re.fullmatch(r'[\w.-]+', process):
+        return None
+    try:
+        with open(PROFILE_DUMP_PREFIX + process + suffix) as f:
+            return f.read()
+    except OSError:
+        return None
+
+@app.route('/api/admin/profiling', methods=['GET', 'POST'])
+def profiling_status():
+    """
+    Profiler settings and the slowest traces, with the time spent in each
+    phase. POST ?sample_rate= (0 turns profiling off), ?interval_ms= or
+    ?keep= to change them in the process that serves the request. ?process=
+    reads a poller's last dump instead ("poller", or a sharded poller's
+    instance ID). Needs Authorization: Bearer $ADMIN_TOKEN.
+    """
+    error = admin_error()
+    if error:
+        return error
+    process = request.args.get('process')
+    if process:
+        dump = read_profile_dump(process, '.json')
+        if dump is None:
+            return jsonify({"error": f"No profile dumped by {process}"}), 404
+        return Response(dump, mimetype='application/json')
+    
+    if request.method == 'POST':
+        interval_ms = request.args.get('interval_ms', type=float)
+        PROFILER.configure(
+            sample_rate=request.args.get('sample_rate', type=float),
+            interval=interval_ms / 1000 if interval_ms is not None else None,
+            keep=request.args.get('keep', type=int),
+        )
+    return jsonify(PROFILER.status())
+
+@app.route('/api/admin/profiling/flamegraph')
+def profiling_flamegraph():
+    """
+    Collapsed stacks of the kept traces for flamegraph.pl or speedscope
+    (?trace= for one trace, ?kind=poll_cycle|repository|request for one
+    kind, ?process= for a poller's last dump).
+    """
+    error = admin_error()
+    if error:
+        return error
+    process = request.args.get('process')
+    if process:
+        body = read_profile_dump(process, '.folded')
+        if body is None:
+            return jsonify({"error": f"No profile dumped by {process}"}), 404
+    else:
+        body = PROFILER.collapsed(request.args.get('trace', type=int), request.args.get('kind'))
+    return Response(body, mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=profile.folded'})
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics for the poller, database and web routes."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == '__main__':
-    # Setup tracker
-    setup_tracker()
+    # Validate and register teams in the background so the web server starts
+    # serving what's already in the database straight away; the poller picks
+    # up newly registered repositories on its next cycle
+    threading.Thread(target=setup_tracker, daemon=True).start()
+    
+    # Fingerprint and precompress static files for /assets/
+    build_assets(app.static_folder)
+    static_assets.load()
     
     # Start tracker in background
     tracker.start()
@@ -103,6 +529,7 @@ if __name__ == '__main__':
         print("\nShutting down...")
     finally:
         # Ensure tracker is stopped when the app exits
+        teams_watcher.stop()
         tracker.stop()
         tracker.close()
         print("Application closed.")
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Fingerprinted, precompressed static assets.
+build() copies every file under static/ into static/dist/ under a name that
+includes a hash of its content (css/style.1a2b3c4d5e6f.css). It writes gzip
+and, with brotli installed, brotli variants beside each file. The logical to
+fingerprinted name mapping is recorded in static/dist/manifest.json.
+Because an edited file gets a new name, /assets/ responses can be cached
+by browsers for a year without ever revalidating. Earlier builds' files are
+left in place, and the manifest a build replaces is kept as
+manifest.previous.json.
+
+StaticAssets loads a build into memory at startup and serves each file in
+the best encoding the client accepts, with no compression work per request.
+It also loads the previous build's files, so pages still open on the old
+version (or served by a worker that hasn't restarted yet) keep working
+through a deploy.
+Without a build, the templates fall back to plain, uncached /static/ URLs.
+
+Build: python assets.py (serve.py and app.py build on startup)
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+from typing import Dict, Optional
+
+from compression import BUILD_LEVELS, ENCODINGS, compress
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+PREVIOUS_MANIFEST_NAME = "manifest.previous.json"  # The build before the current one, still served
+HASH_LENGTH = 12  # Hex digits of SHA-256 in a fingerprinted name
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".json", ".svg", ".html", ".txt", ".map"}
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}  # Served if present, whether or not brotli is installed
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build(static_dir: str) -> Dict[str, str]:
+    """Fingerprint and precompress every static file. Returns the manifest (logical -> fingerprinted name)."""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir):
+            dirs[:] = [name for name in dirs if name != DIST_DIR]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+            stem, extension = posixpath.splitext(logical)
+            fingerprinted = f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{extension}"
+            manifest[logical] = fingerprinted
+
+            target = os.path.join(dist_dir, *fingerprinted.split("/"))
+            if os.path.exists(target):
+                continue  # Same content, already built
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if extension in COMPRESSIBLE_EXTENSIONS:
+                for encoding, suffix in ENCODINGS.items():
+                    compressed = compress(data, encoding, BUILD_LEVELS[encoding])
+                    if len(compressed) < len(data):
+                        _write_atomic(target + suffix, compressed)
+            _write_atomic(target, data)  # Last, so an existing target means a complete build
+
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    current = _read_manifest(manifest_path)
+    if current is not None and current != manifest:
+        _write_atomic(os.path.join(dist_dir, PREVIOUS_MANIFEST_NAME), json.dumps(current, indent=2, sort_keys=True).encode())
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class StaticAssets:
+    """An in-memory copy of the latest build and the one before it, every variant of every file."""
+
+    def __init__(self, static_dir: str):
+        self.static_dir = static_dir
+        self._manifest: Dict[str, str] = {}  # logical -> fingerprinted name
+        self._files: Dict[str, Dict[Optional[str], bytes]] = {}  # fingerprinted name -> {encoding or None: bytes}
+
+    def load(self) -> bool:
+        """Load the build from static/dist. Returns False (serving nothing) if there is none."""
+        dist_dir = os.path.join(self.static_dir, DIST_DIR)
+        manifest = _read_manifest(os.path.join(dist_dir, MANIFEST_NAME))
+        if manifest is None:
+            return False
+        previous = _read_manifest(os.path.join(dist_dir, PREVIOUS_MANIFEST_NAME)) or {}
+
+        files = {}
+        for fingerprinted in set(manifest.values()) | set(previous.values()):
+            path = os.path.join(dist_dir, *fingerprinted.split("/"))
+            variants = {}
+            for encoding, suffix in [(None, "")] + list(PRECOMPRESSED_SUFFIXES.items()):
+                try:
+                    with open(path + suffix, "rb") as f:
+                        variants[encoding] = f.read()
+                except OSError:
+                    pass
+            if None in variants:
+                files[fingerprinted] = variants
+        self._manifest = {logical: name for logical, name in manifest.items() if name in files}
+        self._files = files
+        return True
+
+    def url_path(self, logical: str) -> Optional[str]:
+        """The fingerprinted name of a static file, or None if it isn't in the build."""
+        return self._manifest.get(logical)
+
+    def variants(self, fingerprinted: str) -> Optional[Dict[Optional[str], bytes]]:
+        """A built file's bytes by encoding (None is uncompressed), or None if it isn't in the build."""
+        return self._files.get(fingerprinted)
+
+
+def main():
+    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    for logical, fingerprinted in build(static_dir).items():
+        print(f"{logical} -> {DIST_DIR}/{fingerprinted}")
+
+
+if __name__ == '__main__':
+    main()
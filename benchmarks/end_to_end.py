@@ -0,0 +1,281 @@
+"""
+End-to-end benchmark of the tracker against a local fake GitHub.
+
+For each repository count (38, 500 and 5,000 by default) this starts a
+FakeGitHub, runs the real app in a scratch directory and measures:
+
+- startup validation time (validate_github_urls, no cache)
+- poll-cycle time for every repository, cold (full pages) and warm (304s
+  when scraping; GraphQL has no conditional requests)
+- commit-to-visible latency: from a commit landing on the fake server to its
+  event appearing in /api/events, with the poller running normally
+- p50/p99 latency of the JSON endpoints under a concurrent load generator
+
+Each size runs in its own process (the app builds its tracker at import).
+Results are written as JSON; pass --baseline with an earlier results file to
+flag regressions beyond --tolerance and exit non-zero.
+
+Run: python benchmarks/end_to_end.py [--sizes 38,500,5000] [--duration 60] [--count-source graphql] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, ".."))
+
+from fake_github import FakeGitHub, repo_name  # noqa: E402
+
+ENDPOINTS = [
+    "/api/leaderboard",
+    "/api/leaderboard?mode=ranked&limit=50",
+    "/api/repositories",
+    "/api/stats",
+    "/api/recent-activity",
+    "/api/events?since_id=0&limit=100",
+]
+
+# Metrics where bigger is worse, checked against --baseline
+REGRESSION_METRICS = [
+    ("validation_seconds",),
+    ("poll_cycle_cold_seconds",),
+    ("poll_cycle_warm_seconds",),
+    ("commit_to_visible_ms", "p50"),
+] + [("endpoints", endpoint, "p99_ms") for endpoint in ENDPOINTS]
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[index], 2)
+
+
+def summarize(values: List[float]) -> Dict:
+    return {"count": len(values), "p50": percentile(values, 50), "p99": percentile(values, 99)}
+
+
+def watch_events(base_url: str, fake: FakeGitHub, stop: threading.Event, latencies: List[float]):
+    """Tail /api/events and time each commit from arrival on the fake server to its event."""
+    import requests
+
+    session = requests.Session()
+    repo_ids = {}
+    since_id = session.get(f"{base_url}/api/events").json()["next_since_id"]
+    while not stop.wait(0.1):
+        page = session.get(f"{base_url}/api/events", params={"since_id": since_id, "limit": 500}).json()
+        seen_at = time.time()
+        for event in page["events"]:
+            data = event["data"]
+            if data["repo_id"] not in repo_ids:
+                repo_ids.update({
+                    repo["id"]: tuple(repo["repo_url"].rstrip("/").split("/")[-2:])
+                    for repo in session.get(f"{base_url}/api/repositories").json()
+                })
+            repo = repo_ids[data["repo_id"]]
+            previous_total = data["total_commits"] - data["new_commit_count"]
+            for arrived_at in fake.arrival_times(repo, previous_total, data["total_commits"]):
+                latencies.append((seen_at - arrived_at) * 1000)
+        since_id = page["next_since_id"]
+
+
+def generate_load(base_url: str, stop: threading.Event, client: int, timings: Dict[str, List[float]],
+                  errors: Dict[str, int], lock: threading.Lock):
+    """Request the JSON endpoints round-robin until stopped."""
+    import requests
+
+    session = requests.Session()
+    i = client
+    while not stop.is_set():
+        endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            ok = session.get(base_url + endpoint, timeout=30).status_code < 500
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            timings[endpoint].append(elapsed)
+            if not ok:
+                errors[endpoint] += 1
+
+
+def run_size(repos: int, args) -> Dict:
+    """Benchmark one repository count in this process."""
+    workdir = tempfile.mkdtemp(prefix="tracker-bench-")
+    os.chdir(workdir)
+
+    fake = FakeGitHub(repos, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                      rate_limit=args.rate_limit, commit_rate=args.commit_rate)
+    fake_url = fake.start()
+
+    os.environ.setdefault("GITHUB_TOKEN", "benchmark")
+    os.environ["GITHUB_API_URL"] = fake_url
+    os.environ["COUNT_SOURCE"] = args.count_source
+
+    import logging
+    logging.getLogger("github-tracker").setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    import config
+    import app as web
+    from werkzeug.serving import make_server
+
+    tracker = web.tracker
+    results = {"repos": repos}
+
+    # Startup validation, as load_team_configs does it
+    github_urls = [f"https://github.com/{'/'.join(repo_name(i))}" for i in range(repos)]
+    start = time.perf_counter()
+    validation = config.validate_github_urls(github_urls)
+    results["validation_seconds"] = round(time.perf_counter() - start, 3)
+    results["validation_failures"] = sum(1 for valid, _ in validation.values() if not valid)
+
+    start = time.perf_counter()
+    tracker.apply_team_changes([(f"Team {i}", fake.url(fake_url, i)) for i in range(repos)], [], [])
+    results["register_seconds"] = round(time.perf_counter() - start, 3)
+
+    # One poll cycle over everything: first with full pages, then answered with 304s
+    for phase in ("cold", "warm"):
+        start = time.perf_counter()
+        tracker.check_repositories(tracker.get_all_repositories())
+        results[f"poll_cycle_{phase}_seconds"] = round(time.perf_counter() - start, 3)
+
+    # Live phase: poller, web server, new commits and clients all at once
+    server = make_server("127.0.0.1", 0, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    stop = threading.Event()
+    visible_latencies: List[float] = []
+    timings = {endpoint: [] for endpoint in ENDPOINTS}
+    errors = {endpoint: 0 for endpoint in ENDPOINTS}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=watch_events, args=(base_url, fake, stop, visible_latencies), daemon=True)]
+    threads += [
+        threading.Thread(target=generate_load, args=(base_url, stop, client, timings, errors, lock), daemon=True)
+        for client in range(args.clients)
+    ]
+
+    tracker.start()
+    fake.start_commits()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+    tracker.stop()
+    fake.stop()
+    server.shutdown()
+
+    arrived = sum(len(arrivals) for arrivals in fake.arrivals.values())
+    results["commit_to_visible_ms"] = summarize(visible_latencies)
+    results["commits_arrived"] = arrived
+    results["commits_not_yet_visible"] = arrived - len(visible_latencies)
+    results["endpoints"] = {
+        endpoint: {
+            "requests": len(timings[endpoint]),
+            "errors": errors[endpoint],
+            "p50_ms": percentile(timings[endpoint], 50),
+            "p99_ms": percentile(timings[endpoint], 99),
+        }
+        for endpoint in ENDPOINTS
+    }
+    results["fake_github"] = fake.stats()
+    return results
+
+
+def lookup(results: Dict, path) -> float:
+    for key in path:
+        results = results.get(key, {}) if isinstance(results, dict) else {}
+    return results if isinstance(results, (int, float)) else None
+
+
+def find_regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Compare each size's metrics with the baseline run of the same size."""
+    baseline_runs = {run["repos"]: run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in results["runs"]:
+        previous = baseline_runs.get(run["repos"])
+        if previous is None:
+            continue
+        for path in REGRESSION_METRICS:
+            old, new = lookup(previous, path), lookup(run, path)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(f"{run['repos']} repos: {'.'.join(path)} {old} -> {new}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="38,500,5000", help="Comma-separated repository counts")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of live load per size")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent load-generator clients")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean fake GitHub response latency")
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake GitHub responses that are 502s")
+    parser.add_argument("--rate-limit", type=int, default=100000, help="Fake GitHub requests per hour (0: no headers)")
+    parser.add_argument("--commit-rate", type=float, default=2.0, help="New commits per second across all repos")
+    parser.add_argument("--count-source", default="graphql", choices=("graphql", "scrape"),
+                        help="How the tracker fetches commit counts (the app's default is graphql)")
+    parser.add_argument("--json", default="end_to_end_results.json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging a regression")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)  # Internal: run one size in this process
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(run_size(args.single, args)))
+        return
+
+    config = {key: value for key, value in vars(args).items() if key not in ("json", "baseline", "single")}
+    results = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config, "runs": []}
+    passthrough = [
+        "--duration", str(args.duration), "--clients", str(args.clients),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate), "--rate-limit", str(args.rate_limit),
+        "--commit-rate", str(args.commit_rate), "--count-source", args.count_source,
+    ]
+    for size in [int(size) for size in args.sizes.split(",")]:
+        print(f"Benchmarking {size} repositories...", flush=True)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", str(size)] + passthrough,
+            check=True, stdout=subprocess.PIPE, text=True
+        ).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        results["runs"].append(run)
+
+        visible = run["commit_to_visible_ms"]
+        print(f"  validation {run['validation_seconds']}s, poll cycle cold {run['poll_cycle_cold_seconds']}s "
+              f"/ warm {run['poll_cycle_warm_seconds']}s")
+        print(f"  commit-to-visible p50 {visible['p50']} ms, p99 {visible['p99']} ms "
+              f"({visible['count']} seen, {run['commits_not_yet_visible']} still pending)")
+        for endpoint, stats in run["endpoints"].items():
+            print(f"  {endpoint}: p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms "
+                  f"({stats['requests']} requests, {stats['errors']} errors)")
+
+    with open(args.json, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
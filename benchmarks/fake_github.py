@@ -0,0 +1,323 @@
+"""
+Local stand-in for the parts of GitHub the tracker talks to.
+
+Serves repository pages in the markup ScrapeCountSource parses
+(span.fgColor-default holding "N Commits", with ETags so conditional requests
+get 304s), the REST repository endpoint validate_github_url calls, the
+paged commits listing CommitIngester walks (commit k of a repository has a
+SHA derived from the repo and k), and a /graphql endpoint answering
+GraphQLCountSource's batched queries, for repositories owner{i}/repo{i}. Latency, error rate, rate-limit headers and
+the rate at which new commits arrive are all configurable, and the arrival
+time of every commit is recorded so benchmarks can measure how long it takes
+to become visible. Rate limits apply per token (Authorization header), as on
+GitHub, and every repository page fetch is logged per repository.
+
+Run standalone: python benchmarks/fake_github.py --repos 500 --port 9000
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+REPO_PAGE = """<!DOCTYPE html>
+<html><head><title>{owner}/{name}</title></head>
+<body>
+<div class="repository-content">
+  <a href="/{owner}/{name}/commits/main/">
+    <span class="fgColor-default">{commits:,} Commits</span>
+  </a>
+  {padding}
+</div>
+</body></html>
+"""
+
+REPO_PATH = re.compile(r"^/(owner\d+)/(repo\d+)/?$")
+API_REPO_PATH = re.compile(r"^/repos/(owner\d+)/(repo\d+)/?$")
+API_COMMITS_PATH = re.compile(r"^/repos/(owner\d+)/(repo\d+)/commits/?$")
+
+
+def repo_name(i: int) -> Tuple[str, str]:
+    return f"owner{i}", f"repo{i}"
+
+
+def commit_sha(repo: Tuple[str, str], number: int) -> str:
+    """The SHA of a repository's number-th commit (1 is the root)."""
+    return hashlib.sha1(f"{'/'.join(repo)}:{number}".encode()).hexdigest()
+
+
+class FakeGitHub:
+    """
+    The fake server's state: per-repo commit counts, the commit arrival log
+    and the rate-limit window. start() serves it on a background thread.
+    """
+
+    def __init__(self, repos: int, latency_ms: float = 50, jitter_ms: float = 20,
+                 error_rate: float = 0.0, rate_limit: int = 5000, rate_limit_window: float = 3600,
+                 commit_rate: float = 0.0, page_padding: int = 20000, seed: int = 1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # Requests per window; 0 sends no rate-limit headers
+        self.rate_limit_window = rate_limit_window
+        self.commit_rate = commit_rate  # New commits per second, across all repos
+        self.padding = "<!-- " + "x" * page_padding + " -->"  # Real repo pages are large
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.commits: Dict[Tuple[str, str], int] = {
+            repo_name(i): self._random.randint(1, 300) for i in range(repos)
+        }
+        self.arrivals: Dict[Tuple[str, str], List[Tuple[int, float]]] = {}  # repo -> [(total, time)]
+        self.page_fetches: Dict[Tuple[str, str], List[float]] = {}  # repo -> times its page was served
+        self.graphql_batches: List[int] = []  # Repositories asked for in each GraphQL query
+        self.graphql_missing: Set[Tuple[str, str]] = set()  # Repos GraphQL reports NOT_FOUND (pages still served)
+        self.graphql_status = 200  # Set to e.g. 502 to fail every GraphQL query
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self._windows: Dict[str, List[float]] = {}  # token -> [window start, requests used]
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+
+    # Server
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve in the background and return the base URL."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake.handle(self)
+
+            def do_POST(self):
+                fake.handle(self)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-github").start()
+        return f"http://{host}:{self._server.server_port}"
+
+    def start_commits(self):
+        """Start adding commits at commit_rate per second."""
+        if self.commit_rate > 0:
+            threading.Thread(target=self._generate_commits, daemon=True, name="fake-github-commits").start()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def url(self, base_url: str, i: int) -> str:
+        owner, name = repo_name(i)
+        return f"{base_url}/{owner}/{name}"
+
+    # Commit arrivals
+
+    def _generate_commits(self):
+        """Add commits to random repositories as a Poisson process at commit_rate per second."""
+        repos = list(self.commits)
+        while not self._stop.wait(self._random.expovariate(self.commit_rate)):
+            self.push(self._random.choice(repos))
+
+    def push(self, repo: Tuple[str, str], count: int = 1):
+        with self._lock:
+            self.commits[repo] += count
+            self.arrivals.setdefault(repo, []).append((self.commits[repo], time.time()))
+
+    def arrival_times(self, repo: Tuple[str, str], previous_total: int, total: int) -> List[float]:
+        """Arrival times of the commits that took a repo from previous_total to total."""
+        with self._lock:
+            return [at for count, at in self.arrivals.get(repo, []) if previous_total < count <= total]
+
+    # Requests
+
+    def _rate_limit_headers(self, token: str) -> Tuple[Dict[str, str], bool]:
+        """Return the rate-limit headers for this token's request and whether it's over the limit."""
+        if not self.rate_limit:
+            return {}, False
+        with self._lock:
+            now = time.time()
+            window = self._windows.setdefault(token, [now, 0])
+            if now - window[0] >= self.rate_limit_window:
+                window[:] = [now, 0]
+            window[1] += 1
+            remaining = max(0, self.rate_limit - window[1])
+            exceeded = window[1] > self.rate_limit
+            reset = int(window[0] + self.rate_limit_window)
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset),
+        }, exceeded
+
+    def handle(self, request: BaseHTTPRequestHandler):
+        delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        with self._lock:
+            self.requests += 1
+        headers, exceeded = self._rate_limit_headers(request.headers.get("Authorization", ""))
+        if exceeded:
+            return self._send(request, 403, {"message": "API rate limit exceeded"}, headers)
+        if self.error_rate and self._random.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return self._send(request, 502, {"message": "Server Error"}, headers)
+
+        path, _, query = request.path.partition("?")
+        if request.command == "POST":
+            if path != "/graphql":
+                return self._send(request, 404, {"message": "Not Found"}, headers)
+            return self._graphql(request, headers)
+
+        commits_match = API_COMMITS_PATH.match(path)
+        if commits_match:
+            return self._commits(request, commits_match.groups(), parse_qs(query), headers)
+
+        api_match = API_REPO_PATH.match(path)
+        if api_match:
+            repo = api_match.groups()
+            if repo not in self.commits:
+                return self._send(request, 404, {"message": "Not Found"}, headers)
+            return self._send(request, 200, {
+                "full_name": "/".join(repo), "archived": False, "default_branch": "main"
+            }, headers)
+
+        page_match = REPO_PATH.match(path)
+        if page_match is None or page_match.groups() not in self.commits:
+            return self._send(request, 404, {"message": "Not Found"}, headers)
+
+        owner, name = page_match.groups()
+        with self._lock:
+            commits = self.commits[(owner, name)]
+            self.page_fetches.setdefault((owner, name), []).append(time.time())
+        etag = f'W/"{owner}-{name}-{commits}"'
+        headers["ETag"] = etag
+        if request.headers.get("If-None-Match") == etag:
+            with self._lock:
+                self.not_modified += 1
+            return self._send(request, 304, None, headers)
+
+        body = REPO_PAGE.format(owner=owner, name=name, commits=commits, padding=self.padding)
+        headers["Content-Type"] = "text/html; charset=utf-8"
+        return self._send(request, 200, body, headers)
+
+    def _commits(self, request: BaseHTTPRequestHandler, repo: Tuple[str, str], params: Dict[str, List[str]],
+                 headers: Dict[str, str]):
+        """A page of the commits listing, newest first, from the head or from ?sha= (inclusive)."""
+        with self._lock:
+            total = self.commits.get(repo)
+        if total is None:
+            return self._send(request, 404, {"message": "Not Found"}, headers)
+        per_page = int(params.get("per_page", ["30"])[0])
+        page = int(params.get("page", ["1"])[0])
+        start = total
+        if "sha" in params:
+            start = next((number for number in range(total, 0, -1) if commit_sha(repo, number) == params["sha"][0]), 0)
+            if not start:
+                return self._send(request, 422, {"message": "No commit found for SHA"}, headers)
+        else:
+            etag = f'W/"commits-{"-".join(repo)}-{total}"'
+            headers["ETag"] = etag
+            if page == 1 and request.headers.get("If-None-Match") == etag:
+                with self._lock:
+                    self.not_modified += 1
+                return self._send(request, 304, None, headers)
+
+        newest = start - (page - 1) * per_page
+        body = [{
+            "sha": commit_sha(repo, number),
+            "commit": {"author": {"name": repo[0], "date": "2024-03-20T09:00:00Z"}, "message": f"Commit {number}"},
+            "author": {"login": repo[0]},
+        } for number in range(newest, max(0, newest - per_page), -1)]
+        return self._send(request, 200, body, headers)
+
+    def _graphql(self, request: BaseHTTPRequestHandler, headers: Dict[str, str]):
+        """Answer a batched query: repository r{i} is named by variables o{i}/n{i}."""
+        length = int(request.headers.get("Content-Length") or 0)
+        variables = json.loads(request.rfile.read(length) or b"{}").get("variables") or {}
+        with self._lock:
+            count = 0
+            while f"o{count}" in variables:
+                count += 1
+            self.graphql_batches.append(count)
+        if self.graphql_status != 200:
+            return self._send(request, self.graphql_status, {"message": "Server Error"}, headers)
+
+        data, errors = {}, []
+        for i in range(count):
+            repo = (variables[f"o{i}"], variables[f"n{i}"])
+            with self._lock:
+                commits = self.commits.get(repo) if repo not in self.graphql_missing else None
+            if commits is None:
+                data[f"r{i}"] = None
+                errors.append({
+                    "type": "NOT_FOUND", "path": [f"r{i}"],
+                    "message": f"Could not resolve to a Repository with the name '{'/'.join(repo)}'.",
+                })
+            else:
+                data[f"r{i}"] = {"defaultBranchRef": {"target": {"history": {"totalCount": commits}}}}
+        body = {"data": data}
+        if errors:
+            body["errors"] = errors
+        return self._send(request, 200, body, headers)
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, body, headers: Dict[str, str]):
+        if body is None:
+            payload = b""
+        elif isinstance(body, str):
+            payload = body.encode()
+        else:
+            payload = json.dumps(body).encode()
+            headers.setdefault("Content-Type", "application/json")
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        if payload:
+            request.wfile.write(payload)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"requests": self.requests, "not_modified": self.not_modified, "errors": self.errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=38)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--commit-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.repos, latency_ms=args.latency_ms, error_rate=args.error_rate,
+                      rate_limit=args.rate_limit, commit_rate=args.commit_rate)
+    base_url = fake.start(port=args.port)
+    fake.start_commits()
+    print(f"Fake GitHub serving {args.repos} repositories at {base_url} (e.g. {fake.url(base_url, 0)})")
+    print(f"Point validation and GraphQL at it with GITHUB_API_URL={base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Micro-benchmark of commit-count extraction from repository pages.
+
+Checks the streaming extractor (html_extract) against the sample pages in
+benchmarks/fixtures, whose expected counts are in fixtures/expected.json, and
+then compares it with the previous BeautifulSoup path: per-page CPU time and
+peak traced memory. Each fixture's <!-- filler --> comments are expanded with
+ordinary page markup so the page is --page-kb in size, as real pages are.
+
+Exits non-zero if the streaming extractor misreads any fixture.
+
+Run: python benchmarks/html_extraction.py [--page-kb 300] [--iterations 50] [--json out.json]
+"""
+
+import argparse
+import codecs
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+from bs4 import BeautifulSoup
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, ".."))
+
+from html_extract import CHUNK_SIZE, extract_commit_count  # noqa: E402
+
+FILLER_MARKER = "<!-- filler -->"
+FILLER_ROW = (
+    '<tr class="react-directory-row"><td class="react-directory-row-name-cell-large-screen">'
+    '<div class="react-directory-filename-column"><svg aria-hidden="true" class="icon-directory" '
+    'height="16" viewBox="0 0 16 16" width="16"></svg><a title="{i}" aria-label="{i}, (File)" '
+    'class="Link--primary" href="/octo-org/repo/blob/main/src/module_{i}.py">module_{i}.py</a></div>'
+    '</td><td><a class="Link--secondary" href="/octo-org/repo/commit/{i:040x}">Refactor handler {i}</a>'
+    '</td><td><relative-time datetime="2025-02-01T12:00:00Z">Feb 1</relative-time></td></tr>\n'
+)
+
+
+def expand(template: str, page_bytes: int) -> bytes:
+    """Replace the filler comments with directory rows so the page is about page_bytes long."""
+    markers = template.count(FILLER_MARKER)
+    if not markers:
+        return template.encode()
+    per_marker = max(0, page_bytes - len(template)) // markers
+    rows, size, i = [], 0, 0
+    while size < per_marker:
+        rows.append(FILLER_ROW.format(i=i))
+        size += len(rows[-1])
+        i += 1
+    return template.replace(FILLER_MARKER, "".join(rows)).encode()
+
+
+def extract_streaming(page: bytes) -> Optional[int]:
+    """The current path: decode and parse CHUNK_SIZE pieces as they would arrive."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = (decoder.decode(page[start:start + CHUNK_SIZE]) for start in range(0, len(page), CHUNK_SIZE))
+    count, _ = extract_commit_count(chunks)
+    return count
+
+
+def extract_beautifulsoup(page: bytes) -> Optional[int]:
+    """The previous path: a full BeautifulSoup tree, then the first span.fgColor-default."""
+    soup = BeautifulSoup(page.decode("utf-8", errors="replace"), "html.parser")
+    element = soup.select_one("span.fgColor-default")
+    if element is None:
+        return None
+    try:
+        return int("".join(filter(str.isdigit, element.text.strip())))
+    except ValueError:
+        return None
+
+
+EXTRACTORS: Dict[str, Callable[[bytes], Optional[int]]] = {
+    "streaming": extract_streaming,
+    "beautifulsoup": extract_beautifulsoup,
+}
+
+
+def measure(extract: Callable[[bytes], Optional[int]], page: bytes, iterations: int) -> Dict:
+    start = time.process_time()
+    for _ in range(iterations):
+        extract(page)
+    cpu_ms = (time.process_time() - start) / iterations * 1000
+
+    tracemalloc.start()
+    extract(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_ms": round(cpu_ms, 3), "peak_kb": round(peak / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-kb", type=int, default=300, help="Size each fixture is padded to")
+    parser.add_argument("--iterations", type=int, default=50, help="Extractions timed per fixture and path")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, "expected.json")) as f:
+        expected = json.load(f)
+
+    results = {"page_kb": args.page_kb, "iterations": args.iterations, "fixtures": {}}
+    failures = []
+    print(f"{'fixture':32} {'expected':>8} {'path':>14} {'found':>8} {'cpu ms':>9} {'peak KB':>9}")
+    for name, expected_count in expected.items():
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            page = expand(f.read(), args.page_kb * 1024)
+        fixture = results["fixtures"][name] = {"expected": expected_count, "bytes": len(page)}
+        for path, extract in EXTRACTORS.items():
+            found = extract(page)
+            run = fixture[path] = dict(found=found, **measure(extract, page, args.iterations))
+            if path == "streaming" and found != expected_count:
+                failures.append(f"{name}: expected {expected_count}, got {found}")
+            print(f"{name:32} {str(expected_count):>8} {path:>14} {str(found):>8} "
+                  f"{run['cpu_ms']:>9} {run['peak_kb']:>9}")
+
+    for path in EXTRACTORS:
+        cpu = sum(fixture[path]["cpu_ms"] for fixture in results["fixtures"].values())
+        peak = max(fixture[path]["peak_kb"] for fixture in results["fixtures"].values())
+        results[path] = {"total_cpu_ms": round(cpu, 3), "max_peak_kb": peak}
+        print(f"{path}: {cpu:.1f} ms CPU across all fixtures, peak {peak} KB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if failures:
+        print("Streaming extractor misread fixtures:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
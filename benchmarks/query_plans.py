@@ -0,0 +1,152 @@
+"""
+Query plan and latency benchmark for the tracker's hot queries.
+
+Builds a scratch database with --rows rows in events and activity_history
+(1M by default), runs each hot query at schema version 2 (no indexes) and
+again after migrating to the latest version, and prints the query plan and
+median latency for both.
+
+Run: python benchmarks/query_plans.py [--rows 1000000] [--teams 500] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from migrations import migrate, LATEST_VERSION  # noqa: E402
+
+# The queries GitHubTracker runs on every request or poll cycle
+QUERIES = {
+    "team_totals": ("""
+        SELECT t.team_name, COALESCE(SUM(r.total_commits), 0) as total_commits,
+               COALESCE(MAX(r.last_checked), '') as reached_at
+        FROM teams t
+        LEFT JOIN repositories r ON t.id = r.team_id
+        GROUP BY t.id
+    """, ()),
+    "recent_activity": ("""
+        SELECT id, event_type, team_name, repo_name, commit_count, total_commits,
+               datetime(timestamp, 'localtime') as local_timestamp
+        FROM activity_history
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """, (50,)),
+    "events_since": ("""
+        SELECT id, event_type, entity_id, data, created_at
+        FROM events
+        WHERE id > ?
+        ORDER BY id ASC
+        LIMIT ?
+    """, None),  # Parameters filled in once the table is populated
+    "events_to_prune": ("""
+        SELECT COUNT(*) FROM events WHERE created_at < ?
+    """, None),
+}
+
+
+def populate(conn: sqlite3.Connection, rows: int, teams: int):
+    """Fill the database with synthetic teams, repos, events and activity."""
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO teams (team_name) VALUES (?)", [(f"Team {i}",) for i in range(teams)])
+    cursor.executemany(
+        "INSERT INTO repositories (team_id, repo_url, repo_name, total_commits, last_checked) VALUES (?, ?, ?, ?, ?)",
+        [(i + 1, f"https://github.com/team{i}/repo", "repo", random.randint(0, 500),
+          datetime.now().isoformat()) for i in range(teams)]
+    )
+
+    start = datetime.now() - timedelta(hours=36)
+    step = timedelta(hours=36) / rows
+
+    def activity():
+        for i in range(rows):
+            yield ("new_commits", f"Team {i % teams}", "repo", 1, i, (start + step * i).isoformat())
+
+    def events():
+        for i in range(rows):
+            yield ("new_commits", i % teams + 1, '{"new_commit_count": 1}', (start + step * i).isoformat())
+
+    cursor.executemany(
+        "INSERT INTO activity_history (event_type, team_name, repo_name, commit_count, total_commits, timestamp) "
+        "VALUES (?, ?, ?, ?, ?, ?)", activity()
+    )
+    cursor.executemany(
+        "INSERT INTO events (event_type, entity_id, data, created_at) VALUES (?, ?, ?, ?)", events()
+    )
+
+
+def measure(conn: sqlite3.Connection, sql: str, params, repeat: int) -> dict:
+    plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"plan": plan, "median_ms": round(statistics.median(timings), 3)}
+
+
+def run(rows: int, teams: int, repeat: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+
+    conn.execute("BEGIN")
+    migrate(conn, target=2)
+    print(f"Populating {rows:,} events and activity rows...")
+    populate(conn, rows, teams)
+    conn.execute("COMMIT")
+
+    QUERIES["events_since"] = (QUERIES["events_since"][0], (rows - 100, 100))
+    cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
+    QUERIES["events_to_prune"] = (QUERIES["events_to_prune"][0], (cutoff,))
+
+    results = {"rows": rows, "teams": teams, "before": {}, "after": {}}
+    for name, (sql, params) in QUERIES.items():
+        results["before"][name] = measure(conn, sql, params, repeat)
+
+    start = time.perf_counter()
+    conn.execute("BEGIN")
+    migrate(conn)
+    conn.execute("COMMIT")
+    results["migration_seconds"] = round(time.perf_counter() - start, 2)
+
+    for name, (sql, params) in QUERIES.items():
+        results["after"][name] = measure(conn, sql, params, repeat)
+
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--teams", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.teams, args.repeat)
+
+    print(f"\nMigration to version {LATEST_VERSION} took {results['migration_seconds']}s\n")
+    for name in QUERIES:
+        before = results["before"][name]
+        after = results["after"][name]
+        print(f"{name}: {before['median_ms']} ms -> {after['median_ms']} ms")
+        print(f"  before: {'; '.join(before['plan'])}")
+        print(f"  after:  {'; '.join(after['plan'])}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Sharded polling benchmark: several poller processes against one fake GitHub.
+
+Registers --repos repositories in a scratch database, then for each instance
+count in --instances starts that many poller processes, each with its own
+token and POLLER_INSTANCE_ID, against a FakeGitHub that rate-limits each
+token to --rate-limit requests per --rate-limit-window seconds. It reports:
+
+- throughput: repository page fetches per second across all instances,
+  after a warm-up quarter of the run
+- freshness: the share of repositories fetched within the last two polling
+  intervals when the run ends
+- double polls: consecutive fetches of one repository less than
+  POLLING_INTERVAL apart (from any instances; should be 0)
+- how many repositories each instance holds leases on at the end
+
+With --churn, each run with two or more instances also kills one instance
+a third of the way in (its repositories are taken over once its lease
+expires) and starts a new one at two thirds (the others release repositories
+to it). Give churn runs a --duration of 120 or more.
+
+Run: python benchmarks/sharded_polling.py [--repos 600] [--instances 1,2,4] [--duration 60] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, ".."))
+
+from fake_github import FakeGitHub  # noqa: E402
+
+DOUBLE_POLL_TOLERANCE = 1.0  # seconds of scheduling and latency jitter allowed below POLLING_INTERVAL
+
+
+def run_poller(index: int, db_path: str):
+    """Child process: one sharded poller with its own token."""
+    import logging
+    logging.getLogger("github-tracker").setLevel(logging.WARNING)
+
+    import github_commit_tracker
+    github_commit_tracker.DB_PATH = db_path
+    tracker = github_commit_tracker.GitHubTracker(
+        f"bench-token-{index}",
+        count_source="scrape",
+        max_polling_interval=github_commit_tracker.POLLING_INTERVAL,  # Keep every repo on the fastest schedule
+        rate_limit_reserve=0,
+        instance_id=f"bench-poller-{index}",
+    )
+
+    def stop(signum, frame):
+        tracker.running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        tracker.run_polling_loop()
+    finally:
+        tracker.stop()
+        tracker.close()
+
+
+def start_poller(index: int, db_path: str, verbose: bool) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--poller", str(index), "--db", db_path],
+                            stderr=None if verbose else subprocess.DEVNULL)
+
+
+def register_repositories(db_path: str, fake: FakeGitHub, base_url: str, repos: int):
+    import github_commit_tracker
+    github_commit_tracker.DB_PATH = db_path
+    tracker = github_commit_tracker.GitHubTracker()
+    tracker.apply_team_changes([(f"Team {i}", fake.url(base_url, i)) for i in range(repos)], [], [])
+    tracker.close()
+
+
+def analyse(fake: FakeGitHub, start: float, end: float, poll_interval: float) -> Dict:
+    warm_from = start + (end - start) / 4
+    fetches = [at for times in fake.page_fetches.values() for at in times if at >= warm_from]
+    gaps = [
+        later - earlier
+        for times in fake.page_fetches.values()
+        for earlier, later in zip(times, times[1:])
+    ]
+    fresh = sum(1 for times in fake.page_fetches.values() if times and times[-1] >= end - 2 * poll_interval)
+    return {
+        "polls_per_second": round(len(fetches) / (end - warm_from), 2),
+        "fresh_fraction": round(fresh / len(fake.commits), 3),
+        "double_polls": sum(1 for gap in gaps if gap < poll_interval - DOUBLE_POLL_TOLERANCE),
+        "min_gap_seconds": round(min(gaps), 2) if gaps else None,
+    }
+
+
+def lease_counts(db_path: str) -> Dict[str, int]:
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT COALESCE(instance_id, '(free)'), COUNT(*) FROM repo_leases GROUP BY 1").fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+def run(instances: int, args) -> Dict:
+    from github_commit_tracker import POLLING_INTERVAL
+
+    workdir = tempfile.mkdtemp(prefix="tracker-shards-")
+    db_path = os.path.join(workdir, "tracker.db")
+    fake = FakeGitHub(args.repos, latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4,
+                      rate_limit=args.rate_limit, rate_limit_window=args.rate_limit_window)
+    base_url = fake.start()
+    register_repositories(db_path, fake, base_url, args.repos)
+
+    start = time.time()
+    pollers: List[subprocess.Popen] = [start_poller(i, db_path, args.verbose) for i in range(instances)]
+    churn = args.churn and instances >= 2
+    killed = joined = False
+    try:
+        while time.time() - start < args.duration:
+            time.sleep(0.5)
+            elapsed = time.time() - start
+            if churn and not killed and elapsed >= args.duration / 3:
+                pollers[0].kill()  # No clean release: the others must wait out its lease
+                killed = True
+            if churn and not joined and elapsed >= 2 * args.duration / 3:
+                pollers.append(start_poller(instances, db_path, args.verbose))
+                joined = True
+        end = time.time()
+        leases = lease_counts(db_path)
+    finally:
+        for poller in pollers:
+            if poller.poll() is None:
+                poller.terminate()
+        for poller in pollers:
+            try:
+                poller.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                poller.kill()
+        fake.stop()
+
+    result = {"instances": instances, "churn": churn, "leases": leases}
+    result.update(analyse(fake, start, end, POLLING_INTERVAL))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=600)
+    parser.add_argument("--instances", default="1,2,4", help="Comma-separated poller counts to run")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds per run")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Mean fake GitHub response latency")
+    parser.add_argument("--rate-limit", type=int, default=150, help="Requests per token per window")
+    parser.add_argument("--rate-limit-window", type=float, default=15, help="Rate-limit window in seconds")
+    parser.add_argument("--churn", action="store_true", help="Kill one instance and add another mid-run")
+    parser.add_argument("--verbose", action="store_true", help="Show the pollers' logs")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--poller", type=int, help=argparse.SUPPRESS)  # Internal: run one poller
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.poller is not None:
+        run_poller(args.poller, args.db)
+        return
+
+    results = {"config": {key: value for key, value in vars(args).items() if key not in ("json", "verbose", "poller", "db")},
+               "runs": []}
+    baseline = None
+    for instances in [int(count) for count in args.instances.split(",")]:
+        print(f"Running {instances} poller(s) over {args.repos} repositories...", flush=True)
+        run_result = run(instances, args)
+        results["runs"].append(run_result)
+        baseline = baseline or run_result["polls_per_second"] / instances
+        scaling = run_result["polls_per_second"] / (baseline * instances) if baseline else 0
+        print(f"  {run_result['polls_per_second']} polls/s ({scaling:.0%} of linear), "
+              f"{run_result['fresh_fraction']:.0%} fresh, {run_result['double_polls']} double polls "
+              f"(min gap {run_result['min_gap_seconds']}s), leases {run_result['leases']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Per-commit ingestion for the GitHub tracker.
+Pages through a repository's commits (newest first) via the REST API until it
+reaches the last SHA we've already stored, so steady-state cost scales with
+the number of new commits rather than the size of the history. The first page
+is requested conditionally, so an unchanged repository costs one 304.
+A walk is capped at max_pages per poll; given a start SHA, the same walk
+resumes further down the history, which is how the tracker backfills
+repositories whose history didn't fit in one poll.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import metrics
+from count_sources import parse_repo_path, repo_label, USER_AGENT, PERMANENT_FAILURE_STATUSES
+from http_cache import ValidatorCache
+from http_client import CircuitBreaker, HttpClient
+from profiling import PROFILER
+from scheduler import RateLimitBudget
+
+logger = logging.getLogger("github-tracker")
+
+GITHUB_API_URL = "https://api.github.com"
+COMMITS_PER_PAGE = 100  # GitHub's maximum
+MAX_COMMIT_PAGES = 50  # Cap on pages fetched per repo per poll (5,000 commits); older ones wait for later polls
+
+
+class CommitIngester:
+    """Fetch the commits a repository has gained since the last SHA we saw."""
+
+    def __init__(self, github_token: Optional[str], validator_cache: ValidatorCache,
+                 rate_limit: Optional[RateLimitBudget] = None,
+                 api_url: str = GITHUB_API_URL, max_pages: int = MAX_COMMIT_PAGES,
+                 http: Optional[HttpClient] = None, breaker: Optional[CircuitBreaker] = None):
+        self.github_token = github_token
+        self.validator_cache = validator_cache
+        self.rate_limit = rate_limit
+        self.http = http or HttpClient()
+        self.breaker = breaker
+        self.api_url = api_url.rstrip('/')
+        self.max_pages = max_pages
+
+    def commits_url(self, repo_url: str) -> Optional[str]:
+        path = parse_repo_path(repo_url)
+        if path is None:
+            return None
+        return f"{self.api_url}/repos/{path[0]}/{path[1]}/commits"
+
+    @staticmethod
+    def _parse_commit(item: Dict) -> Dict:
+        commit = item.get('commit') or {}
+        author = commit.get('author') or {}
+        login = (item.get('author') or {}).get('login')
+        message = commit.get('message') or ''
+        return {
+            "sha": item['sha'],
+            "author": login or author.get('name'),
+            "message": message.split('\n', 1)[0],
+            "timestamp": author.get('date'),
+        }
+
+    def fetch_new_commits(self, repo_url: str, last_sha: Optional[str],
+                          start_sha: Optional[str] = None, max_pages: Optional[int] = None) -> Optional[Dict]:
+        """fetch_commits_since, recording how long the fetch took and telling the breaker about successes."""
+        with metrics.REPO_FETCH_SECONDS.time(repo=repo_label(repo_url)):
+            result = self.fetch_commits_since(repo_url, last_sha, start_sha, max_pages)
+        if result is not None and self.breaker is not None:
+            self.breaker.record_success(repo_url)
+        return result
+
+    def fetch_commits_since(self, repo_url: str, last_sha: Optional[str],
+                            start_sha: Optional[str] = None, max_pages: Optional[int] = None) -> Optional[Dict]:
+        """
+        Return the commits newer than last_sha, newest first, as
+        {"commits": [...], "found_last": bool, "complete": bool}, or
+        {"not_modified": True} if nothing changed, or None on failure.
+        complete means we reached the start of the history; complete without
+        found_last means last_sha is gone (a force-push rewrote history).
+        Neither means the walk hit max_pages first (the ingester's cap, or a
+        lower one the caller can afford). With start_sha the walk starts at
+        that commit (inclusive) instead of the default branch head,
+        unconditionally.
+        """
+        max_pages = min(max_pages or self.max_pages, self.max_pages)
+        url = self.commits_url(repo_url)
+        if url is None:
+            return None
+        conditional = start_sha is None  # Validators belong to the head listing
+        params = {"per_page": COMMITS_PER_PAGE}
+        if start_sha is not None:
+            params["sha"] = start_sha
+
+        headers = {'User-Agent': USER_AGENT, 'Accept': 'application/vnd.github+json'}
+        if self.github_token:
+            headers['Authorization'] = f'token {self.github_token}'
+
+        commits: List[Dict] = []
+        try:
+            for page in range(1, max_pages + 1):
+                page_headers = dict(headers)
+                if page == 1 and last_sha is not None and conditional:
+                    page_headers.update(self.validator_cache.conditional_headers(url))
+
+                with PROFILER.phase("fetch"):
+                    response = self.http.get(
+                        url, headers=page_headers,
+                        params=dict(params, page=page)
+                    )
+                metrics.GITHUB_RESPONSES.inc(source="commits", status=response.status_code)
+                if self.rate_limit is not None:
+                    self.rate_limit.update_from_headers(response.headers, response.status_code)
+
+                if response.status_code == 304:
+                    self.validator_cache.record_hit()
+                    return {"not_modified": True}
+                if page == 1 and conditional:
+                    self.validator_cache.record_miss()
+                if response.status_code == 409:
+                    # Empty repository
+                    return {"commits": [], "found_last": last_sha is None, "complete": True}
+                if response.status_code != 200:
+                    logger.error(f"Failed to fetch commits for {repo_url}: {response.status_code}")
+                    rate_limited = response.headers.get('X-RateLimit-Remaining') == '0'
+                    if (self.breaker is not None and response.status_code in PERMANENT_FAILURE_STATUSES
+                            and not rate_limited):
+                        self.breaker.record_failure(repo_url, f"HTTP {response.status_code}")
+                    return None
+
+                if page == 1 and conditional:
+                    first_page_validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                elif page == 1:
+                    first_page_validators = (None, None)  # store() ignores these
+
+                with PROFILER.phase("parse"):
+                    items = response.json()
+                for item in items:
+                    if item.get('sha') == last_sha:
+                        self.validator_cache.store(url, *first_page_validators)
+                        return {"commits": commits, "found_last": True, "complete": False}
+                    commits.append(self._parse_commit(item))
+
+                if len(items) < COMMITS_PER_PAGE:
+                    self.validator_cache.store(url, *first_page_validators)
+                    return {"commits": commits, "found_last": last_sha is None, "complete": True}
+
+            logger.warning(f"Stopped after {max_pages} pages of commits for {repo_url}, the rest waits for later polls")
+            return {"commits": commits, "found_last": False, "complete": False}
+
+        except Exception as e:
+            metrics.FETCH_ERRORS.inc(source="commits")
+            logger.error(f"Error fetching commits for {repo_url}: {str(e)}")
+            return None
@@ -0,0 +1,45 @@
+"""
+Content-Encoding negotiation and compression for API responses and static
+assets. Brotli is used when the brotli package is installed; gzip always
+works.
+"""
+
+import gzip
+from typing import Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: responses and assets fall back to gzip
+    brotli = None
+
+# Content-Encoding -> file suffix of a precompressed variant, best first
+ENCODINGS = {"br": ".br", "gzip": ".gz"} if brotli is not None else {"gzip": ".gz"}
+
+# Dynamic responses are compressed per request (or once per snapshot), so favour speed
+RESPONSE_LEVELS = {"br": 5, "gzip": 6}
+# Static assets are compressed once at build time, so use the smallest output
+BUILD_LEVELS = {"br": 11, "gzip": 9}
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress data with a Content-Encoding from ENCODINGS."""
+    level = level if level is not None else RESPONSE_LEVELS[encoding]
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)  # mtime=0: the same bytes for the same data
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate(accept_encodings, available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """
+    The encoding to send for a request's Accept-Encoding (werkzeug's
+    request.accept_encodings), or None for identity. Highest quality wins;
+    ties go to the order of available.
+    """
+    best, best_quality = None, 0
+    for encoding in available:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
@@ -4,17 +4,39 @@ Loads team configurations from teams.csv and provides settings for the applicati
 """
 
 import csv
+import json
 import os
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from http_client import HttpClient
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Path to the teams CSV file
 TEAMS_CSV_PATH = 'teams.csv'
 
+# GitHub REST API base URL (override to point at GitHub Enterprise or a local stand-in)
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+GITHUB_GRAPHQL_URL = os.getenv('GITHUB_GRAPHQL_URL', f"{GITHUB_API_URL}/graphql")  # Follows GITHUB_API_URL by default
+
+# Repository validation settings
+VALIDATION_CACHE_PATH = '.validation_cache.json'  # On-disk cache of validation results
+VALIDATION_CACHE_TTL = int(os.getenv('VALIDATION_CACHE_TTL', 6 * 3600))  # seconds
+VALIDATION_WORKERS = 8  # Concurrent validation requests
+VALIDATION_TIMEOUT = 10  # seconds per validation request
+
+# Validation outcomes worth caching; rate limits and network errors are retried next time
+CACHEABLE_VALIDATION_MESSAGES = {
+    "Repository exists and is accessible",
+    "Repository not found",
+    "Repository is archived",
+}
+_validation_http = HttpClient(timeout=VALIDATION_TIMEOUT, pool_size=VALIDATION_WORKERS)  # Shared by validation workers
+
 def validate_github_url(url):
     """Validate if a GitHub URL is well-formed and accessible."""
     try:
@@ -30,10 +52,10 @@ def validate_github_url(url):
             return False, "Invalid GitHub repository URL format - must include both owner and repository name"
             
         # Construct proper API URL
-        api_url = f"https://api.github.com/repos/{path_parts[0]}/{path_parts[1]}"
+        api_url = f"{GITHUB_API_URL}/repos/{path_parts[0]}/{path_parts[1]}"
         
         headers = {'Authorization': f'token {GITHUB_TOKEN}'} if GITHUB_TOKEN else {}
-        response = requests.get(api_url, headers=headers)
+        response = _validation_http.get(api_url, headers=headers)
         
         if response.status_code == 200:
             repo_data = response.json()
@@ -50,27 +72,78 @@ def validate_github_url(url):
     except Exception as e:
         return False, f"Error: {str(e)}"
 
+def _load_validation_cache():
+    """Load cached validation results, dropping any older than the TTL."""
+    try:
+        with open(VALIDATION_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {url: entry for url, entry in cache.items() if now - entry["checked_at"] < VALIDATION_CACHE_TTL}
+
+def _save_validation_cache(cache):
+    """Write validation results to disk atomically."""
+    tmp_path = VALIDATION_CACHE_PATH + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, VALIDATION_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: could not save validation cache: {str(e)}")
+
+def validate_github_urls(urls):
+    """
+    Validate many repository URLs, returning {url: (is_valid, message)}.
+    Fresh cached results are reused; the rest are checked concurrently.
+    """
+    cache = _load_validation_cache()
+    results = {url: (cache[url]["valid"], cache[url]["message"]) for url in urls if url in cache}
+    pending = [url for url in dict.fromkeys(urls) if url not in results]
+    
+    if pending:
+        with ThreadPoolExecutor(max_workers=VALIDATION_WORKERS) as executor:
+            for url, result in zip(pending, executor.map(validate_github_url, pending)):
+                results[url] = result
+                if result[1] in CACHEABLE_VALIDATION_MESSAGES:
+                    cache[url] = {"valid": result[0], "message": result[1], "checked_at": time.time()}
+        _save_validation_cache(cache)
+    
+    return results
+
+def read_team_rows(path=TEAMS_CSV_PATH):
+    """Parse the teams CSV into (team_number, repo_url) rows, without validating them."""
+    rows = []
+    with open(path, 'r') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            # Handle potential whitespace and formatting issues
+            team_number = int(row['team_number'].strip())
+            repo_url = row['repository_url'].strip().rstrip('/')
+            rows.append((team_number, repo_url))
+    return rows
+
+def team_name(team_number):
+    return f"Team {team_number}"
+
 def load_team_configs():
     """Load and format team configurations for use with GitHubTracker."""
     teams = []
     try:
-        with open(TEAMS_CSV_PATH, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                # Handle potential whitespace and formatting issues
-                team_number = int(row['team_number'].strip())
-                repo_url = row['repository_url'].strip().rstrip('/')
-                
-                # Validate URL before adding
-                is_valid, message = validate_github_url(repo_url)
-                if not is_valid:
-                    print(f"Warning: Team {team_number} repository ({repo_url}) is invalid: {message}")
-                    continue
-                
-                teams.append({
-                    "name": f"Team {team_number}",
-                    "repos": [repo_url]
-                })
+        rows = read_team_rows()
+        
+        # Validate URLs before adding
+        validation = validate_github_urls([repo_url for _, repo_url in rows])
+        for team_number, repo_url in rows:
+            is_valid, message = validation[repo_url]
+            if not is_valid:
+                print(f"Warning: Team {team_number} repository ({repo_url}) is invalid: {message}")
+                continue
+            
+            teams.append({
+                "name": team_name(team_number),
+                "repos": [repo_url]
+            })
         return teams
     except Exception as e:
         print(f"Error loading team configurations: {str(e)}")
@@ -86,12 +159,50 @@ WEB_CONFIG = {
     "host": "0.0.0.0",   # Listen on all interfaces
     "port": 5000,        # Port to run the web server on
     "debug": True,       # Enable debug mode (set to False in production)
+    "compress_min_bytes": int(os.getenv('COMPRESS_MIN_BYTES', 1024)),  # Smaller responses aren't worth compressing
+}
+
+# Production serving configuration (serve.py / gunicorn.conf.py)
+WEB_THREADS = int(os.getenv('WEB_THREADS', 32))  # Threads per web worker; each open /api/stream holds one
+SERVE_CONFIG = {
+    "bind": os.getenv('BIND', '0.0.0.0:8000'),  # Address the web workers listen on
+    "workers": int(os.getenv('WEB_WORKERS', os.cpu_count() or 2)),  # Web worker processes
+    "threads": WEB_THREADS,
+    "max_streams": int(os.getenv('MAX_STREAMS', max(1, WEB_THREADS - 8))),  # Open /api/stream connections per worker; the rest get 503s
+    "poller_tokens": [token for token in os.getenv('GITHUB_TOKENS', '').split(',') if token],  # One sharded poller per token
+    "poller_metrics_port": int(os.getenv('POLLER_METRICS_PORT', 9100)),  # The poller's /metrics (sharded pollers count up from it); 0 disables
+}
+
+# Profiling (profiling.py); off unless PROFILE_SAMPLE_RATE is set
+PROFILING_CONFIG = {
+    "sample_rate": float(os.getenv('PROFILE_SAMPLE_RATE', 0)),  # Fraction of poll cycles, repo checks and requests profiled
+    "interval_ms": float(os.getenv('PROFILE_INTERVAL_MS', 5)),  # Stack sampling interval
+    "keep": int(os.getenv('PROFILE_KEEP', 20)),  # Slowest traces kept per process
+    "dump_interval": float(os.getenv('PROFILE_DUMP_INTERVAL', 60)),  # Seconds between the poller's profile dumps
+    "admin_token": os.getenv('ADMIN_TOKEN'),  # Bearer token for /api/admin/*; unset disables those endpoints
 }
 
 # GitHub API configuration
 GITHUB_CONFIG = {
     "polling_interval": 5,  # Time between checks (in seconds)
     "token": GITHUB_TOKEN,  # Add token to config for easier access
+    "max_concurrent_requests": int(os.getenv('MAX_CONCURRENT_REQUESTS', 16)),  # Global cap on in-flight repo fetches
+    "max_requests_per_host": int(os.getenv('MAX_REQUESTS_PER_HOST', 8)),  # Cap on in-flight fetches per host
+    "count_source": os.getenv('COUNT_SOURCE', 'graphql'),  # "graphql" (batched, falls back to scraping), "scrape" or "commits" (per-commit ingestion)
+    "graphql_batch_size": int(os.getenv('GRAPHQL_BATCH_SIZE', 50)),  # Repositories per GraphQL query
+    "graphql_url": GITHUB_GRAPHQL_URL,  # GraphQL endpoint for the "graphql" count source
+    "api_url": GITHUB_API_URL,  # REST API root for the "commits" count source
+    "max_polling_interval": int(os.getenv('MAX_POLLING_INTERVAL', 120)),  # Backoff cap for idle repos (seconds)
+    "rate_limit_reserve": int(os.getenv('RATE_LIMIT_RESERVE', 50)),  # API calls never spent by the poller
+    "event_retention_hours": float(os.getenv('EVENT_RETENTION_HOURS', 48)),  # How long the event log is kept
+    "activity_retention_hours": float(os.getenv('ACTIVITY_RETENTION_HOURS', 0)),  # How long raw activity rows are kept; 0 keeps them (the export needs them)
+    "archive_dir": os.getenv('ARCHIVE_DIR', 'archive') or None,  # Where expired rows are exported (gzipped NDJSON); empty deletes them
+    "webhook_secret": os.getenv('GITHUB_WEBHOOK_SECRET'),  # Shared secret for /webhooks/github; unset disables it
+    "webhook_active_window": int(os.getenv('WEBHOOK_ACTIVE_WINDOW', 3600)),  # Seconds a delivery keeps a repo webhook-fed
+    "webhook_reconcile_interval": int(os.getenv('WEBHOOK_RECONCILE_INTERVAL', 600)),  # Poll interval for webhook-fed repos
+    "teams_reload_interval": float(os.getenv('TEAMS_RELOAD_INTERVAL', 5)),  # Seconds between teams.csv change checks; 0 disables
+    "instance_id": os.getenv('POLLER_INSTANCE_ID'),  # Set (unique per poller) to shard polling across several pollers
+    "role": os.getenv('TRACKER_ROLE', 'poller'),  # "web" (set by wsgi.py) skips the polling machinery; webhooks and reads only
 }
 
 # Competition timing configuration
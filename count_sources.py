@@ -0,0 +1,335 @@
+"""
+Commit-count sources for the GitHub tracker.
+A count source answers "how many commits does this repository have?" for one
+or many repository URLs. The tracker talks to whichever source is configured:
+
+- ScrapeCountSource: scrapes the repository page (one request per repo),
+  streaming it through html_extract and stopping once the count is found.
+- GraphQLCountSource: asks the GitHub GraphQL API for many repos per request,
+  falling back to another source for anything it can't resolve.
+
+Every source returns a commit total, 0 on failure, or NOT_MODIFIED when a
+conditional request tells us the page hasn't changed.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+import metrics
+from html_extract import DEFAULT_SELECTORS, extract_from_response
+from http_cache import ValidatorCache
+from http_client import CircuitBreaker, HttpClient
+from profiling import PROFILER
+from scheduler import RateLimitBudget
+
+logger = logging.getLogger("github-tracker")
+
+NOT_MODIFIED = -1  # Returned when the page is unchanged (HTTP 304)
+PERMANENT_FAILURE_STATUSES = {403, 404, 410, 451}  # Retrying next cycle won't help
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+DEFAULT_GRAPHQL_BATCH_SIZE = 50  # Repositories per GraphQL query
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+def parse_repo_path(repo_url: str) -> Optional[Tuple[str, str]]:
+    """Return (owner, name) from a repository URL, or None if it has no such path."""
+    path_parts = urlparse(repo_url).path.strip('/').split('/')
+    if len(path_parts) < 2 or not path_parts[0] or not path_parts[1]:
+        return None
+    return path_parts[0], path_parts[1]
+
+
+def repo_label(repo_url: str) -> str:
+    """owner/name for metric labels, or the URL itself if it has no such path."""
+    path = parse_repo_path(repo_url)
+    return f"{path[0]}/{path[1]}" if path else repo_url
+
+
+class CountSource:
+    """Base class for commit-count backends."""
+
+    name = "base"
+    rate_limit: Optional[RateLimitBudget] = None  # Fed from each response's rate-limit headers
+    breaker: Optional[CircuitBreaker] = None  # Told about repos that keep failing
+
+    def _observe_response(self, response: requests.Response):
+        """Count the response and pass its rate-limit headers to the budget, if one is attached."""
+        metrics.GITHUB_RESPONSES.inc(source=self.name, status=response.status_code)
+        if self.rate_limit is not None:
+            self.rate_limit.update_from_headers(response.headers, response.status_code)
+
+    def _record_success(self, repo_url: str):
+        if self.breaker is not None:
+            self.breaker.record_success(repo_url)
+
+    def _record_failure(self, repo_url: str, reason: str):
+        if self.breaker is not None:
+            self.breaker.record_failure(repo_url, reason)
+
+    def calls_for(self, repo_count: int) -> int:
+        """Return how many API calls checking `repo_count` repositories costs."""
+        return repo_count
+
+    def repos_for_budget(self, calls: int) -> int:
+        """Return how many repositories can be checked with `calls` API calls."""
+        return calls
+
+    def get_total_commits(self, repo_url: str) -> int:
+        """Get the total commit count for a single repository."""
+        raise NotImplementedError
+
+    def timed_total_commits(self, repo_url: str) -> int:
+        """get_total_commits, recording how long the fetch took (and profiling a sample of fetches)."""
+        start = time.perf_counter()
+        try:
+            with PROFILER.trace("repository", repo_label(repo_url)):
+                return self.get_total_commits(repo_url)
+        finally:
+            metrics.REPO_FETCH_SECONDS.observe(time.perf_counter() - start, repo=repo_label(repo_url))
+
+    def get_total_commits_batch(self, repo_urls: List[str], fetcher) -> List[int]:
+        """
+        Get commit counts for many repositories, in input order.
+        The default runs get_total_commits for each URL on the fetcher's worker pool.
+        """
+        return fetcher.fetch_all(repo_urls, self.timed_total_commits, default=0)
+
+
+class ScrapeCountSource(CountSource):
+    """Scrape the commit count from the repository's GitHub page."""
+
+    name = "scrape"
+
+    def __init__(self, github_token: Optional[str], validator_cache: ValidatorCache,
+                 http: Optional[HttpClient] = None):
+        self.github_token = github_token
+        self.validator_cache = validator_cache
+        self.http = http or HttpClient()
+
+    def get_total_commits(self, repo_url: str) -> int:
+        """
+        Get total commits by scraping the GitHub page.
+        Returns NOT_MODIFIED if GitHub answers our conditional request with a 304.
+        """
+        try:
+            headers = {
+                'User-Agent': USER_AGENT
+            }
+            if self.github_token:
+                headers['Authorization'] = f'token {self.github_token}'
+            headers.update(self.validator_cache.conditional_headers(repo_url))
+
+            with PROFILER.phase("fetch"):
+                response = self.http.get(repo_url, headers=headers, stream=True)
+            self._observe_response(response)
+            if response.status_code == 304:
+                response.close()
+                self.validator_cache.record_hit()
+                self._record_success(repo_url)
+                return NOT_MODIFIED
+
+            self.validator_cache.record_miss()
+            if response.status_code != 200:
+                response.close()
+                logger.error(f"Failed to fetch page for {repo_url}: {response.status_code}")
+                rate_limited = response.headers.get('X-RateLimit-Remaining') == '0'
+                if response.status_code in PERMANENT_FAILURE_STATUSES and not rate_limited:
+                    self._record_failure(repo_url, f"HTTP {response.status_code}")
+                return 0
+
+            # Parse the page as it streams in, stopping at the commit count
+            with PROFILER.phase("parse"):
+                commits_count, selector = extract_from_response(response)
+            if commits_count is not None:
+                metrics.SCRAPE_SELECTOR_MATCHES.inc(selector=selector)
+                if selector != DEFAULT_SELECTORS[0].name:
+                    logger.debug(f"Read the commit count for {repo_url} with fallback selector {selector}")
+
+                # Only cache validators for pages we could parse
+                self.validator_cache.store(
+                    repo_url,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified')
+                )
+                self._record_success(repo_url)
+                return commits_count
+
+            metrics.PARSE_FAILURES.inc(source=self.name)
+            self._record_failure(repo_url, "no commit count on page")
+            logger.warning(f"Could not find commits count element for {repo_url}")
+            return 0
+
+        except requests.RequestException as e:
+            metrics.FETCH_ERRORS.inc(source=self.name)
+            logger.error(f"Error scraping commits for {repo_url}: {str(e)}")
+            return 0
+        except Exception as e:
+            metrics.FETCH_ERRORS.inc(source=self.name)
+            logger.error(f"Error scraping commits for {repo_url}: {str(e)}")
+            return 0
+
+
+class GraphQLCountSource(CountSource):
+    """
+    Fetch default-branch commit counts from the GitHub GraphQL API.
+    Repositories are batched into one aliased query per `batch_size` repos.
+    Anything the API can't resolve is handed to the fallback source; without
+    one, repositories GraphQL reports as not found count as breaker failures.
+    """
+
+    name = "graphql"
+
+    def __init__(self, github_token: str, fallback: Optional[CountSource] = None,
+                 batch_size: int = DEFAULT_GRAPHQL_BATCH_SIZE,
+                 endpoint: str = GITHUB_GRAPHQL_URL, http: Optional[HttpClient] = None):
+        if not github_token:
+            raise ValueError("The GraphQL count source requires a GitHub token")
+        self.github_token = github_token
+        self.fallback = fallback
+        self.batch_size = max(1, batch_size)
+        self.endpoint = endpoint
+        self.http = http or HttpClient()
+
+    @staticmethod
+    def build_query(repos: List[Tuple[str, str]]) -> Tuple[str, Dict[str, str]]:
+        """Build an aliased query (r0, r1, ...) and its variables for a batch of (owner, name) pairs."""
+        params = []
+        fields = []
+        variables = {}
+        for i, (owner, name) in enumerate(repos):
+            params.append(f"$o{i}: String!, $n{i}: String!")
+            fields.append(
+                f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ "
+                f"defaultBranchRef {{ target {{ ... on Commit {{ history {{ totalCount }} }} }} }} }}"
+            )
+            variables[f"o{i}"] = owner
+            variables[f"n{i}"] = name
+        query = f"query({', '.join(params)}) {{\n  " + "\n  ".join(fields) + "\n}"
+        return query, variables
+
+    @staticmethod
+    def _extract_count(node: Optional[Dict]) -> Optional[int]:
+        """Pull history.totalCount out of a repository node; None if the repo wasn't resolved."""
+        if node is None:
+            return None
+        branch = node.get('defaultBranchRef')
+        if branch is None:
+            # Empty repository - no commits yet
+            return 0
+        history = (branch.get('target') or {}).get('history')
+        if history is None:
+            return None
+        return history.get('totalCount')
+
+    def _query_batch(self, repo_urls: List[str], not_found: Set[str]) -> Dict[str, Optional[int]]:
+        """
+        Run one GraphQL query for a batch of URLs; unresolved URLs map to None.
+        URLs the API answered with a NOT_FOUND error are added to not_found.
+        """
+        counts: Dict[str, Optional[int]] = {url: None for url in repo_urls}
+        parsed = [(url, parse_repo_path(url)) for url in repo_urls]
+        batch = [(url, path) for url, path in parsed if path is not None]
+        if not batch:
+            return counts
+
+        query, variables = self.build_query([path for _, path in batch])
+        try:
+            with PROFILER.phase("fetch"):
+                response = self.http.post(
+                    self.endpoint,
+                    json={"query": query, "variables": variables},
+                    headers={
+                        'Authorization': f'bearer {self.github_token}',
+                        'User-Agent': USER_AGENT,
+                    }
+                )
+            self._observe_response(response)
+            if response.status_code != 200:
+                logger.error(f"GraphQL commit count query failed: {response.status_code}")
+                return counts
+
+            with PROFILER.phase("parse"):
+                payload = response.json()
+            data = payload.get('data') or {}
+            urls_by_alias = {f"r{i}": url for i, (url, _) in enumerate(batch)}
+            for error in payload.get('errors') or []:
+                logger.debug(f"GraphQL error: {error.get('message')}")
+                alias = (error.get('path') or [None])[0]
+                if error.get('type') == 'NOT_FOUND' and alias in urls_by_alias:
+                    not_found.add(urls_by_alias[alias])
+
+            for i, (url, _) in enumerate(batch):
+                counts[url] = self._extract_count(data.get(f"r{i}"))
+                if counts[url] is None:
+                    metrics.PARSE_FAILURES.inc(source=self.name)
+
+        except Exception as e:
+            metrics.FETCH_ERRORS.inc(source=self.name)
+            logger.error(f"Error querying GraphQL commit counts: {str(e)}")
+
+        return counts
+
+    def calls_for(self, repo_count: int) -> int:
+        return -(-repo_count // self.batch_size)
+
+    def repos_for_budget(self, calls: int) -> int:
+        return calls * self.batch_size
+
+    def get_total_commits(self, repo_url: str) -> int:
+        return self.get_total_commits_batch([repo_url], None)[0]
+
+    def get_total_commits_batch(self, repo_urls: List[str], fetcher) -> List[int]:
+        counts: Dict[str, Optional[int]] = {}
+        not_found: Set[str] = set()
+        for start in range(0, len(repo_urls), self.batch_size):
+            counts.update(self._query_batch(repo_urls[start:start + self.batch_size], not_found))
+
+        for url in repo_urls:
+            if counts.get(url) is not None:
+                self._record_success(url)
+
+        # Hand anything GraphQL couldn't resolve to the fallback source, which tells the breaker itself
+        unresolved = [url for url in repo_urls if counts.get(url) is None]
+        if unresolved and self.fallback is None:
+            for url in unresolved:
+                if url in not_found:
+                    self._record_failure(url, "not found by GraphQL")
+        elif unresolved:
+            logger.info(f"Falling back to {self.fallback.name} for {len(unresolved)} repositories")
+            if fetcher is None:
+                fallback_counts = [self.fallback.timed_total_commits(url) for url in unresolved]
+            else:
+                fallback_counts = self.fallback.get_total_commits_batch(unresolved, fetcher)
+            counts.update(zip(unresolved, fallback_counts))
+
+        return [counts.get(url) or 0 for url in repo_urls]
+
+
+def create_count_source(kind: str, github_token: Optional[str], validator_cache: ValidatorCache,
+                        graphql_batch_size: int = DEFAULT_GRAPHQL_BATCH_SIZE,
+                        graphql_endpoint: str = GITHUB_GRAPHQL_URL,
+                        rate_limit: Optional[RateLimitBudget] = None,
+                        http: Optional[HttpClient] = None,
+                        breaker: Optional[CircuitBreaker] = None) -> CountSource:
+    """Build the configured count source ("scrape" or "graphql")."""
+    http = http or HttpClient()
+    scraper = ScrapeCountSource(github_token, validator_cache, http=http)
+    scraper.rate_limit = rate_limit
+    scraper.breaker = breaker
+    if kind == "scrape":
+        return scraper
+    if kind == "graphql":
+        if not github_token:
+            logger.warning("No GitHub token for the GraphQL count source, scraping instead")
+            return scraper
+        source = GraphQLCountSource(github_token, fallback=scraper,
+                                    batch_size=graphql_batch_size, endpoint=graphql_endpoint, http=http)
+        source.rate_limit = rate_limit
+        source.breaker = breaker
+        return source
+    raise ValueError(f"Unknown count source: {kind}")
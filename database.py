@@ -0,0 +1,239 @@
+"""
+SQLite access layer for the GitHub tracker.
+All writes go through one writer thread that owns the only read-write
+connection. Pending writes are drained from a queue and applied together in a
+single transaction (each in its own savepoint, so one failing write doesn't
+undo the others); jobs that can't run in a transaction, like VACUUM or a WAL
+checkpoint, are queued the same way and run on their own. Reads use a pool of read-only WAL connections, so web
+requests never wait on the poller's writes. The writer connection and thread
+are only started by the first write, so a web worker that never writes
+holds neither.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+import metrics
+from profiling import PROFILER
+
+logger = logging.getLogger("github-tracker")
+
+# Defaults
+READ_POOL_SIZE = 8  # Read-only connections shared by web and poller threads
+MAX_WRITE_BATCH = 200  # Writes applied per transaction
+BUSY_TIMEOUT_MS = 30000  # 30 second timeout
+
+_STOP = object()  # Queue sentinel that stops the writer thread
+
+
+class Database:
+    """Single-writer, pooled-reader access to the tracker's SQLite database."""
+
+    def __init__(self, path: str, read_pool_size: int = READ_POOL_SIZE):
+        self.path = path
+        self.read_pool_size = read_pool_size
+        self._write_queue: queue.Queue = queue.Queue()
+        self._read_pool: queue.LifoQueue = queue.LifoQueue()
+        self._read_count = 0
+        self._read_lock = threading.Lock()
+        self._watch_conn: Optional[sqlite3.Connection] = None  # Opened by data_version()
+        self._watch_lock = threading.Lock()
+        self.last_write_at = time.monotonic()  # When the writer last committed, for spotting quiet moments
+        self._writer_conn: Optional[sqlite3.Connection] = None  # Opened by the first write
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        metrics.DB_WRITE_QUEUE_DEPTH.set_function(self._write_queue.qsize)
+        metrics.DB_SIZE_BYTES.set_function(lambda: self.file_sizes()["db_bytes"])
+        metrics.DB_WAL_SIZE_BYTES.set_function(lambda: self.file_sizes()["wal_bytes"])
+
+    # Writes
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is not None:
+                return
+            # The writer connection is in autocommit mode; the writer thread issues BEGIN/COMMIT itself
+            self._writer_conn = sqlite3.connect(self.path, check_same_thread=False, timeout=BUSY_TIMEOUT_MS / 1000,
+                                                isolation_level=None)
+            self._writer_conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # Takes effect on new files (or after VACUUM)
+            self._writer_conn.execute("PRAGMA journal_mode = WAL")
+            self._writer_conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            self._writer_conn.execute("PRAGMA synchronous = NORMAL")  # Safe with WAL, far fewer fsyncs
+
+            self._writer = threading.Thread(target=self._run_writer, daemon=True, name="db-writer")
+            self._writer.start()
+
+    def submit(self, func: Callable[[sqlite3.Connection], Any], transaction: bool = True) -> Future:
+        """
+        Queue func(conn) to run inside the next write transaction and return its
+        Future. With transaction=False it runs alone, in autocommit mode.
+        """
+        if self._writer is None:
+            self._start_writer()
+        future = Future()
+        self._write_queue.put((func, future, time.perf_counter(), transaction))
+        return future
+
+    def write(self, func: Callable[[sqlite3.Connection], Any], transaction: bool = True) -> Any:
+        """Run func(conn) in a write transaction (or, with transaction=False, alone) and wait for its result."""
+        future = self.submit(func, transaction)
+        with PROFILER.phase("db"):
+            return future.result()
+
+    def _run_writer(self):
+        held = None  # A job that ended the previous batch because it needs to run alone
+        while True:
+            first = held if held is not None else self._write_queue.get()
+            held = None
+            if first is _STOP:
+                return
+            if not first[3]:
+                self._apply_alone(first)
+                continue
+
+            # Drain whatever else is pending into the same transaction
+            batch = [first]
+            stop = False
+            while len(batch) < MAX_WRITE_BATCH:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if not item[3]:
+                    held = item
+                    break
+                batch.append(item)
+
+            self._apply_batch(batch)
+            if stop:
+                return
+
+    def _apply_alone(self, job):
+        func, future, queued_at, _ = job
+        metrics.DB_WRITE_QUEUE_SECONDS.observe(time.perf_counter() - queued_at)
+        try:
+            result = func(self._writer_conn)
+        except Exception as e:
+            if self._writer_conn.in_transaction:
+                self._writer_conn.execute("ROLLBACK")
+            future.set_exception(e)
+            return
+        self.last_write_at = time.monotonic()
+        future.set_result(result)
+
+    def _apply_batch(self, batch):
+        conn = self._writer_conn
+        results = []
+        start = time.perf_counter()
+        for _, _, queued_at, _ in batch:
+            metrics.DB_WRITE_QUEUE_SECONDS.observe(start - queued_at)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for func, future, _, _ in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    results.append((future, func(conn), None))
+                    conn.execute("RELEASE write_job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"Database error committing {len(batch)} writes: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, future, _, _ in batch:
+                future.set_exception(e)
+            return
+        self.last_write_at = time.monotonic()
+        metrics.DB_TRANSACTION_SECONDS.observe(time.perf_counter() - start)
+        metrics.DB_WRITE_BATCH_SIZE.observe(len(batch))
+
+        # Only resolve futures once the data is durable and visible to readers
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    # Reads
+
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False,
+                               timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection from the pool."""
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._read_lock:
+                can_open = self._read_count < self.read_pool_size
+                if can_open:
+                    self._read_count += 1
+            conn = self._open_reader() if can_open else self._read_pool.get()
+        start = time.perf_counter()
+        try:
+            with PROFILER.phase("db"):
+                yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._read_pool.put(conn)
+            metrics.DB_READ_SECONDS.observe(time.perf_counter() - start)
+
+    def data_version(self) -> int:
+        """
+        SQLite's PRAGMA data_version on a dedicated connection: it changes
+        whenever any other connection (in this process or another) commits, so
+        polling it is a cheap way to notice writes made elsewhere.
+        """
+        with self._watch_lock:
+            if self._watch_conn is None:
+                self._watch_conn = self._open_reader()
+            return self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def idle_seconds(self) -> float:
+        """How long the writer has had nothing to do (0 while writes are queued)."""
+        if self._write_queue.qsize():
+            return 0.0
+        return time.monotonic() - self.last_write_at
+
+    def file_sizes(self) -> dict:
+        """Bytes on disk of the database file and its write-ahead log."""
+        sizes = {}
+        for key, path in (("db_bytes", self.path), ("wal_bytes", self.path + "-wal")):
+            try:
+                sizes[key] = os.path.getsize(path)
+            except OSError:
+                sizes[key] = 0
+        return sizes
+
+    def close(self):
+        """Flush pending writes, stop the writer thread and close every connection."""
+        if self._writer is not None:
+            self._write_queue.put(_STOP)
+            self._writer.join()
+            self._writer_conn.close()
+        with self._watch_lock:
+            if self._watch_conn is not None:
+                self._watch_conn.close()
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
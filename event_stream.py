@@ -0,0 +1,156 @@
+"""
+Server-Sent Events fan-out for the leaderboard.
+A single producer thread waits on the tracker's new_commits_event, reads the
+new events from the database once, and pushes them to every connected
+client's queue, followed by a fresh leaderboard whenever the tracker's
+data_version has moved and the standings differ from the last ones sent
+(so team reloads and corrections reach open screens even without new
+events). Clients hold no DB connection and cost nothing between commits
+apart from a periodic heartbeat.
+"""
+
+import json
+import logging
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("github-tracker")
+
+# Defaults
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments
+CLIENT_QUEUE_SIZE = 100  # Messages buffered per client before it's dropped
+REPLAY_LIMIT = 100  # Max events replayed on reconnect with Last-Event-ID
+RECONNECT_DELAY_MS = 3000  # Browser reconnect delay sent as the SSE retry field
+
+
+def format_sse(data: Dict, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Format one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventBroadcaster:
+    """Fan out tracker events to every connected SSE client."""
+
+    def __init__(self, tracker, leaderboard: Callable[[], List[Dict]],
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL):
+        self.tracker = tracker
+        self.leaderboard = leaderboard
+        self.heartbeat_interval = heartbeat_interval
+        self._clients: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._last_event_id = None
+        self._last_version = None  # tracker.data_version behind the last leaderboard frame
+        self._last_leaderboard: Optional[str] = None
+
+    def start(self):
+        """Start the producer thread (once)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._last_event_id = self.tracker.get_latest_event_id()
+            self._last_version = self.tracker.data_version
+            self._last_leaderboard = format_sse(self.leaderboard(), "leaderboard")  # What new clients start from
+        threading.Thread(target=self._run, daemon=True, name="sse-producer").start()
+        logger.info("Event stream producer started")
+
+    def _publish(self, message: str):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # A client that stopped reading gets disconnected rather than blocking everyone
+                self.unsubscribe(client)
+
+    def _publish_leaderboard(self):
+        """Push the leaderboard if the data changed since the last frame and the standings differ."""
+        version = self.tracker.data_version
+        if version == self._last_version:
+            return
+        self._last_version = version
+        message = format_sse(self.leaderboard(), "leaderboard")
+        if message != self._last_leaderboard:
+            self._last_leaderboard = message
+            self._publish(message)
+
+    def _run(self):
+        while True:
+            # Changes that don't set the event (e.g. a team added by hand) go out on the heartbeat tick
+            if self.tracker.new_commits_event.wait(timeout=self.heartbeat_interval):
+                self.tracker.new_commits_event.clear()
+                try:
+                    events = self.tracker.get_events_since(self._last_event_id or 0)
+                    for event in events:
+                        self._publish(format_sse(event, "commit", event['id']))
+                    if events:
+                        self._last_event_id = events[-1]['id']
+                except Exception as e:
+                    logger.error(f"Error in event stream producer: {str(e)}")
+            try:
+                self._publish_leaderboard()
+            except Exception as e:
+                logger.error(f"Error in event stream producer: {str(e)}")
+
+    def subscribe(self) -> queue.Queue:
+        client = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self._lock:
+            self._clients.append(client)
+        return client
+
+    def unsubscribe(self, client: queue.Queue):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def is_subscribed(self, client: queue.Queue) -> bool:
+        with self._lock:
+            return client in self._clients
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def stream(self, last_event_id: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield SSE messages for one client. Missed events after last_event_id
+        are replayed first, then the current leaderboard, then live updates.
+        """
+        self.start()
+        client = self.subscribe()
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+
+            # Subscribe before replaying so nothing published in between is lost
+            replayed_up_to = last_event_id or 0
+            if last_event_id is not None:
+                for event in self.tracker.get_events_since(last_event_id, limit=REPLAY_LIMIT):
+                    replayed_up_to = event['id']
+                    yield format_sse(event, "commit", event['id'])
+            yield format_sse(self.leaderboard(), "leaderboard")
+
+            while True:
+                try:
+                    message = client.get(timeout=self.heartbeat_interval)
+                except queue.Empty:
+                    if not self.is_subscribed(client):
+                        # Dropped for falling behind; the browser reconnects with Last-Event-ID
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if message.startswith("id: "):
+                    event_id = int(message[4:message.index("\n")])
+                    if event_id <= replayed_up_to:
+                        continue
+                yield message
+        finally:
+            self.unsubscribe(client)
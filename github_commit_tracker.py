@@ -1,16 +1,29 @@
-import os
 import time
 import sqlite3
 import logging
+import os
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import threading
 import json
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import Future
 
-import requests
-from github import Github, GithubException
+from github import Github
+
+import metrics
+from database import Database
+from migrations import get_schema_version, migrate, LATEST_VERSION
+from commit_ingest import CommitIngester, GITHUB_API_URL
+from count_sources import create_count_source, repo_label, DEFAULT_GRAPHQL_BATCH_SIZE, GITHUB_GRAPHQL_URL
+from http_cache import ValidatorCache
+from http_client import CircuitBreaker, HttpClient
+from leases import RepoLeases
+from maintenance import DatabaseMaintenance, ACTIVITY_RETENTION_HOURS
+from polling import ConcurrentFetcher, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+from profiling import PROFILER
+from ranking import RankingIndex
+import rollups
+from scheduler import RateLimitBudget, RepoScheduler, DEFAULT_RATE_LIMIT_RESERVE
 
 # Set up logging
 logging.basicConfig(
@@ -22,299 +35,841 @@ logger = logging.getLogger("github-tracker")
 
 # Constants
 POLLING_INTERVAL = 15  # seconds
+MAX_POLLING_INTERVAL = 120  # seconds, cap for idle repositories' backoff
+EVENT_RETENTION_HOURS = 48  # How long events stay in the log
+CHANGE_POLL_INTERVAL = 0.5  # seconds between checks for writes made by other processes
+WEBHOOK_ACTIVE_WINDOW = 3600  # seconds a webhook delivery keeps a repo on the slow sweep
+WEBHOOK_RECONCILE_INTERVAL = 600  # seconds between reconciliation polls of webhook-fed repos
+RATE_LIMIT_MIN_BACKOFF = POLLING_INTERVAL  # seconds repos deferred by an empty budget wait at least (no reset time seen yet)
 DEFAULT_API_REQUEST_TIMEOUT = 10  # seconds
 DB_PATH = "hackathon_tracker.db"
+EXPORT_BATCH_SIZE = 1000  # Rows per read when streaming an export
+
+# Fields the paginated endpoints can project with ?fields=, as SQL expressions
+REPOSITORY_FIELDS = {
+    "id": "r.id",
+    "repo_url": "r.repo_url",
+    "repo_name": "r.repo_name",
+    "total_commits": "r.total_commits",
+    "team_name": "t.team_name",
+    "last_checked": "r.last_checked",
+    "last_webhook_at": "r.last_webhook_at",
+}
+ACTIVITY_FIELDS = {
+    "id": "id",
+    "event_type": "event_type",
+    "team_name": "team_name",
+    "repo_name": "repo_name",
+    "commit_count": "commit_count",
+    "total_commits": "total_commits",
+    "local_timestamp": "datetime(timestamp, 'localtime')",
+}
 
 class GitHubTracker:
-    def __init__(self, github_token: Optional[str] = None):
+    def __init__(self, github_token: Optional[str] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 count_source: str = "scrape",
+                 graphql_batch_size: int = DEFAULT_GRAPHQL_BATCH_SIZE,
+                 graphql_endpoint: str = GITHUB_GRAPHQL_URL,
+                 api_url: str = GITHUB_API_URL,
+                 max_polling_interval: float = MAX_POLLING_INTERVAL,
+                 rate_limit_reserve: int = DEFAULT_RATE_LIMIT_RESERVE,
+                 event_retention_hours: float = EVENT_RETENTION_HOURS,
+                 webhook_active_window: float = WEBHOOK_ACTIVE_WINDOW,
+                 webhook_reconcile_interval: float = WEBHOOK_RECONCILE_INTERVAL,
+                 instance_id: Optional[str] = None,
+                 activity_retention_hours: float = ACTIVITY_RETENTION_HOURS,
+                 archive_dir: Optional[str] = None,
+                 poller: bool = True):
         """
         Initialize the GitHub tracker with an optional GitHub token.
         Using a token increases rate limits for API calls.
+        max_workers and per_host_limit cap how many repository pages are
+        fetched at once, overall and per host. count_source picks how commit
+        totals are fetched: "scrape", "graphql", or "commits" to ingest
+        every commit into the commits table and count those (graphql_endpoint
+        and api_url point the GraphQL source and the ingester at GitHub
+        Enterprise or a stand-in). Idle
+        repositories back off from POLLING_INTERVAL up to
+        max_polling_interval, and rate_limit_reserve API calls are always
+        left unspent. The poller archives events older than
+        event_retention_hours and activity rows older than
+        activity_retention_hours (0 keeps them) to archive_dir, if set, and
+        keeps the database file and its WAL compacted. Repositories that
+        delivered a push webhook within webhook_active_window seconds are
+        only polled every webhook_reconcile_interval seconds, to catch
+        missed deliveries.
+        With an instance_id, polling is sharded: the tracker only polls the
+        repositories it holds leases on (see leases.py), so several pollers,
+        each with its own token, can split the repositories between them.
+        With poller=False the tracker is for the web tier: it serves reads and
+        records push webhooks and recheck requests, and builds none of the
+        polling machinery (fetch pool, count source, scheduler, maintenance).
+        It only migrates a database the poller hasn't brought up to date yet,
+        and opens a write connection on its first webhook.
         """
         self.github_token = github_token
-        self.github = Github(github_token, retry=3) if github_token else Github(retry=3)
-        self.db_conn = self._init_database()
+        self.poller = poller
+        self.ingest_commits = count_source == "commits"
+        self.db = Database(DB_PATH)  # Single writer thread plus pooled read-only connections
+        if poller or self._schema_version() < LATEST_VERSION:
+            self.db.write(self._init_database)
         self.running = False
         self.teams_cache = {}  # Cache of team data
         self.repos_cache = {}  # Cache of repo data
         self.commit_counts = {}  # Current commit counts
         self.new_commits_event = threading.Event()  # Event for new commits
-        self.last_api_reset = 0  # Track when API rate limit resets
-        self.remaining_api_calls = 0  # Track remaining API calls
-        
-    def _init_database(self) -> sqlite3.Connection:
-        """Initialize the SQLite database with required tables."""
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30.0)
-        
-        conn.execute("PRAGMA journal_mode = WAL")
-        conn.execute("PRAGMA busy_timeout = 30000")  # 30 second timeout
-        
-        cursor = conn.cursor()
-        
-        # Create teams table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS teams (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                team_name TEXT UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create repositories table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS repositories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                team_id INTEGER NOT NULL,
-                repo_url TEXT UNIQUE NOT NULL,
-                repo_name TEXT NOT NULL,
-                last_checked TIMESTAMP,
-                total_commits INTEGER DEFAULT 0,
-                FOREIGN KEY (team_id) REFERENCES teams (id)
-            )
-        ''')
-        
-        # Create commits table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS commits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                repo_id INTEGER NOT NULL,
-                commit_hash TEXT NOT NULL,
-                author TEXT,
-                message TEXT,
-                timestamp TIMESTAMP,
-                detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (repo_id) REFERENCES repositories (id)
-            )
-        ''')
-        
-        # Create events table for future web notifications
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                entity_id INTEGER NOT NULL,
-                data TEXT,
-                processed BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        self.data_version = 0  # Bumped after every write that changes what the API serves
+        self.ranking = RankingIndex()  # Incrementally maintained leaderboard order
+        self.ranking.load(self.get_team_totals())
+        self.webhook_active_window = webhook_active_window
+        self.webhook_reconcile_interval = webhook_reconcile_interval
+        if not poller:
+            self.github = self.maintenance = self.rate_limit = self.scheduler = self.leases = None
+            self.fetcher = self.http = self.breaker = self.validator_cache = None
+            self.ingester = self.count_source = None
+            return
         
-        # Create activity_history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS activity_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                team_name TEXT NOT NULL,
-                repo_name TEXT NOT NULL,
-                commit_count INTEGER,
-                total_commits INTEGER,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        self.github = Github(github_token, retry=3) if github_token else Github(retry=3)
+        self.maintenance = DatabaseMaintenance(self.db, event_retention_hours, activity_retention_hours,
+                                               archive_dir)  # Retention, vacuum and WAL checkpoints
+        self.rate_limit = RateLimitBudget(rate_limit_reserve)  # Token bucket fed from rate-limit headers
+        self.scheduler = RepoScheduler(POLLING_INTERVAL, max_polling_interval)  # Next-due queue of repos
+        metrics.SCHEDULER_LAG.set_function(self.scheduler.lag)
+        metrics.SCHEDULER_REPOS.set_function(lambda: len(self.scheduler))
+        self.leases = RepoLeases(self.db, instance_id, POLLING_INTERVAL) if instance_id else None  # Sharded polling
+        metrics.LEASED_REPOS.set_function(lambda: len(self.leases.owned()) if self.leases else None)
+        metrics.RATE_LIMIT_REMAINING.set_function(lambda: self.rate_limit.remaining)
+        metrics.RATE_LIMIT_RESET.set_function(lambda: self.rate_limit.reset_at or None)
+        self.fetcher = ConcurrentFetcher(max_workers, per_host_limit)  # Worker pool for page fetches
+        self.http = HttpClient(timeout=DEFAULT_API_REQUEST_TIMEOUT, pool_size=max_workers)  # Shared keep-alive pool
+        self.breaker = CircuitBreaker()  # Parks repositories that keep failing
+        metrics.PARKED_REPOS.set_function(lambda: len(self.breaker.parked()))
+        with self.db.read() as conn:
+            self.validator_cache = ValidatorCache(conn)  # ETag / Last-Modified per repo URL
+        self.ingester = None  # Set in "commits" mode
+        if self.ingest_commits:
+            self.ingester = CommitIngester(github_token, self.validator_cache, rate_limit=self.rate_limit,
+                                           api_url=api_url, http=self.http, breaker=self.breaker)
+            # Admission charges one call per repo, like scraping; walks past the
+            # first page are capped by what's left of the budget (_pages_per_repo)
+            count_source = "scrape"
+        self.count_source = create_count_source(
+            count_source, github_token, self.validator_cache,
+            graphql_batch_size=graphql_batch_size, graphql_endpoint=graphql_endpoint, rate_limit=self.rate_limit,
+            http=self.http, breaker=self.breaker
+        )
         
-        conn.commit()
-        return conn
+    def _init_database(self, conn: sqlite3.Connection):
+        """Initialize the SQLite database, bringing its schema up to the latest version."""
+        migrate(conn)
+    
+    def _schema_version(self) -> int:
+        """The database's schema version (0 for a new database), without taking the write lock."""
+        if not os.path.exists(DB_PATH):
+            return 0
+        with self.db.read() as conn:
+            return get_schema_version(conn)
     
     def add_team(self, team_name: str) -> int:
         """Add a new team to the tracker and return its ID."""
-        cursor = self.db_conn.cursor()
-        try:
-            cursor.execute("INSERT INTO teams (team_name) VALUES (?)", (team_name,))
-            self.db_conn.commit()
-            return cursor.lastrowid
-        except sqlite3.IntegrityError:
+        def insert_team(conn):
+            cursor = conn.cursor()
+            cursor.execute("INSERT OR IGNORE INTO teams (team_name) VALUES (?)", (team_name,))
+            if cursor.rowcount:
+                return cursor.lastrowid, True
             # Team already exists, get its ID
             cursor.execute("SELECT id FROM teams WHERE team_name = ?", (team_name,))
-            return cursor.fetchone()[0]
+            return cursor.fetchone()[0], False
+        
+        team_id, created = self.db.write(insert_team)
+        if created:
+            self.ranking.update(team_name, 0, '')
+            self.data_version += 1
+        return team_id
     
     def add_repository(self, team_id: int, repo_url: str) -> int:
         """Add a new repository to track for a team."""
         # Extract repo name from URL
         repo_name = repo_url.rstrip("/").split("/")[-1]
         
-        cursor = self.db_conn.cursor()
-        try:
+        def insert_repository(conn):
+            cursor = conn.cursor()
             cursor.execute(
-                "INSERT INTO repositories (team_id, repo_url, repo_name) VALUES (?, ?, ?)",
+                "INSERT OR IGNORE INTO repositories (team_id, repo_url, repo_name) VALUES (?, ?, ?)",
                 (team_id, repo_url, repo_name)
             )
-            self.db_conn.commit()
-            return cursor.lastrowid
-        except sqlite3.IntegrityError:
+            if cursor.rowcount:
+                return cursor.lastrowid, True
             # Repository already exists, get its ID
             cursor.execute("SELECT id FROM repositories WHERE repo_url = ?", (repo_url,))
-            return cursor.fetchone()[0]
+            return cursor.fetchone()[0], False
+        
+        repo_id, created = self.db.write(insert_repository)
+        if created:
+            self.data_version += 1
+        return repo_id
     
-    def get_all_repositories(self) -> List[Dict]:
-        """Get all repositories being tracked."""
-        cursor = self.db_conn.cursor()
-        cursor.execute("""
-            SELECT r.id, r.repo_url, r.repo_name, r.total_commits, t.team_name, r.last_checked
-            FROM repositories r
-            JOIN teams t ON r.team_id = t.id
-        """)
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-    
-    def get_leaderboard(self) -> List[Dict]:
-        """Get the current leaderboard data."""
-        cursor = self.db_conn.cursor()
-        cursor.execute("""
-            SELECT t.team_name, SUM(r.total_commits) as total_commits
-            FROM teams t
-            LEFT JOIN repositories r ON t.id = r.team_id
-            GROUP BY t.id
-            ORDER BY total_commits DESC
-        """)
-        return [{"team_name": row[0], "total_commits": row[1]} for row in cursor.fetchall()]
+    def get_team_repositories(self) -> Dict[str, Dict[str, int]]:
+        """Map every team name to its repositories as {repo_url: repo_id}."""
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT t.team_name, r.repo_url, r.id
+                FROM teams t
+                LEFT JOIN repositories r ON r.team_id = t.id
+            """)
+            teams = {}
+            for team_name, repo_url, repo_id in cursor.fetchall():
+                repos = teams.setdefault(team_name, {})
+                if repo_url is not None:
+                    repos[repo_url] = repo_id
+            return teams
     
-    def _get_total_commits(self, repo_url: str) -> int:
-        """Get total commits by scraping the GitHub page."""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            if self.github_token:
-                headers['Authorization'] = f'token {self.github_token}'
-                
-            response = requests.get(repo_url, headers=headers)
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch page for {repo_url}: {response.status_code}")
-                return 0
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
+    def apply_team_changes(self, add_repos: List[Tuple[str, str]], remove_repo_ids: List[int],
+                           remove_teams: List[str]):
+        """
+        Apply a teams.csv diff in a single transaction: drop the removed
+        repositories (and their ingested commits) and teams, then add the new
+        (team name, repo URL) pairs, creating teams as needed. A URL that is
+        both removed and added moved between teams: it keeps its ID, total
+        and commits. Event and activity history is kept. The poller picks up
+        the new repository set on its next cycle.
+        """
+        def apply(conn):
+            cursor = conn.cursor()
+            removed = {}
+            for repo_id in remove_repo_ids:
+                row = cursor.execute("SELECT repo_url FROM repositories WHERE id = ?", (repo_id,)).fetchone()
+                if row is not None:
+                    removed[row[0]] = repo_id
+            moved = {repo_url: team_name for team_name, repo_url in add_repos if repo_url in removed}
             
-            # Try to find the commits count element
-            commits_element = soup.select_one('span.fgColor-default')
-            if commits_element:
-                # Extract the number from text like "3 Commits"
-                commits_text = commits_element.text.strip()
-                commits_count = int(''.join(filter(str.isdigit, commits_text)))
-                return commits_count
+            cursor.executemany(
+                "INSERT OR IGNORE INTO teams (team_name) VALUES (?)",
+                [(team_name,) for team_name in dict.fromkeys(team_name for team_name, _ in add_repos)]
+            )
+            cursor.execute("SELECT team_name, id FROM teams")
+            team_ids = dict(cursor.fetchall())
+            cursor.executemany(
+                "UPDATE repositories SET team_id = ? WHERE id = ?",
+                [(team_ids[team_name], removed[repo_url]) for repo_url, team_name in moved.items()]
+            )
             
-            logger.warning(f"Could not find commits count element for {repo_url}")
-            return 0
+            deleted = [(repo_id,) for repo_url, repo_id in removed.items() if repo_url not in moved]
+            cursor.executemany("DELETE FROM commits WHERE repo_id = ?", deleted)
+            cursor.executemany("DELETE FROM repositories WHERE id = ?", deleted)
+            cursor.executemany("DELETE FROM teams WHERE team_name = ?", [(team_name,) for team_name in remove_teams])
             
-        except Exception as e:
-            logger.error(f"Error scraping commits for {repo_url}: {str(e)}")
-            return 0
-    
-    def check_repository(self, repo_id: int) -> int:
-        """Check a repository for new commits and update the database."""
-        cursor = self.db_conn.cursor()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO repositories (team_id, repo_url, repo_name) VALUES (?, ?, ?)",
+                [(team_ids[team_name], repo_url, repo_url.rstrip("/").split("/")[-1])
+                 for team_name, repo_url in add_repos if repo_url not in moved]
+            )
+            return [repo_url for repo_url in removed if repo_url not in moved], moved
         
-        try:
-            # Start transaction
-            cursor.execute("BEGIN")
-            
-            # Get repository info
+        removed_urls, moved = self.db.write(apply)
+        # A URL that comes back later must be fetched in full, not answered with a stale 304
+        for repo_url in removed_urls + [repo_url for _, repo_url in add_repos if repo_url not in moved]:
+            self.validator_cache.invalidate(repo_url)
+        self.db.submit(self.validator_cache.flush)
+        self.ranking.sync(self.get_team_totals())
+        self.data_version += 1
+        self.new_commits_event.set()
+    
+    def get_all_repositories(self) -> List[Dict]:
+        """Get all repositories being tracked."""
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT r.id, r.repo_url, r.repo_name, r.total_commits, t.team_name, r.last_checked,
+                       r.last_webhook_at
+                FROM repositories r
+                JOIN teams t ON r.team_id = t.id
+            """)
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def get_team_totals(self) -> List[Dict]:
+        """
+        Get every team's commit total and when it reached it (the latest
+        last_checked of its repos, which only moves when commits arrive).
+        """
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT t.team_name, COALESCE(SUM(r.total_commits), 0) as total_commits,
+                       COALESCE(MAX(r.last_checked), '') as reached_at
+                FROM teams t
+                LEFT JOIN repositories r ON t.id = r.team_id
+                GROUP BY t.id
+            """)
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def _get_total_commits(self, repo_url: str) -> int:
+        """
+        Get total commits for a repository from the configured count source.
+        Returns NOT_MODIFIED if the source reports the repository unchanged.
+        """
+        return self.count_source.timed_total_commits(repo_url)
+    
+    def _get_repository(self, repo_id: int) -> Optional[Dict]:
+        """Get the repository row (with its team name) for a repository ID."""
+        with self.db.read() as conn:
+            cursor = conn.cursor()
             cursor.execute("""
                 SELECT r.id, r.repo_url, r.repo_name, r.total_commits, t.team_name
                 FROM repositories r
                 JOIN teams t ON r.team_id = t.id
                 WHERE r.id = ?
             """, (repo_id,))
-            repo = dict(zip(['id', 'repo_url', 'repo_name', 'total_commits', 'team_name'], cursor.fetchone()))
-            
-            # Get current total commits
-            current_total = self._get_total_commits(repo['repo_url'])
-            
-            if current_total == 0:
-                return 0
-            
-            # Calculate new commits
-            previous_total = repo['total_commits'] or 0
-            new_commit_count = max(0, current_total - previous_total)
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip(['id', 'repo_url', 'repo_name', 'total_commits', 'team_name'], row))
+    
+    def find_repository(self, owner: str, name: str) -> Optional[Dict]:
+        """Get the repository row for an owner/name pair, however its URL was written in teams.csv."""
+        base_url = f"https://github.com/{owner}/{name}"
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT r.id, r.repo_url, r.repo_name, r.total_commits, t.team_name
+                FROM repositories r
+                JOIN teams t ON r.team_id = t.id
+                WHERE r.repo_url COLLATE NOCASE IN (?, ?, ?)
+            """, (base_url, base_url + '/', base_url + '.git'))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip(['id', 'repo_url', 'repo_name', 'total_commits', 'team_name'], row))
+    
+    def _write_commit_count(self, conn: sqlite3.Connection, repo: Dict, current_total: int,
+                            resync: Optional[List[int]] = None):
+        """
+        Writer job: store a new commit total with its event and activity rows. Returns (new commits, time).
+        Only commits above the highest total ever announced count as new, so a total that a poll
+        corrected down and that then climbs back isn't announced twice; such repos are appended to
+        resync, as the incremental ranking only learns about announced commits.
+        """
+        repo_id = repo['id']
+        cursor = conn.cursor()
+        
+        # Re-read the stored total inside the transaction
+        cursor.execute("SELECT total_commits, announced_commits FROM repositories WHERE id = ?", (repo_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return 0, datetime.now().isoformat()  # Removed from teams.csv since it was fetched
+        
+        # Calculate new commits
+        previous_total = row[0] or 0
+        announced = max(row[1] or 0, previous_total)
+        new_commit_count = max(0, current_total - announced)
+        current_time = datetime.now().isoformat()
+        
+        if previous_total < current_total <= announced:
+            # Climbing back to commits already announced: just restore the total
+            cursor.execute("UPDATE repositories SET total_commits = ? WHERE id = ?", (current_total, repo_id))
+            if resync is not None:
+                resync.append(repo_id)
+        
+        if new_commit_count > 0:
+            if current_total - previous_total > new_commit_count and resync is not None:
+                resync.append(repo_id)  # Part of the rise was re-reaching announced commits
+            # Update repository's total commits
+            cursor.execute(
+                "UPDATE repositories SET total_commits = ?, announced_commits = ?, last_checked = ? WHERE id = ?",
+                (current_total, current_total, current_time, repo_id)
+            )
             
-            if new_commit_count > 0:
-                current_time = datetime.now().isoformat()
-                
-                # Update repository's total commits
-                cursor.execute(
-                    "UPDATE repositories SET total_commits = ?, last_checked = ? WHERE id = ?",
-                    (current_total, current_time, repo_id)
-                )
-                
-                # Create a new event
-                cursor.execute(
-                    "INSERT INTO events (event_type, entity_id, data, created_at) VALUES (?, ?, ?, ?)",
-                    (
-                        "new_commits", 
-                        repo_id, 
-                        json.dumps({
-                            "repo_id": repo_id,
-                            "team_name": repo['team_name'],
-                            "repo_name": repo['repo_name'],
-                            "new_commit_count": new_commit_count,
-                            "total_commits": current_total
-                        }),
-                        current_time
-                    )
-                )
-                
-                # Add to activity history
-                cursor.execute(
-                    "INSERT INTO activity_history (event_type, team_name, repo_name, commit_count, total_commits, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-                    (
-                        "new_commits",
-                        repo['team_name'],
-                        repo['repo_name'],
-                        new_commit_count,
-                        current_total,
-                        current_time
-                    )
+            # Create a new event
+            cursor.execute(
+                "INSERT INTO events (event_type, entity_id, data, created_at) VALUES (?, ?, ?, ?)",
+                (
+                    "new_commits", 
+                    repo_id, 
+                    json.dumps({
+                        "repo_id": repo_id,
+                        "team_name": repo['team_name'],
+                        "repo_name": repo['repo_name'],
+                        "new_commit_count": new_commit_count,
+                        "total_commits": current_total
+                    }),
+                    current_time
                 )
+            )
             
-            # Commit the transaction
-            self.db_conn.commit()
+            # Add to activity history
+            cursor.execute(
+                "INSERT INTO activity_history (event_type, team_name, repo_name, commit_count, total_commits, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    "new_commits",
+                    repo['team_name'],
+                    repo['repo_name'],
+                    new_commit_count,
+                    current_total,
+                    current_time
+                )
+            )
+            rollups.record_activity(cursor, repo['team_name'], new_commit_count, current_time)
+        
+        return new_commit_count, current_time
+    
+    @staticmethod
+    def _correct_commit_count(cursor: sqlite3.Cursor, repo_id: int, current_total: int, resync: List[int]):
+        """
+        Lower a stored total to an authoritative count, without announcing negative commits.
+        announced_commits keeps the old high-water mark, so the commits between
+        aren't announced again if the count climbs back.
+        """
+        cursor.execute(
+            "UPDATE repositories SET total_commits = ? WHERE id = ? AND total_commits > ?",
+            (current_total, repo_id, current_total)
+        )
+        if cursor.rowcount:
+            resync.append(repo_id)
+    
+    def _write_polled_count(self, conn: sqlite3.Connection, repo: Dict, current_total: int, resync: List[int]):
+        """
+        Writer job: store a polled commit total. A poll counts the whole
+        history, so it also corrects a total that webhooks took too high;
+        repos whose total went down (or came back up) are appended to resync.
+        """
+        self._correct_commit_count(conn.cursor(), repo['id'], current_total, resync)
+        return self._write_commit_count(conn, repo, current_total, resync)
+    
+    def _submit_commit_count(self, repo: Dict, current_total: int, resync: List[int]) -> Optional[Future]:
+        """Queue a commit total for the DB writer; None if there's nothing to record."""
+        # Nothing to record for failed fetches or unchanged (304) pages
+        if current_total <= 0:
+            return None
+        return self.db.submit(lambda conn: self._write_polled_count(conn, repo, current_total, resync))
+    
+    def _resync_ranking(self, resync: List[int]):
+        """Reload the ranking after totals moved other than by announced commits; the incremental ranking only adds."""
+        if resync:
+            self.ranking.load(self.get_team_totals())
+            self.data_version += 1
             self.new_commits_event.set()
-            return new_commit_count
-            
+    
+    @staticmethod
+    def _request_recheck(cursor: sqlite3.Cursor, repo_id: int):
+        """Ask the poller (in whichever process it runs) to check a repository on its next cycle."""
+        cursor.execute(
+            "UPDATE repositories SET recheck_requested_at = ? WHERE id = ? AND recheck_requested_at IS NULL",
+            (time.time(), repo_id)
+        )
+    
+    def _take_rechecks(self, repo_ids) -> List[int]:
+        """The repositories among repo_ids with a pending re-check request, clearing those requests."""
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, recheck_requested_at FROM repositories WHERE recheck_requested_at IS NOT NULL"
+            )
+            requested = [(repo_id, requested_at) for repo_id, requested_at in cursor.fetchall() if repo_id in repo_ids]
+        if requested:
+            # Only the requests read here: one made since stays for the next cycle
+            self.db.write(lambda conn: conn.executemany(
+                "UPDATE repositories SET recheck_requested_at = NULL WHERE id = ? AND recheck_requested_at <= ?",
+                requested
+            ))
+        return [repo_id for repo_id, _ in requested]
+    
+    def _write_push(self, conn: sqlite3.Connection, repo: Dict, push: Dict, received_at: str, outcome: List[str],
+                    resync: List[int]):
+        """
+        Writer job: add a push webhook's commits to the stored total if the
+        push carries on from the last one applied (its before SHA is our
+        last_push_sha). A redelivery (its after SHA is last_push_sha) is
+        dropped. Anything else - the first push we see, a gap, a force-push -
+        only moves the chain on, and a re-check is requested instead.
+        Appends "applied", "duplicate" or "recheck" to outcome.
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT total_commits, last_push_sha FROM repositories WHERE id = ?", (repo['id'],))
+        row = cursor.fetchone()
+        if row is None:
+            outcome.append("duplicate")  # Removed from teams.csv since it was looked up
+            return 0, received_at
+        previous_total, last_push_sha = row[0] or 0, row[1]
+        if push["after"] and push["after"] == last_push_sha:
+            outcome.append("duplicate")
+            return 0, received_at
+        
+        cursor.execute(
+            "UPDATE repositories SET last_webhook_at = ?, last_push_sha = ? WHERE id = ?",
+            (received_at, push["after"], repo['id'])
+        )
+        if not push["reliable"] or last_push_sha is None or push["before"] != last_push_sha:
+            outcome.append("recheck")
+            self._request_recheck(cursor, repo['id'])
+            return 0, received_at
+        outcome.append("applied")
+        if self.ingest_commits:
+            # In commits mode the commit rows themselves still come from the ingester
+            self._request_recheck(cursor, repo['id'])
+        return self._write_commit_count(conn, repo, previous_total + push["new_commits"], resync)
+    
+    def apply_push(self, owner: str, name: str, push: Dict) -> Optional[Dict]:
+        """
+        Record the commits a push webhook (from webhooks.parse_push) reported
+        for a repository, through the same event/activity path as polling.
+        Returns {"status": "applied" | "duplicate" | "rechecking",
+        "new_commits": n}, or None if the repository isn't tracked. Pushes
+        that can't be applied as a delta (see _write_push) re-check the
+        repository instead, whose polled total then replaces ours. The
+        request goes through the database, so a webhook received by a web
+        worker reaches the poller process.
+        """
+        repo = self.find_repository(owner, name)
+        if repo is None:
+            return None
+        
+        received_at = datetime.now().isoformat()
+        outcome = []
+        resync = []
+        future = self.db.submit(lambda conn: self._write_push(conn, repo, push, received_at, outcome, resync))
+        new_commit_count = self._finish_commit_count(repo, future)
+        self._resync_ranking(resync)
+        if not outcome:
+            return {"status": "rechecking", "new_commits": 0}  # The write failed; polling will catch up
+        if outcome[0] == "duplicate":
+            return {"status": "duplicate", "new_commits": 0}
+        return {"status": "applied" if outcome[0] == "applied" else "rechecking", "new_commits": new_commit_count}
+    
+    def _webhook_active(self, repo: Dict, now: float) -> bool:
+        """Whether a repository has delivered a push webhook recently enough to trust webhooks for it."""
+        if not repo.get('last_webhook_at'):
+            return False
+        last_webhook = datetime.fromisoformat(repo['last_webhook_at']).timestamp()
+        return now - last_webhook < self.webhook_active_window
+    
+    def _finish_commit_count(self, repo: Dict, future: Optional[Future]) -> int:
+        """Wait for a queued commit total and update in-memory state once it's committed."""
+        if future is None:
+            return 0
+        try:
+            with PROFILER.phase("db"):
+                new_commit_count, current_time = future.result()
         except sqlite3.Error as e:
-            # Rollback on error
-            self.db_conn.rollback()
             logger.error(f"Database error in check_repository: {e}")
             return 0
+        
+        if new_commit_count > 0:
+            metrics.COMMITS_DETECTED.inc(new_commit_count)
+            self.ranking.add_commits(repo['team_name'], new_commit_count, current_time)
+            self.data_version += 1
+            self.new_commits_event.set()
+        return new_commit_count
+    
+    def _apply_commit_count(self, repo: Dict, current_total: int) -> int:
+        """Record a freshly fetched commit total for a repository and return the new commit count."""
+        resync = []
+        new_commit_count = self._finish_commit_count(repo, self._submit_commit_count(repo, current_total, resync))
+        self._resync_ranking(resync)
+        return new_commit_count
+    
+    def _write_ingested_commits(self, conn: sqlite3.Connection, repo: Dict, result: Dict, resync: List[int]):
+        """Writer job: store newly ingested commits, then record the derived total.
+        Repos whose total went down are appended to resync."""
+        repo_id = repo['id']
+        cursor = conn.cursor()
+        commits = result["commits"]
+        if cursor.execute("SELECT 1 FROM repositories WHERE id = ?", (repo_id,)).fetchone() is None:
+            return 0, datetime.now().isoformat()  # Removed from teams.csv since it was fetched
+        
+        if result["complete"] and not result["found_last"]:
+            # The last SHA we saw is gone (force-push): the fetched list is the whole history now
+            fetched = {commit["sha"] for commit in commits}
+            cursor.execute("SELECT commit_hash FROM commits WHERE repo_id = ?", (repo_id,))
+            stale = [(repo_id, row[0]) for row in cursor.fetchall() if row[0] not in fetched]
+            cursor.executemany("DELETE FROM commits WHERE repo_id = ? AND commit_hash = ?", stale)
+            if stale:
+                logger.info(f"History of {repo['repo_name']} was rewritten, dropped {len(stale)} commits")
+        
+        self._insert_commits(cursor, repo_id, commits)
+        if commits and not result["complete"] and not result["found_last"]:
+            # Cut off by the page cap: older commits down to the last SHA seen (or the root) are
+            # backfilled on later polls, continuing any backfill already under way
+            last_sha, backfill_sha, backfill_until = cursor.execute(
+                "SELECT last_commit_sha, backfill_sha, backfill_until FROM repositories WHERE id = ?", (repo_id,)
+            ).fetchone()
+            until = backfill_until if backfill_sha is not None else last_sha
+            cursor.execute("UPDATE repositories SET backfill_sha = ?, backfill_until = ? WHERE id = ?",
+                           (commits[-1]["sha"], until, repo_id))
+            logger.warning(f"Ingested the newest {len(commits)} commits of {repo['repo_name']}, "
+                           f"backfilling the rest on later polls")
+        if commits:
+            cursor.execute("UPDATE repositories SET last_commit_sha = ? WHERE id = ?", (commits[0]["sha"], repo_id))
+        return self._write_ingested_total(conn, repo, resync)
+    
+    @staticmethod
+    def _insert_commits(cursor: sqlite3.Cursor, repo_id: int, commits: List[Dict]):
+        cursor.executemany(
+            "INSERT OR IGNORE INTO commits (repo_id, commit_hash, author, message, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [(repo_id, c["sha"], c["author"], c["message"], c["timestamp"]) for c in commits]
+        )
+    
+    def _write_ingested_total(self, conn: sqlite3.Connection, repo: Dict, resync: List[int]):
+        """Record the total derived from the ingested commits (a rewrite can shrink it)."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM commits WHERE repo_id = ?", (repo['id'],))
+        current_total = cursor.fetchone()[0]
+        self._correct_commit_count(cursor, repo['id'], current_total, resync)
+        return self._write_commit_count(conn, repo, current_total, resync)
+    
+    def _write_backfilled_commits(self, conn: sqlite3.Connection, repo: Dict, start_sha: str, result: Dict,
+                                  resync: List[int]):
+        """Writer job: store one poll's worth of older history, fetched from start_sha, and move the backfill cursor."""
+        repo_id = repo['id']
+        cursor = conn.cursor()
+        row = cursor.execute("SELECT backfill_sha FROM repositories WHERE id = ?", (repo_id,)).fetchone()
+        if row is None or row[0] != start_sha:
+            return 0, datetime.now().isoformat()  # Removed, or the cursor moved since the fetch
+        
+        commits = result["commits"]
+        self._insert_commits(cursor, repo_id, commits)
+        if result["complete"] or result["found_last"]:
+            cursor.execute("UPDATE repositories SET backfill_sha = NULL, backfill_until = NULL WHERE id = ?",
+                           (repo_id,))
+            logger.info(f"Finished backfilling the history of {repo['repo_name']}")
+        elif commits:
+            cursor.execute("UPDATE repositories SET backfill_sha = ? WHERE id = ?", (commits[-1]["sha"], repo_id))
+        return self._write_ingested_total(conn, repo, resync)
+    
+    def _submit_ingestion(self, repo: Dict, result: Optional[Dict], resync: List[int]) -> Optional[Future]:
+        """Queue ingested commits for the DB writer; None if there's nothing to record."""
+        if result is None or result.get("not_modified"):
+            return None
+        if not result["commits"] and not (result["complete"] and not result["found_last"]):
+            return None
+        return self.db.submit(lambda conn: self._write_ingested_commits(conn, repo, result, resync))
+    
+    def _get_last_commit_shas(self, repo_ids: List[int]) -> Dict[int, Optional[str]]:
+        with self.db.read() as conn:
+            placeholders = ','.join(['?'] * len(repo_ids))
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT id, last_commit_sha FROM repositories WHERE id IN ({placeholders})", repo_ids)
+            return dict(cursor.fetchall())
+    
+    def _get_backfill_cursors(self, repo_ids: List[int]) -> Dict[int, Tuple[str, Optional[str]]]:
+        """(backfill_sha, backfill_until) for the repositories among repo_ids with history still to fetch."""
+        with self.db.read() as conn:
+            placeholders = ','.join(['?'] * len(repo_ids))
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, backfill_sha, backfill_until FROM repositories
+                WHERE id IN ({placeholders}) AND backfill_sha IS NOT NULL
+            """, repo_ids)
+            return {repo_id: (start_sha, until) for repo_id, start_sha, until in cursor.fetchall()}
+    
+    def _fetch_new_commits(self, repo_url: str, last_sha: Optional[str],
+                           start_sha: Optional[str] = None, max_pages: Optional[int] = None) -> Optional[Dict]:
+        """The ingester's fetch for one repository, profiling a sample of them."""
+        with PROFILER.trace("repository", repo_label(repo_url)):
+            return self.ingester.fetch_new_commits(repo_url, last_sha, start_sha, max_pages)
+    
+    def _pages_per_repo(self, repo_count: int) -> int:
+        """
+        How many commit pages each of repo_count repositories may fetch
+        without spending more than the rate-limit budget left; 0 when it's spent.
+        """
+        budget = self.rate_limit.available()
+        if budget is None:
+            return self.ingester.max_pages  # No rate-limit headers seen yet
+        return min(self.ingester.max_pages, budget // repo_count)
+    
+    def _ingest_repositories(self, repos: List[Dict]) -> Dict[int, int]:
+        """Ingest new commits for each repository concurrently, then write them in order."""
+        last_shas = self._get_last_commit_shas([repo['id'] for repo in repos])
+        by_url = {repo['repo_url']: repo for repo in repos}
+        # The first page was admitted (and charged) by the polling loop; deeper walks
+        # stop early when the budget can't cover them and carry on as backfills
+        max_pages = max(1, self._pages_per_repo(len(repos)))
+        with PROFILER.phase("fetch"):
+            fetched = self.fetcher.fetch_all(
+                list(by_url),
+                lambda url: self._fetch_new_commits(url, last_shas.get(by_url[url]['id']), max_pages=max_pages)
+            )
+        results_by_url = dict(zip(by_url, fetched))
+        
+        resync = []
+        futures = [self._submit_ingestion(repo, results_by_url[repo['repo_url']], resync) for repo in repos]
+        self.db.submit(self.validator_cache.flush)
+        
+        results = {}
+        for repo, future in zip(repos, futures):
+            results[repo['id']] = self._finish_commit_count(repo, future)
+        for repo_id, new_commit_count in self._backfill_repositories(repos, resync).items():
+            results[repo_id] += new_commit_count
+        self._resync_ranking(resync)  # Rewritten histories lowered some totals
+        return results
+    
+    def _backfill_repositories(self, repos: List[Dict], resync: List[int]) -> Dict[int, int]:
+        """Fetch the next stretch of older history for repositories an earlier poll couldn't finish."""
+        cursors = self._get_backfill_cursors([repo['id'] for repo in repos])
+        if not cursors:
+            return {}
+        max_pages = self._pages_per_repo(len(cursors))
+        if max_pages < 1:
+            return {}  # The budget is spent; the cursors wait for a later poll
+        by_url = {repo['repo_url']: repo for repo in repos if repo['id'] in cursors}
+        
+        def fetch(url):
+            start_sha, until = cursors[by_url[url]['id']]
+            return self._fetch_new_commits(url, until, start_sha, max_pages)
+        
+        with PROFILER.phase("fetch"):
+            fetched = self.fetcher.fetch_all(list(by_url), fetch)
+        
+        futures = []
+        for repo, result in zip(by_url.values(), fetched):
+            future = None
+            if result is not None:
+                start_sha = cursors[repo['id']][0]
+                future = self.db.submit(
+                    lambda conn, repo=repo, start_sha=start_sha, result=result:
+                        self._write_backfilled_commits(conn, repo, start_sha, result, resync)
+                )
+            futures.append((repo, future))
+        return {repo['id']: self._finish_commit_count(repo, future) for repo, future in futures}
+    
+    def check_repository(self, repo_id: int) -> int:
+        """Check a repository for new commits and update the database."""
+        with metrics.CHECK_REPOSITORY_SECONDS.time(), PROFILER.trace("repository", f"id {repo_id}"):
+            return self._check_repository(repo_id)
+    
+    def _check_repository(self, repo_id: int) -> int:
+        repo = self._get_repository(repo_id)
+        if repo is None:
+            logger.warning(f"Repository {repo_id} not found")
+            return 0
+        if not self.breaker.allow(repo['repo_url']):
+            return 0
+        
+        if self.ingester is not None:
+            return self._ingest_repositories([repo])[repo_id]
+        
+        # Fetch outside the transaction so the network call never holds a DB lock
+        current_total = self._get_total_commits(repo['repo_url'])
+        new_commit_count = self._apply_commit_count(repo, current_total)
+        self.db.submit(self.validator_cache.flush)
+        return new_commit_count
+    
+    def check_repositories(self, repos: List[Dict]) -> Dict[int, int]:
+        """
+        Check many repositories at once. Counts come from the count source in
+        one batch (concurrent page fetches or batched GraphQL queries); the
+        results are then queued to the DB writer in the order given, which
+        commits them together in one transaction.
+        Repositories parked by the circuit breaker are skipped and count as 0.
+        Returns a mapping of repository ID to new commit count.
+        """
+        results = {repo['id']: 0 for repo in repos}
+        repos = [repo for repo in repos if self.breaker.allow(repo['repo_url'])]
+        if not repos:
+            return results
+        if self.ingester is not None:
+            results.update(self._ingest_repositories(repos))
+            return results
+        
+        with PROFILER.phase("fetch"):  # Fetching and parsing on the worker pool (profiled there too)
+            totals = self.count_source.get_total_commits_batch(
+                [repo['repo_url'] for repo in repos],
+                self.fetcher
+            )
+        
+        resync = []
+        futures = [self._submit_commit_count(repo, current_total, resync) for repo, current_total in zip(repos, totals)]
+        self.db.submit(self.validator_cache.flush)
+        
+        for repo, future in zip(repos, futures):
+            results[repo['id']] = self._finish_commit_count(repo, future)
+        self._resync_ranking(resync)  # Polls corrected totals that webhooks took too high
+        return results
     
     def run_polling_loop(self):
-        """Run the main polling loop to check repositories."""
+        """Run the main polling loop to check repositories as they fall due."""
         self.running = True
-        
-        # Track repositories to implement staggered polling
-        repos_last_checked = {}
+        throttled = False
+        last_logged_remaining = None
+        self.maintenance.start()
+        if self.leases is not None:
+            self.leases.start()
         
         while self.running:
             try:
-                # Get all repositories
-                repos = self.get_all_repositories()
+                # Pick up added or removed repositories
+                repos = {repo['id']: repo for repo in self.get_all_repositories()}
+                if self.leases is not None:
+                    # Sharded: only the repositories this instance holds leases on
+                    owned = self.leases.owned()
+                    repos = {repo_id: repo for repo_id, repo in repos.items() if repo_id in owned}
+                    self.scheduler.sync(repos, first_due=owned)
+                else:
+                    self.scheduler.sync(repos)
                 current_time = time.time()
                 
-                # Check if we're approaching rate limits
-                approaching_limit = self.remaining_api_calls < len(repos) * 2  # Buffer for safety
+                # Re-checks webhooks asked for, possibly from another process
+                self.scheduler.defer(self._take_rechecks(repos), current_time)
                 
-                # Process repositories in a staggered manner to avoid hitting rate limits
-                for repo in repos:
-                    repo_id = repo['id']
-                    
-                    # Initialize last checked time if not already set
-                    if repo_id not in repos_last_checked:
-                        repos_last_checked[repo_id] = 0
-                    
-                    # Determine if we should check this repository now
-                    # If approaching rate limits, check less frequently
-                    check_interval = POLLING_INTERVAL * 5 if approaching_limit else POLLING_INTERVAL
+                due_ids = self.scheduler.pop_due(current_time)
+                
+                # Only check as many repositories as the rate limit allows
+                budget = self.rate_limit.available(current_time)
+                if budget is not None and due_ids:
+                    allowed = self.count_source.repos_for_budget(budget)
+                    if allowed < len(due_ids):
+                        # resume_at() is 0 or past until a reset header arrives; don't spin re-deferring
+                        blocked_until = max(self.rate_limit.resume_at(), current_time + RATE_LIMIT_MIN_BACKOFF)
+                        self.scheduler.defer(due_ids[allowed:], current_time if allowed else blocked_until)
+                        due_ids = due_ids[:allowed]
+                        if not throttled:
+                            reset_time = datetime.fromtimestamp(blocked_until).strftime('%H:%M:%S')
+                            logger.warning(f"Rate limit budget low ({budget} calls), deferring repositories until {reset_time}")
+                        throttled = True
+                    else:
+                        throttled = False
+                
+                due_repos = [repos[repo_id] for repo_id in due_ids if repo_id in repos]
+                if due_repos:
+                    cycle_start = time.time()
+                    self.rate_limit.consume(self.count_source.calls_for(len(due_repos)))
+                    try:
+                        with metrics.POLL_CYCLE_SECONDS.time(), PROFILER.trace("poll_cycle", "check_repositories"):
+                            results = self.check_repositories(due_repos)
+                    except Exception:
+                        # Keep the repositories queued so a failed cycle doesn't drop them
+                        self.scheduler.defer(due_ids, time.time() + POLLING_INTERVAL)
+                        raise
+                    metrics.REPOS_CHECKED.inc(len(due_repos))
                     
-                    if current_time - repos_last_checked[repo_id] >= check_interval:
-                        new_commits = self.check_repository(repo_id)
-                        repos_last_checked[repo_id] = current_time
-                        
+                    now = time.time()
+                    for repo in due_repos:
+                        new_commits = results.get(repo['id'], 0)
+                        if self._webhook_active(repo, now):
+                            # Webhooks deliver this repo's commits; polling only reconciles
+                            self.scheduler.defer([repo['id']], now + self.webhook_reconcile_interval)
+                        else:
+                            self.scheduler.reschedule(repo['id'], new_commits)
                         if new_commits > 0:
                             logger.info(f"Found {new_commits} new commits for {repo['repo_name']} ({repo['team_name']})")
+                    
+                    cache_stats = self.validator_cache.stats()
+                    logger.debug(
+                        f"Checked {len(due_repos)} repositories in {time.time() - cycle_start:.2f}s "
+                        f"(conditional cache hits: {cache_stats['hits']}, misses: {cache_stats['misses']})"
+                    )
                 
-                # Log rate limit status occasionally
-                if self.remaining_api_calls < 100:
-                    reset_time = datetime.fromtimestamp(self.last_api_reset).strftime('%H:%M:%S')
-                    logger.info(f"GitHub API calls remaining: {self.remaining_api_calls}, resets at {reset_time}")
+                # Log rate limit status when it changes and is getting low
+                remaining = self.rate_limit.remaining
+                if remaining is not None and remaining < 100 and remaining != last_logged_remaining:
+                    last_logged_remaining = remaining
+                    reset_time = datetime.fromtimestamp(self.rate_limit.reset_at).strftime('%H:%M:%S')
+                    logger.info(f"GitHub API calls remaining: {remaining}, resets at {reset_time}")
                 
             except Exception as e:
                 logger.error(f"Error in polling loop: {str(e)}")
@@ -322,67 +877,194 @@ class GitHubTracker:
             # Sleep before the next polling cycle
             time.sleep(1)  # Short sleep between cycles
     
+    def refresh_from_db(self):
+        """Pick up writes made by another process: resync the ranking and wake listeners."""
+        self.ranking.sync(self.get_team_totals())
+        self.data_version += 1
+        self.new_commits_event.set()
+    
+    def _follow_changes(self, interval: float):
+        last_version = self.db.data_version()
+        while True:
+            time.sleep(interval)
+            try:
+                version = self.db.data_version()
+                if version != last_version:
+                    last_version = version
+                    self.refresh_from_db()
+            except Exception as e:
+                logger.error(f"Error following database changes: {str(e)}")
+    
+    def follow_changes(self, interval: float = CHANGE_POLL_INTERVAL):
+        """
+        For web workers that don't poll: watch the shared database for commits
+        by the poller process (or other workers) and refresh in-memory state,
+        so read snapshots and the event stream stay current.
+        """
+        threading.Thread(target=self._follow_changes, args=(interval,), daemon=True, name="change-follower").start()
+    
     def start(self):
         """Start the tracker in a background thread."""
+        if not self.poller:
+            raise RuntimeError("A web-tier tracker (poller=False) doesn't poll")
         threading.Thread(target=self.run_polling_loop, daemon=True).start()
         logger.info("GitHub tracker started")
     
     def stop(self):
         """Stop the tracker."""
         self.running = False
+        if not self.poller:
+            return
+        self.maintenance.stop()
+        if self.leases is not None:
+            self.leases.stop()
+        self.fetcher.shutdown()
+        self.http.close()
         logger.info("GitHub tracker stopped")
     
-    def get_unprocessed_events(self) -> List[Dict]:
-        """Get all unprocessed events for the web interface."""
-        cursor = self.db_conn.cursor()
-        cursor.execute("""
-            SELECT id, event_type, entity_id, data, created_at
-            FROM events
-            WHERE processed = FALSE
-            ORDER BY created_at ASC
-        """)
-        columns = [col[0] for col in cursor.description]
-        events = []
-        for row in cursor.fetchall():
-            event = dict(zip(columns, row))
-            event['data'] = json.loads(event['data'])
-            events.append(event)
-        return events
-    
-    def mark_events_processed(self, event_ids: List[int]):
-        """Mark events as processed."""
-        if not event_ids:
-            return
-        
-        placeholders = ','.join(['?'] * len(event_ids))
-        cursor = self.db_conn.cursor()
-        cursor.execute(
-            f"UPDATE events SET processed = TRUE WHERE id IN ({placeholders})",
-            event_ids
-        )
-        self.db_conn.commit()
-
+    def get_events_since(self, since_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get events with an ID greater than since_id, oldest first.
+        Read-only keyset pagination on events.id, so any number of clients can
+        tail the log independently with their own cursor.
+        """
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, event_type, entity_id, data, created_at
+                FROM events
+                WHERE id > ?
+                ORDER BY id ASC
+                LIMIT ?
+            """, (since_id, limit if limit is not None else -1))
+            columns = [col[0] for col in cursor.description]
+            events = []
+            for row in cursor.fetchall():
+                event = dict(zip(columns, row))
+                event['data'] = json.loads(event['data'])
+                events.append(event)
+            return events
+    
+    def get_latest_event_id(self) -> int:
+        """Get the ID of the newest event, or 0 if there are none."""
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(id) FROM events")
+            return cursor.fetchone()[0] or 0
+    
     def close(self):
-        """Close the database connection."""
-        if self.db_conn:
-            self.db_conn.close()
+        """Flush pending writes and close the database connections."""
+        if self.db:
+            self.db.close()
 
+    def get_commits_by_author(self, team_name: Optional[str] = None) -> List[Dict]:
+        """Get ingested commit counts per author, optionally for one team."""
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.author, COUNT(*) as commits
+                FROM commits c
+                JOIN repositories r ON c.repo_id = r.id
+                JOIN teams t ON r.team_id = t.id
+                WHERE ? IS NULL OR t.team_name = ?
+                GROUP BY c.author
+                ORDER BY commits DESC
+            """, (team_name, team_name))
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def get_commits_by_hour(self, team_name: Optional[str] = None) -> List[Dict]:
+        """Get ingested commit counts per hour (by commit time), optionally for one team."""
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT strftime('%Y-%m-%dT%H:00:00Z', c.timestamp) as hour, COUNT(*) as commits
+                FROM commits c
+                JOIN repositories r ON c.repo_id = r.id
+                JOIN teams t ON r.team_id = t.id
+                WHERE ? IS NULL OR t.team_name = ?
+                GROUP BY hour
+                ORDER BY hour
+            """, (team_name, team_name))
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def get_timeline(self, bucket: str, start: str, end: str, team_name: Optional[str] = None) -> Dict:
+        """Get commits per minute or hour bucket in [start, end) from the rollups (see rollups.timeline)."""
+        with self.db.read() as conn:
+            return rollups.timeline(conn, bucket, start, end, team_name)
+    
+    def rebuild_rollups(self) -> Dict[str, int]:
+        """Recompute the timeline rollups from activity_history."""
+        counts = self.db.write(lambda conn: rollups.rebuild(conn.cursor()))
+        self.data_version += 1
+        return counts
+    
     def get_recent_activity(self, limit: int = 50) -> List[Dict]:
         """Get recent activity history."""
-        cursor = self.db_conn.cursor()
-        cursor.execute("""
-            SELECT 
-                id,
-                event_type,
-                team_name,
-                repo_name,
-                commit_count,
-                total_commits,
-                datetime(timestamp, 'localtime') as local_timestamp
-            FROM activity_history
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT 
+                    id,
+                    event_type,
+                    team_name,
+                    repo_name,
+                    commit_count,
+                    total_commits,
+                    datetime(timestamp, 'localtime') as local_timestamp
+                FROM activity_history
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (limit,))
         
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
\ No newline at end of file
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _select_page(self, table: str, key: str, field_map: Dict[str, str], fields: Optional[List[str]],
+                     after: Optional[int], limit: int, descending: bool = False) -> Tuple[List[Dict], Optional[int]]:
+        """
+        One keyset page: rows whose key comes after the cursor in key order,
+        with only the requested fields selected. Returns (rows, key of the
+        last row), so the next page is a range seek on the key, however deep.
+        """
+        fields = fields or list(field_map)
+        columns = ", ".join(f"{field_map[field]} AS {field}" for field in fields)
+        where = f"WHERE {key} {'<' if descending else '>'} ?" if after is not None else ""
+        params = (after, limit) if after is not None else (limit,)
+        with self.db.read() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {key}, {columns}
+                FROM {table}
+                {where}
+                ORDER BY {key} {'DESC' if descending else 'ASC'}
+                LIMIT ?
+            """, params)
+            rows = cursor.fetchall()
+        return [dict(zip(fields, row[1:])) for row in rows], (rows[-1][0] if rows else None)
+    
+    def get_repositories_page(self, after: Optional[int] = None, limit: int = 100,
+                              fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[int]]:
+        """Repositories with an ID greater than after, in ID order. Returns (rows, last ID)."""
+        return self._select_page("repositories r JOIN teams t ON r.team_id = t.id", "r.id",
+                                 REPOSITORY_FIELDS, fields, after, limit)
+    
+    def get_activity_page(self, after: Optional[int] = None, limit: int = 100,
+                          fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[int]]:
+        """Activity rows newest first, starting below the ID after. Returns (rows, last ID)."""
+        return self._select_page("activity_history", "id", ACTIVITY_FIELDS, fields, after, limit, descending=True)
+    
+    def iter_activity(self, after: Optional[int] = None, fields: Optional[List[str]] = None,
+                      batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+        """
+        Every activity row oldest first, in batches. Each batch is its own
+        short read, so a long export holds neither a pooled connection nor an
+        old snapshot (which would stop the WAL from being checkpointed).
+        """
+        while True:
+            rows, after = self._select_page("activity_history", "id", ACTIVITY_FIELDS, fields, after, batch_size)
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
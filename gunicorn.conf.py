@@ -0,0 +1,17 @@
+"""
+Gunicorn settings for the web tier (wsgi.py).
+Workers use threads rather than one request at a time, since every
+/api/stream client holds a thread for as long as it stays connected. Streams
+are capped at MAX_STREAMS per worker (app.py answers the rest with a 503 and
+the page falls back to polling), so some threads always stay free for
+API requests.
+"""
+
+from config import SERVE_CONFIG
+
+bind = SERVE_CONFIG["bind"]
+workers = SERVE_CONFIG["workers"]
+worker_class = "gthread"
+threads = SERVE_CONFIG["threads"]
+preload_app = False  # Each worker builds its own (web-tier) tracker and DB connections after forking
+graceful_timeout = 10
@@ -0,0 +1,145 @@
+"""
+Streaming commit-count extraction from GitHub repository pages.
+The page is fed to a stdlib HTMLParser chunk by chunk as it arrives and
+parsing stops as soon as the commit count is found, so no document tree is
+ever built and most of a several-hundred-KB page is never parsed.
+
+Selectors are tried as an ordered chain: the first one is GitHub's current
+markup, the later ones older layouts. A match on the first selector ends the
+parse immediately; a fallback match is kept and returned only if the page
+ends without a better one.
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+CHUNK_SIZE = 16 * 1024  # bytes read from the response per parser feed
+DRAIN_LIMIT = 512 * 1024  # Unread bytes we'll still read so the connection returns to the pool
+
+COUNT_PATTERN = re.compile(r'(\d[\d,]*)\s*commits?\b', re.IGNORECASE)
+
+
+class CountSelector(NamedTuple):
+    """Elements whose text may hold the commit count, e.g. <span class="fgColor-default">."""
+    name: str
+    tag: str
+    classes: FrozenSet[str] = frozenset()
+    href_contains: Optional[str] = None
+
+    def matches(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> bool:
+        if tag != self.tag:
+            return False
+        attr_map = dict(attrs)
+        if self.classes and not self.classes.issubset((attr_map.get('class') or '').split()):
+            return False
+        if self.href_contains is not None and self.href_contains not in (attr_map.get('href') or ''):
+            return False
+        return True
+
+
+# Best first
+DEFAULT_SELECTORS = (
+    CountSelector("fgColor-default", "span", frozenset({"fgColor-default"})),  # "1,234 Commits"
+    CountSelector("commits-link", "a", href_contains="/commits/"),  # "<strong>1,234</strong> commits"
+)
+
+
+def parse_count(text: str) -> Optional[int]:
+    """Read a count from text like "1,234 Commits", or None if there isn't one."""
+    match = COUNT_PATTERN.search(text)
+    return int(match.group(1).replace(',', '')) if match else None
+
+
+class CommitCountParser(HTMLParser):
+    """
+    Incremental parser that watches for the selectors' elements and reads the
+    count from their text. feed() it chunks until `done` is set.
+    """
+
+    def __init__(self, selectors: Tuple[CountSelector, ...] = DEFAULT_SELECTORS):
+        super().__init__(convert_charrefs=True)
+        self.selectors = selectors
+        self.count: Optional[int] = None
+        self.selector: Optional[str] = None  # Name of the selector the count came from
+        self._best_rank = len(selectors)
+        self._tags = frozenset(selector.tag for selector in selectors)
+        self._open: List[List] = []  # [rank, tag, nesting depth, text parts] per element being read
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in self._tags:
+            return  # Only a selector's own tag can nest or start a capture
+        for capture in self._open:
+            if capture[1] == tag:
+                capture[2] += 1
+        for rank, selector in enumerate(self.selectors[:self._best_rank]):
+            if selector.matches(tag, attrs):
+                self._open.append([rank, tag, 1, []])
+
+    def handle_endtag(self, tag):
+        if not self._open or tag not in self._tags:
+            return
+        for capture in list(self._open):
+            if capture[1] != tag:
+                continue
+            capture[2] -= 1
+            if capture[2] == 0:
+                self._open.remove(capture)
+                self._finish(capture[0], ''.join(capture[3]))
+
+    def handle_data(self, data):
+        for capture in self._open:
+            capture[3].append(data)
+
+    def _finish(self, rank: int, text: str):
+        if rank >= self._best_rank:
+            return
+        count = parse_count(text)
+        if count is None:
+            return
+        self.count = count
+        self.selector = self.selectors[rank].name
+        self._best_rank = rank
+        self._open = [capture for capture in self._open if capture[0] < rank]
+        if rank == 0:
+            self.done = True
+
+
+def extract_commit_count(chunks: Iterable[str],
+                         selectors: Tuple[CountSelector, ...] = DEFAULT_SELECTORS) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Feed text chunks until the count is found.
+    Returns (count, selector name), or (None, None) if no selector matched.
+    """
+    parser = CommitCountParser(selectors)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.count, parser.selector
+
+
+def extract_from_response(response, selectors: Tuple[CountSelector, ...] = DEFAULT_SELECTORS,
+                          chunk_size: int = CHUNK_SIZE) -> Tuple[Optional[int], Optional[str]]:
+    """
+    extract_commit_count over a streamed requests response (stream=True),
+    decoding as it reads. Once the count is found the rest of the body is
+    read unparsed, up to DRAIN_LIMIT bytes, so the connection can be reused;
+    a larger remainder is dropped with the connection.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    body = response.iter_content(chunk_size)
+    try:
+        result = extract_commit_count((decoder.decode(chunk) for chunk in body), selectors)
+        drained = 0
+        for chunk in body:
+            drained += len(chunk)
+            if drained > DRAIN_LIMIT:
+                break
+        return result
+    finally:
+        response.close()
@@ -0,0 +1,104 @@
+"""
+Conditional-request validator cache for repository page fetches.
+Stores the ETag and Last-Modified headers of the last successful fetch of each
+repository URL so the next poll can ask GitHub for a 304 instead of the page.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import metrics
+
+
+class ValidatorCache:
+    """
+    In-memory view of the http_cache table.
+    Lookups and updates are thread-safe and never touch the database, so the
+    fetch workers can use it freely; dirty entries are written back by flush(),
+    which the tracker queues to the DB writer alongside its other writes.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Optional[str]]] = {}
+        self._dirty = set()
+        self.hits = 0  # 304 responses
+        self.misses = 0  # Full responses
+        self._load(conn)
+
+    def _load(self, conn: sqlite3.Connection):
+        cursor = conn.cursor()
+        cursor.execute("SELECT repo_url, etag, last_modified FROM http_cache")
+        for repo_url, etag, last_modified in cursor.fetchall():
+            self._entries[repo_url] = {"etag": etag, "last_modified": last_modified}
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Return the If-None-Match / If-Modified-Since headers for a URL, if any."""
+        with self._lock:
+            entry = self._entries.get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers['If-None-Match'] = entry["etag"]
+            if entry["last_modified"]:
+                headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        """Remember the validators from a successful full response."""
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._entries[url] = {"etag": etag, "last_modified": last_modified}
+            self._dirty.add(url)
+
+    def invalidate(self, url: str):
+        """Forget the validators for a URL so the next fetch is unconditional."""
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._dirty.add(url)
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+        metrics.CONDITIONAL_REQUESTS.inc(result="hit")
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+        metrics.CONDITIONAL_REQUESTS.inc(result="miss")
+
+    def flush(self, conn: sqlite3.Connection):
+        """Write changed validators back to the database (runs as a writer job)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            updates = []
+            deletes = []
+            for url in self._dirty:
+                entry = self._entries.get(url)
+                if entry is None:
+                    deletes.append((url,))
+                else:
+                    updates.append((url, entry["etag"], entry["last_modified"]))
+            self._dirty.clear()
+
+        now = datetime.now().isoformat()
+        conn.executemany(
+            "INSERT OR REPLACE INTO http_cache (repo_url, etag, last_modified, updated_at) VALUES (?, ?, ?, ?)",
+            [update + (now,) for update in updates]
+        )
+        conn.executemany("DELETE FROM http_cache WHERE repo_url = ?", deletes)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counts for reporting."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,145 @@
+"""
+Shared HTTP client layer for talking to GitHub.
+
+HttpClient wraps one pooled requests.Session, so repeated fetches reuse
+keep-alive connections instead of a new TCP+TLS handshake each time. Every
+request gets a timeout, and 429/5xx responses and connection errors are
+retried with jittered exponential backoff.
+
+CircuitBreaker parks repositories that keep failing in ways a retry won't fix
+(404, 403, unparseable pages), so the poller stops re-fetching them every
+cycle. A parked repository gets one trial fetch after its cooldown, and the
+cooldown doubles each time it trips again.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+logger = logging.getLogger("github-tracker")
+
+# Defaults
+DEFAULT_TIMEOUT = 10  # seconds per request
+DEFAULT_MAX_RETRIES = 3  # Retries after the first attempt
+DEFAULT_POOL_SIZE = 16  # Keep-alive connections kept per host
+BACKOFF_BASE = 0.5  # seconds; retry n waits up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 8  # seconds; also the longest Retry-After we'll wait in-line
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failures before a repo is parked
+BREAKER_BASE_COOLDOWN = 300  # seconds a repo is first parked for
+BREAKER_MAX_COOLDOWN = 3600  # seconds
+
+
+class HttpClient:
+    """Pooled, timed-out, retrying HTTP client shared by the count sources."""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[requests.Response]) -> Optional[float]:
+        """Seconds to wait before retry `attempt`, or None if it isn't worth waiting."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            # Longer waits are left to the rate-limit budget rather than blocking a worker
+            return int(retry_after) if int(retry_after) <= BACKOFF_MAX else None
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request, retrying 429/5xx responses and connection errors with jittered backoff."""
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, None)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                if delay is None:
+                    return response
+                response.close()  # Hand a streamed response's connection back before retrying
+            metrics.HTTP_RETRIES.inc()
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class CircuitBreaker:
+    """Per-key breaker: after repeated failures the key is parked for a growing cooldown."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 base_cooldown: float = BREAKER_BASE_COOLDOWN, max_cooldown: float = BREAKER_MAX_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._failures: Dict[str, int] = {}
+        self._trips: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        """Whether the key may be fetched. Once its cooldown passes it gets one trial fetch."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            open_until = self._open_until.get(key)
+            if open_until is None:
+                return True
+            if now < open_until:
+                return False
+            # Half-open: let one fetch through; another failure re-parks it straight away
+            del self._open_until[key]
+            self._failures[key] = self.failure_threshold - 1
+            return True
+
+    def record_success(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+            self._trips.pop(key, None)
+            self._open_until.pop(key, None)
+
+    def record_failure(self, key: str, reason: str = "", now: Optional[float] = None):
+        now = now if now is not None else time.time()
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if failures < self.failure_threshold:
+                return
+            trips = self._trips.get(key, 0)
+            cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** trips)
+            self._trips[key] = trips + 1
+            self._open_until[key] = now + cooldown
+            self._failures[key] = 0
+        logger.warning(f"Parking {key} for {cooldown:.0f}s after {failures} failures ({reason})")
+
+    def parked(self, now: Optional[float] = None) -> List[str]:
+        """Keys currently parked."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            return [key for key, until in self._open_until.items() if until > now]
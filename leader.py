@@ -0,0 +1,57 @@
+"""
+Leader election for the poller process.
+The active poller holds an exclusive SQLite lock on a small lock file for as
+long as it runs. Any other poller started against the same database gets
+"database is locked" and waits as a standby. The operating system drops the
+lock when the holder exits or crashes, so a standby takes over without any
+lease to expire.
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Optional
+
+logger = logging.getLogger("github-tracker")
+
+LOCK_RETRY_INTERVAL = 5  # seconds between a standby's attempts to take over
+
+
+class PollerLock:
+    """Exclusive lock held by the single active poller."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def try_acquire(self) -> bool:
+        """Take the lock if no other process holds it."""
+        if self._conn is not None:
+            return True
+        conn = sqlite3.connect(self.path, timeout=0, isolation_level=None, check_same_thread=False)
+        try:
+            # Held until release(): the open EXCLUSIVE transaction is the lock
+            conn.execute("BEGIN EXCLUSIVE")
+        except sqlite3.OperationalError:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def acquire(self, retry_interval: float = LOCK_RETRY_INTERVAL):
+        """Block until this process is the active poller."""
+        if self.try_acquire():
+            return
+        logger.info(f"Another poller holds {self.path}, waiting as standby")
+        while not self.try_acquire():
+            time.sleep(retry_interval)
+        logger.info("Took over as the active poller")
+
+    def release(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @property
+    def held(self) -> bool:
+        return self._conn is not None
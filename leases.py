@@ -0,0 +1,172 @@
+"""
+Repository leases for sharded polling.
+Several pollers, each with its own GitHub token, can split the repositories
+between them. Every instance heartbeats into poller_instances, and
+repo_leases records which instance polls each repository. A lease is only as
+good as its owner's heartbeat: once that is LEASE_TTL seconds old, the
+instance counts as dead and its repositories are free to claim.
+
+Each heartbeat is one write transaction (BEGIN IMMEDIATE, so instances
+never claim concurrently). It renews the heartbeat, then moves the instance
+towards its fair share of ceil(repositories / live instances): it releases
+its surplus when instances join and claims free or orphaned repositories
+when it is short.
+
+No repository is polled twice within POLLING_INTERVAL:
+- A released lease records released_at, and the new owner waits a full
+  interval from then before its first poll.
+- A dead owner's leases are only claimable LEASE_TTL after its last
+  heartbeat, and an instance that hasn't renewed for LEASE_TTL -
+  POLLING_INTERVAL stops polling, so its last poll is at least an interval
+  before anyone may take over.
+- LEASE_TTL exceeds HEARTBEAT_INTERVAL + POLLING_INTERVAL, so a healthy
+  instance never hits that cut-off.
+All instances must share a clock, as they share the database file.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from database import Database
+
+logger = logging.getLogger("github-tracker")
+
+HEARTBEAT_INTERVAL = 5  # seconds between renewals
+LEASE_TTL = 30  # seconds without a heartbeat before an instance's repositories can be claimed
+
+
+class RepoLeases:
+    """One poller instance's claim on its share of the repositories."""
+
+    def __init__(self, db: Database, instance_id: str, poll_interval: float,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL, lease_ttl: float = LEASE_TTL):
+        if lease_ttl <= heartbeat_interval + poll_interval:
+            raise ValueError("lease_ttl must exceed heartbeat_interval + poll_interval")
+        self.db = db
+        self.instance_id = instance_id
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_ttl = lease_ttl
+        self._owned: Dict[int, float] = {}  # repo_id -> earliest time this instance may first poll it
+        self._renewed_at = 0.0
+        self._started = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _renew(self, conn) -> float:
+        """Writer job: heartbeat, drop dead instances and rebalance. Returns the heartbeat time."""
+        now = time.time()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO poller_instances (instance_id, heartbeat_at, started_at) VALUES (?, ?, ?)
+            ON CONFLICT (instance_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+        """, (self.instance_id, now, now))
+        cursor.execute("DELETE FROM poller_instances WHERE heartbeat_at < ?", (now - self.lease_ttl,))
+
+        # Keep one lease row per tracked repository
+        cursor.execute("INSERT OR IGNORE INTO repo_leases (repo_id) SELECT id FROM repositories")
+        cursor.execute("DELETE FROM repo_leases WHERE repo_id NOT IN (SELECT id FROM repositories)")
+
+        live = cursor.execute("SELECT COUNT(*) FROM poller_instances").fetchone()[0]
+        total = cursor.execute("SELECT COUNT(*) FROM repo_leases").fetchone()[0]
+        share = math.ceil(total / live)
+
+        cursor.execute("SELECT repo_id FROM repo_leases WHERE instance_id = ? ORDER BY repo_id", (self.instance_id,))
+        held = [row[0] for row in cursor.fetchall()]
+        first_polls = {}
+        if len(held) > share:
+            surplus = held[share:]
+            cursor.executemany(
+                "UPDATE repo_leases SET instance_id = NULL, released_at = ? WHERE repo_id = ?",
+                [(now, repo_id) for repo_id in surplus]
+            )
+            held = held[:share]
+            logger.info(f"Released {len(surplus)} repositories for rebalancing ({live} pollers)")
+        elif len(held) < share:
+            # Unowned, or owned by an instance whose heartbeat has lapsed
+            cursor.execute("""
+                SELECT l.repo_id, l.released_at
+                FROM repo_leases l
+                LEFT JOIN poller_instances p ON p.instance_id = l.instance_id
+                WHERE p.instance_id IS NULL
+                ORDER BY l.repo_id
+                LIMIT ?
+            """, (share - len(held),))
+            claimed = cursor.fetchall()
+            cursor.executemany(
+                "UPDATE repo_leases SET instance_id = ?, released_at = NULL WHERE repo_id = ?",
+                [(self.instance_id, repo_id) for repo_id, _ in claimed]
+            )
+            if claimed:
+                logger.info(f"Claimed {len(claimed)} repositories ({live} pollers, share {share})")
+            for repo_id, released_at in claimed:
+                # A released repository was polled by its last owner up to the moment of release
+                first_polls[repo_id] = released_at + self.poll_interval if released_at else now
+                held.append(repo_id)
+
+        with self._lock:
+            # Leases this process didn't know it held survive a crash and quick restart
+            # under the same instance ID, so give the previous run's polls an interval to age
+            self._owned = {
+                repo_id: self._owned.get(repo_id, first_polls.get(repo_id, now + self.poll_interval))
+                for repo_id in held
+            }
+        return now
+
+    def heartbeat(self):
+        """Renew this instance's leases and rebalance, in one transaction."""
+        self._renewed_at = self.db.write(self._renew)
+
+    def owned(self, now: Optional[float] = None) -> Dict[int, float]:
+        """
+        The repositories this instance may poll, each with the earliest time of
+        its first poll here. Empty once the last renewal is too old, so an
+        instance that can't reach the database stops an interval before others
+        may take over.
+        """
+        now = now if now is not None else time.time()
+        if now > self._renewed_at + self.lease_ttl - self.poll_interval:
+            return {}
+        with self._lock:
+            return dict(self._owned)
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"Error renewing repository leases: {str(e)}")
+
+    def start(self):
+        """Heartbeat now, then every heartbeat_interval in a background thread."""
+        self._started = True
+        try:
+            self.heartbeat()
+        except Exception as e:
+            logger.error(f"Error claiming repository leases: {str(e)}")
+        threading.Thread(target=self._run, daemon=True, name="lease-heartbeat").start()
+
+    def _release_all(self, conn):
+        now = time.time()
+        conn.execute(
+            "UPDATE repo_leases SET instance_id = NULL, released_at = ? WHERE instance_id = ?",
+            (now, self.instance_id)
+        )
+        conn.execute("DELETE FROM poller_instances WHERE instance_id = ?", (self.instance_id,))
+
+    def stop(self):
+        """Stop heartbeating and hand every repository back so others can claim it straight away."""
+        if not self._started:
+            return  # Never claimed anything (e.g. a web worker's tracker)
+        self._started = False
+        self._stop.set()
+        with self._lock:
+            self._owned = {}
+        self._renewed_at = 0.0
+        try:
+            self.db.write(self._release_all)
+        except Exception as e:
+            logger.error(f"Error releasing repository leases: {str(e)}")
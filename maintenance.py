@@ -0,0 +1,256 @@
+"""
+Background database maintenance for long-running events.
+Without it the events log and activity_history grow for as long as the
+event runs, deleted pages are never handed back, and the WAL only ever grows.
+DatabaseMaintenance runs in the poller process and, every interval:
+
+- Archives events older than the event retention window, and activity rows
+  older than the activity retention window if one is set (cut at a whole
+  hour, so the timeline rollups keep every archived hour intact). Activity
+  rows are kept by default, since the activity export only reads the
+  database and archived rows drop out of it. Archived rows are
+  appended to gzipped NDJSON files in archive_dir, one per table and day,
+  then deleted. Each batch of ARCHIVE_BATCH_SIZE rows is its own short write
+  job, so the poller's writes interleave with a large archive run.
+- Returns free pages to the filesystem with PRAGMA incremental_vacuum, in
+  steps of VACUUM_STEP_PAGES. A database created before auto_vacuum was
+  enabled is converted with one VACUUM when maintenance first starts.
+- Runs wal_checkpoint(TRUNCATE) every CHECKPOINT_INTERVAL, at a moment when
+  the writer has been idle for QUIET_SECONDS, or straight away once the WAL
+  passes WAL_TRUNCATE_BYTES. A checkpoint blocked by a reader gives up after
+  CHECKPOINT_BUSY_MS and is retried at the next quiet moment.
+
+Database and WAL sizes are exported on /metrics and logged after each run.
+
+Run once: python maintenance.py
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import metrics
+from database import BUSY_TIMEOUT_MS, Database
+
+logger = logging.getLogger("github-tracker")
+
+MAINTENANCE_INTERVAL = 300  # seconds between archive and vacuum runs
+ACTIVITY_RETENTION_HOURS = 0  # How long raw activity rows stay in the database; 0 keeps them
+ARCHIVE_BATCH_SIZE = 2000  # Rows archived per write job
+VACUUM_MIN_FREE_PAGES = 256  # Free pages worth a vacuum step
+VACUUM_STEP_PAGES = 1000  # Pages released per write job
+CHECKPOINT_INTERVAL = 300  # seconds between WAL truncations
+QUIET_SECONDS = 2  # Writer idle time that counts as a quiet moment
+WAL_TRUNCATE_BYTES = 64 * 1024 * 1024  # Checkpoint without waiting for quiet past this WAL size
+CHECKPOINT_BUSY_MS = 2000  # How long a checkpoint waits on readers before giving up
+CHECK_INTERVAL = 1  # seconds between checks for a quiet moment
+
+# table -> (timestamp column, columns archived)
+ARCHIVED_TABLES = {
+    "events": ("created_at", ("id", "event_type", "entity_id", "data", "created_at")),
+    "activity_history": ("timestamp", ("id", "event_type", "team_name", "repo_name", "commit_count",
+                                       "total_commits", "timestamp")),
+}
+
+
+def _format_mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class DatabaseMaintenance:
+    """Retention, incremental vacuum and WAL checkpoints for one database."""
+
+    def __init__(self, db: Database, event_retention_hours: float,
+                 activity_retention_hours: float = ACTIVITY_RETENTION_HOURS,
+                 archive_dir: Optional[str] = None, interval: float = MAINTENANCE_INTERVAL):
+        self.db = db
+        self.event_retention_hours = event_retention_hours
+        self.activity_retention_hours = activity_retention_hours  # 0 keeps every activity row
+        self.archive_dir = archive_dir  # None deletes expired rows without exporting them
+        self.interval = interval
+        self._last_run = 0.0
+        self._last_checkpoint = time.monotonic()
+        self._stop = threading.Event()
+
+    # Retention
+
+    def _archive_file(self, table: str, day: str) -> str:
+        return os.path.join(self.archive_dir, f"{table}-{day}.ndjson.gz")
+
+    def _export(self, table: str, rows: List[Dict], timestamp_column: str):
+        """Append rows to the table's archive file for each row's day (each append is a new gzip member)."""
+        by_day: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_day.setdefault(str(row[timestamp_column])[:10], []).append(row)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for day, day_rows in by_day.items():
+            with gzip.open(self._archive_file(table, day), "at", encoding="utf-8") as f:
+                f.writelines(json.dumps(row) + "\n" for row in day_rows)
+
+    def _archive_batch(self, conn, table: str, cutoff: str) -> int:
+        """Writer job: export and delete the oldest batch of rows before cutoff. Returns the rows archived."""
+        timestamp_column, columns = ARCHIVED_TABLES[table]
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {', '.join(columns)} FROM {table}
+            WHERE {timestamp_column} < ?
+            ORDER BY id
+            LIMIT ?
+        """, (cutoff, ARCHIVE_BATCH_SIZE))
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not rows:
+            return 0
+        if self.archive_dir:
+            if table == "events":
+                for row in rows:
+                    row["data"] = json.loads(row["data"]) if row["data"] else None
+            # Written before the delete commits: a failed commit can only duplicate rows in the archive
+            self._export(table, rows, timestamp_column)
+        # The same cutoff in id order: exactly the rows just read
+        cursor.execute(f"DELETE FROM {table} WHERE {timestamp_column} < ? AND id <= ?", (cutoff, rows[-1]["id"]))
+        return cursor.rowcount
+
+    def archive(self, table: str, cutoff: str) -> int:
+        """Archive every row of table older than cutoff, a batch per write job. Returns the rows archived."""
+        total = 0
+        while True:
+            archived = self.db.write(lambda conn: self._archive_batch(conn, table, cutoff))
+            total += archived
+            if archived < ARCHIVE_BATCH_SIZE:
+                break
+        if total:
+            metrics.DB_ARCHIVED_ROWS.inc(total, table=table)
+        return total
+
+    def archive_expired(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Archive events and activity rows past their retention windows. Returns the rows archived per table."""
+        now = now or datetime.now()
+        archived = {"events": self.archive("events", (now - timedelta(hours=self.event_retention_hours)).isoformat())}
+        if self.activity_retention_hours > 0:
+            # Whole hours only, so no rollup bucket is left half-archived
+            cutoff = (now - timedelta(hours=self.activity_retention_hours)).replace(minute=0, second=0, microsecond=0)
+            archived["activity_history"] = self.archive("activity_history", cutoff.isoformat())
+        return archived
+
+    # Vacuum
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Convert a database created without auto_vacuum (one full VACUUM). Returns True if it converted."""
+        def convert(conn):
+            # Checked on the writer: read connections keep the mode they saw when they opened
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:  # INCREMENTAL
+                return False
+            sizes = self.db.file_sizes()
+            logger.info(f"Enabling incremental vacuum: rewriting the {_format_mb(sizes['db_bytes'])} database once")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+
+        return self.db.write(convert, transaction=False)
+
+    def _vacuum_step(self, conn) -> int:
+        """Writer job (outside a batch): release up to VACUUM_STEP_PAGES free pages. Returns how many were released."""
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free < VACUUM_MIN_FREE_PAGES:
+            return 0
+        # execute() would step the pragma once, releasing one page; executescript() runs it to the end
+        conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})")
+        return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def vacuum(self) -> int:
+        """Release free pages a step at a time. Returns the pages released."""
+        total = 0
+        while True:
+            released = self.db.write(self._vacuum_step, transaction=False)
+            total += released
+            if released < VACUUM_STEP_PAGES:
+                break
+        if total:
+            metrics.DB_VACUUMED_PAGES.inc(total)
+        return total
+
+    # WAL checkpoints
+
+    def _checkpoint(self, conn):
+        conn.execute(f"PRAGMA busy_timeout = {CHECKPOINT_BUSY_MS}")
+        try:
+            return conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+
+    def checkpoint(self) -> bool:
+        """Checkpoint the WAL and truncate it to zero bytes. Returns False if readers kept it busy."""
+        busy, _, _ = self.db.write(self._checkpoint, transaction=False)
+        self._last_checkpoint = time.monotonic()
+        metrics.DB_CHECKPOINTS.inc(outcome="busy" if busy else "truncated")
+        if busy:
+            logger.debug("WAL checkpoint blocked by readers, will retry")
+        return not busy
+
+    def checkpoint_due(self) -> bool:
+        """Time for a checkpoint: a quiet moment once CHECKPOINT_INTERVAL has passed, or an oversized WAL."""
+        wal_bytes = self.db.file_sizes()["wal_bytes"]
+        if wal_bytes >= WAL_TRUNCATE_BYTES:
+            return True
+        due = time.monotonic() - self._last_checkpoint >= CHECKPOINT_INTERVAL
+        return due and wal_bytes > 0 and self.db.idle_seconds() >= QUIET_SECONDS
+
+    # Scheduling
+
+    def run_once(self) -> Dict[str, int]:
+        """Archive, vacuum and checkpoint now. Returns what was done, with the resulting sizes."""
+        summary = dict(self.archive_expired())
+        summary["vacuumed_pages"] = self.vacuum()
+        self.checkpoint()
+        summary.update(self.db.file_sizes())
+        archived = sum(summary.get(table, 0) for table in ARCHIVED_TABLES)
+        logger.info(
+            f"Database maintenance: archived {archived} rows, released {summary['vacuumed_pages']} pages; "
+            f"database {_format_mb(summary['db_bytes'])}, WAL {_format_mb(summary['wal_bytes'])}"
+        )
+        return summary
+
+    def _run(self):
+        while not self._stop.wait(CHECK_INTERVAL):
+            try:
+                if time.monotonic() - self._last_run >= self.interval:
+                    self._last_run = time.monotonic()
+                    self.run_once()
+                elif self.checkpoint_due():
+                    self.checkpoint()
+            except Exception as e:
+                logger.error(f"Error in database maintenance: {str(e)}")
+
+    def start(self):
+        """Convert to incremental vacuum if needed, then maintain in a background thread."""
+        try:
+            self.enable_incremental_vacuum()
+        except Exception as e:
+            logger.error(f"Error enabling incremental vacuum: {str(e)}")
+        threading.Thread(target=self._run, daemon=True, name="db-maintenance").start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    from config import GITHUB_CONFIG
+    from github_commit_tracker import DB_PATH
+
+    db = Database(DB_PATH)
+    try:
+        maintenance = DatabaseMaintenance(db, GITHUB_CONFIG["event_retention_hours"],
+                                          GITHUB_CONFIG["activity_retention_hours"], GITHUB_CONFIG["archive_dir"])
+        maintenance.enable_incremental_vacuum()
+        print(json.dumps(maintenance.run_once(), indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Prometheus metrics for the tracker and the web app.
+Counters and histograms are dicts of numbers keyed by label values and
+updated under a lock, so recording a sample is a lookup and an add. Nothing
+is formatted until /metrics is scraped, and gauges that mirror existing state
+(rate limit, scheduler lag, writer queue) are callbacks evaluated only then.
+Each process has its own registry: the web app serves it on /metrics, and a
+process without a web server (the poller) can serve() it on a port of its own.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Default histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CYCLE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, List] = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        lines = self._header()
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A gauge read from a callback at scrape time; it costs nothing in between."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._function: Optional[Callable[[], Optional[float]]] = None
+
+    def set_function(self, function: Callable[[], Optional[float]]):
+        self._function = function
+
+    def render(self) -> List[str]:
+        value = self._function() if self._function is not None else None
+        if value is None:
+            return []
+        return self._header() + [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Poller
+REPO_FETCH_SECONDS = REGISTRY.register(Histogram(
+    'tracker_repo_fetch_seconds', 'Time to fetch one repository\'s commit count', ('repo',)))
+GITHUB_RESPONSES = REGISTRY.register(Counter(
+    'tracker_github_responses_total', 'Responses from GitHub by count source and HTTP status', ('source', 'status')))
+FETCH_ERRORS = REGISTRY.register(Counter(
+    'tracker_fetch_errors_total', 'Fetches that failed without an HTTP response', ('source',)))
+PARSE_FAILURES = REGISTRY.register(Counter(
+    'tracker_parse_failures_total', 'Responses the commit count could not be read from', ('source',)))
+SCRAPE_SELECTOR_MATCHES = REGISTRY.register(Counter(
+    'tracker_scrape_selector_matches_total', 'Scraped pages by the selector the commit count was read from',
+    ('selector',)))
+COMMITS_DETECTED = REGISTRY.register(Counter(
+    'tracker_commits_detected_total', 'New commits recorded'))
+CHECK_REPOSITORY_SECONDS = REGISTRY.register(Histogram(
+    'tracker_check_repository_seconds', 'Time to check one repository, fetch and write'))
+POLL_CYCLE_SECONDS = REGISTRY.register(Histogram(
+    'tracker_poll_cycle_seconds', 'Time to check every repository due in a poll cycle', buckets=CYCLE_BUCKETS))
+REPOS_CHECKED = REGISTRY.register(Counter(
+    'tracker_repos_checked_total', 'Repositories checked by the poller'))
+CONDITIONAL_REQUESTS = REGISTRY.register(Counter(
+    'tracker_conditional_requests_total', 'Conditional GitHub requests by result (hit: 304, miss: full response)',
+    ('result',)))
+HTTP_RETRIES = REGISTRY.register(Counter(
+    'tracker_http_retries_total', 'GitHub requests retried after a 429/5xx or connection error'))
+PARKED_REPOS = REGISTRY.register(Gauge(
+    'tracker_parked_repos', 'Repositories parked by the circuit breaker'))
+SCHEDULER_LAG = REGISTRY.register(Gauge(
+    'tracker_scheduler_lag_seconds', 'How overdue the most overdue repository is'))
+SCHEDULER_REPOS = REGISTRY.register(Gauge(
+    'tracker_scheduler_repos', 'Repositories in the poll schedule'))
+LEASED_REPOS = REGISTRY.register(Gauge(
+    'tracker_leased_repos', 'Repositories this poller instance holds leases on (sharded polling)'))
+RATE_LIMIT_REMAINING = REGISTRY.register(Gauge(
+    'tracker_rate_limit_remaining', 'GitHub API calls left in the current window'))
+RATE_LIMIT_RESET = REGISTRY.register(Gauge(
+    'tracker_rate_limit_reset_timestamp_seconds', 'Unix time the GitHub rate-limit window resets'))
+
+# Database
+DB_TRANSACTION_SECONDS = REGISTRY.register(Histogram(
+    'tracker_db_transaction_seconds', 'Time to apply and commit one batch of writes'))
+DB_WRITE_BATCH_SIZE = REGISTRY.register(Histogram(
+    'tracker_db_write_batch_size', 'Writes applied per transaction', buckets=(1, 2, 5, 10, 25, 50, 100, 200)))
+DB_WRITE_QUEUE_SECONDS = REGISTRY.register(Histogram(
+    'tracker_db_write_queue_seconds', 'Time a write waits for the writer thread'))
+DB_READ_SECONDS = REGISTRY.register(Histogram(
+    'tracker_db_read_seconds', 'Time a pooled read connection is held (the queries run on it)'))
+DB_WRITE_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'tracker_db_write_queue_depth', 'Writes waiting for the writer thread'))
+DB_SIZE_BYTES = REGISTRY.register(Gauge(
+    'tracker_db_size_bytes', 'Size of the database file'))
+DB_WAL_SIZE_BYTES = REGISTRY.register(Gauge(
+    'tracker_db_wal_size_bytes', 'Size of the database\'s write-ahead log'))
+DB_ARCHIVED_ROWS = REGISTRY.register(Counter(
+    'tracker_db_archived_rows_total', 'Rows moved out of the database by retention', ('table',)))
+DB_VACUUMED_PAGES = REGISTRY.register(Counter(
+    'tracker_db_vacuumed_pages_total', 'Free pages returned to the filesystem by incremental vacuum'))
+DB_CHECKPOINTS = REGISTRY.register(Counter(
+    'tracker_db_checkpoints_total', 'WAL checkpoints by outcome (truncated, or busy with readers)', ('outcome',)))
+
+# Web
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'tracker_http_request_seconds', 'Flask request latency by route', ('route', 'method')))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'tracker_http_requests_total', 'Flask requests by route and status', ('route', 'method', 'status')))
+WEBHOOK_DELIVERIES = REGISTRY.register(Counter(
+    'tracker_webhook_deliveries_total', 'GitHub webhook deliveries by outcome', ('outcome',)))
+STREAM_CLIENTS = REGISTRY.register(Gauge(
+    'tracker_stream_clients', 'Open /api/stream connections in this web worker'))
+STREAMS_REJECTED = REGISTRY.register(Counter(
+    'tracker_streams_rejected_total', '/api/stream connections turned away at the per-worker cap'))
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve this process's metrics at http://host:port/metrics from a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+    return server
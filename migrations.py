@@ -0,0 +1,242 @@
+"""
+Versioned schema migrations for the tracker database.
+The schema version lives in PRAGMA user_version. migrate() runs every
+migration newer than the stored version, in order, inside the caller's
+transaction, so an existing hackathon_tracker.db is upgraded in place
+without losing data. To change the schema, append a new migration; never
+edit one that has already shipped.
+"""
+
+import logging
+import sqlite3
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger("github-tracker")
+
+
+def _baseline_schema(cursor: sqlite3.Cursor):
+    """The original tables. IF NOT EXISTS lets pre-migration databases adopt version 1 as-is."""
+    # Create teams table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_name TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create repositories table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS repositories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INTEGER NOT NULL,
+            repo_url TEXT UNIQUE NOT NULL,
+            repo_name TEXT NOT NULL,
+            last_checked TIMESTAMP,
+            total_commits INTEGER DEFAULT 0,
+            FOREIGN KEY (team_id) REFERENCES teams (id)
+        )
+    ''')
+
+    # Create commits table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS commits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            repo_id INTEGER NOT NULL,
+            commit_hash TEXT NOT NULL,
+            author TEXT,
+            message TEXT,
+            timestamp TIMESTAMP,
+            detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (repo_id) REFERENCES repositories (id)
+        )
+    ''')
+
+    # Create events table for future web notifications
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            data TEXT,
+            processed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create activity_history table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS activity_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            team_name TEXT NOT NULL,
+            repo_name TEXT NOT NULL,
+            commit_count INTEGER,
+            total_commits INTEGER,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _http_cache_table(cursor: sqlite3.Cursor):
+    """Validator cache for conditional requests."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS http_cache (
+            repo_url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            updated_at TIMESTAMP
+        )
+    ''')
+
+
+def _hot_path_indexes(cursor: sqlite3.Cursor):
+    """Indexes for the queries that otherwise scan whole tables as they grow."""
+    # Team totals / leaderboard: LEFT JOIN repositories ON team_id, covering SUM/MAX
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_repositories_team
+        ON repositories (team_id, total_commits, last_checked)
+    ''')
+
+    # Recent activity: ORDER BY timestamp DESC LIMIT ?
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_activity_history_timestamp
+        ON activity_history (timestamp)
+    ''')
+
+    # Event retention: DELETE FROM events WHERE created_at < ?
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_created_at
+        ON events (created_at)
+    ''')
+
+    cursor.execute("ANALYZE")
+
+
+def _commit_ingestion(cursor: sqlite3.Cursor):
+    """Unique commits per repo, the last ingested SHA, and indexes for commit aggregates."""
+    cursor.execute("ALTER TABLE repositories ADD COLUMN last_commit_sha TEXT")
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_commits_repo_hash
+        ON commits (repo_id, commit_hash)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_commits_repo_timestamp
+        ON commits (repo_id, timestamp)
+    ''')
+
+
+def _webhook_delivery(cursor: sqlite3.Cursor):
+    """When each repository last delivered a push webhook."""
+    cursor.execute("ALTER TABLE repositories ADD COLUMN last_webhook_at TIMESTAMP")
+
+
+def _activity_rollups(cursor: sqlite3.Cursor):
+    """Per-team, per-minute and per-hour commit rollups, backfilled from activity_history."""
+    for table, bucket_format in (("activity_rollup_minute", "%Y-%m-%dT%H:%M:00"),
+                                 ("activity_rollup_hour", "%Y-%m-%dT%H:00:00")):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                team_name TEXT NOT NULL,
+                bucket_start TEXT NOT NULL,
+                commits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (team_name, bucket_start)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (bucket_start)")
+        cursor.execute(f'''
+            INSERT INTO {table} (team_name, bucket_start, commits)
+            SELECT team_name, strftime('{bucket_format}', timestamp), SUM(commit_count)
+            FROM activity_history
+            WHERE event_type = 'new_commits' AND commit_count > 0
+            GROUP BY 1, 2
+        ''')
+
+
+def _poller_leases(cursor: sqlite3.Cursor):
+    """Live poller instances and which instance polls each repository, for sharded polling."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS poller_instances (
+            instance_id TEXT PRIMARY KEY,
+            heartbeat_at REAL NOT NULL,
+            started_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS repo_leases (
+            repo_id INTEGER PRIMARY KEY,
+            instance_id TEXT,
+            released_at REAL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_repo_leases_instance ON repo_leases (instance_id)")
+
+
+def _push_chain(cursor: sqlite3.Cursor):
+    """The head SHA after the last push webhook applied to each repository, to drop redeliveries."""
+    cursor.execute("ALTER TABLE repositories ADD COLUMN last_push_sha TEXT")
+
+
+def _recheck_requests(cursor: sqlite3.Cursor):
+    """Re-checks requested by webhooks in the web tier, for the poller process to pick up."""
+    cursor.execute("ALTER TABLE repositories ADD COLUMN recheck_requested_at REAL")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_repositories_recheck
+        ON repositories (recheck_requested_at) WHERE recheck_requested_at IS NOT NULL
+    ''')
+
+
+def _ingest_backfill(cursor: sqlite3.Cursor):
+    """Where an ingestion cut off by the page cap resumes, and the SHA it stops at (NULL: the root)."""
+    cursor.execute("ALTER TABLE repositories ADD COLUMN backfill_sha TEXT")
+    cursor.execute("ALTER TABLE repositories ADD COLUMN backfill_until TEXT")
+
+
+def _announced_high_water(cursor: sqlite3.Cursor):
+    """The highest commit total announced for each repository, so corrected totals aren't announced twice."""
+    cursor.execute("ALTER TABLE repositories ADD COLUMN announced_commits INTEGER")
+    cursor.execute("UPDATE repositories SET announced_commits = total_commits")
+
+
+# (version, description, migration) - append only
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "baseline schema", _baseline_schema),
+    (2, "http_cache table", _http_cache_table),
+    (3, "hot path indexes", _hot_path_indexes),
+    (4, "commit ingestion", _commit_ingestion),
+    (5, "webhook delivery time", _webhook_delivery),
+    (6, "activity rollups", _activity_rollups),
+    (7, "poller leases", _poller_leases),
+    (8, "push webhook chain", _push_chain),
+    (9, "recheck requests", _recheck_requests),
+    (10, "ingestion backfill cursor", _ingest_backfill),
+    (11, "announced commit high-water mark", _announced_high_water),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int = LATEST_VERSION) -> int:
+    """
+    Apply every migration newer than the database's version, up to target.
+    Must run inside a transaction (user_version is transactional, so a failed
+    migration leaves the version untouched). Returns the resulting version.
+    """
+    current = get_schema_version(conn)
+    if current > LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this code supports ({LATEST_VERSION})"
+        )
+
+    cursor = conn.cursor()
+    for version, description, migration in MIGRATIONS:
+        if current < version <= target:
+            logger.info(f"Applying database migration {version}: {description}")
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            current = version
+    return current
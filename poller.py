@@ -0,0 +1,96 @@
+"""
+Dedicated poller process for production serving.
+Registers the teams from teams.csv, keeps watching the file for edits, and
+runs the polling loop; the web workers (wsgi.py) only read the shared
+database. Only one poller is ever active: it holds the poller lock, and any
+other copy started against the same database waits as a standby and takes
+over if the active one exits.
+
+With POLLER_INSTANCE_ID set, pollers are sharded instead: every instance is
+active and polls the repositories it holds leases on (leases.py), so several
+pollers, each with its own GITHUB_TOKEN, split the load.
+
+With PROFILE_SAMPLE_RATE set, the poller's slowest traces are written every
+PROFILE_DUMP_INTERVAL seconds for /api/admin/profiling?process= to serve.
+
+The web workers' /metrics only covers the web tier, so the poller serves its
+own metrics (fetch latency, poll cycles, rate limit, scheduler lag) at
+http://<host>:POLLER_METRICS_PORT/metrics.
+
+Run: python poller.py (or let serve.py start it)
+"""
+
+import logging
+import signal
+import threading
+
+import metrics
+from config import GITHUB_CONFIG, PROFILING_CONFIG, SERVE_CONFIG
+from github_commit_tracker import DB_PATH
+from leader import PollerLock
+from profiling import PROFILER
+
+logger = logging.getLogger("github-tracker")
+
+POLLER_LOCK_PATH = DB_PATH + ".poller-lock"
+
+
+def main():
+    lock = PollerLock(POLLER_LOCK_PATH)
+    if GITHUB_CONFIG["instance_id"]:
+        logger.info(f"Sharded poller {GITHUB_CONFIG['instance_id']}")
+    else:
+        lock.acquire()
+
+    # Only the active poller builds a tracker, so a standby holds no DB connections
+    from app import tracker, setup_tracker, teams_watcher, PROFILE_DUMP_PREFIX
+
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        stopping.set()
+        tracker.running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    # No web server here: write profiles where the web tier can serve them
+    profile_prefix = PROFILE_DUMP_PREFIX + (GITHUB_CONFIG["instance_id"] or "poller")
+    
+    def dump_profiles():
+        while not stopping.wait(PROFILING_CONFIG["dump_interval"]):
+            if PROFILER.sample_rate > 0:
+                try:
+                    PROFILER.dump(profile_prefix)
+                except OSError as e:
+                    logger.error(f"Error writing profile dump: {str(e)}")
+    
+    threading.Thread(target=dump_profiles, daemon=True, name="profile-dump").start()
+    
+    metrics_server = None
+    if SERVE_CONFIG["poller_metrics_port"]:
+        try:
+            metrics_server = metrics.serve(SERVE_CONFIG["poller_metrics_port"])
+            logger.info(f"Poller metrics on port {SERVE_CONFIG['poller_metrics_port']}")
+        except OSError as e:
+            logger.error(f"Could not serve poller metrics on port {SERVE_CONFIG['poller_metrics_port']}: {str(e)}")
+
+    try:
+        setup_tracker()
+        if not stopping.is_set():
+            logger.info("Poller started")
+            tracker.run_polling_loop()
+    finally:
+        if PROFILER.sample_rate > 0:
+            PROFILER.dump(profile_prefix)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        teams_watcher.stop()
+        tracker.stop()
+        tracker.close()
+        lock.release()
+        logger.info("Poller stopped")
+
+
+if __name__ == '__main__':
+    main()
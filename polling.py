@@ -0,0 +1,96 @@
+"""
+Concurrent fetching helpers for the GitHub tracker.
+Runs blocking fetches on a bounded worker pool with a per-host cap, so one
+poll cycle takes roughly as long as the slowest batch rather than the sum
+of every repository's latency. A fetch takes its host slot before it is
+queued, so no worker ever sits waiting for one.
+"""
+
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger("github-tracker")
+
+# Defaults
+DEFAULT_MAX_WORKERS = 16  # Global cap on in-flight fetches
+DEFAULT_PER_HOST_LIMIT = 8  # Cap on in-flight fetches to any single host
+
+
+class HostLimiter:
+    """Limit the number of concurrent requests made to each host."""
+
+    def __init__(self, per_host_limit: int = DEFAULT_PER_HOST_LIMIT):
+        self.per_host_limit = max(1, per_host_limit)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore_for(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    def acquire(self, url: str) -> threading.BoundedSemaphore:
+        """Wait for a free slot for the URL's host and take it. Release it on the returned semaphore."""
+        semaphore = self._semaphore_for(url)
+        semaphore.acquire()
+        return semaphore
+
+    @staticmethod
+    def interleave(urls: List[str]) -> List[int]:
+        """Indexes of urls taking each host in turn, so waiting on one busy host doesn't hold up the others."""
+        by_host: Dict[str, List[int]] = {}
+        for index, url in enumerate(urls):
+            by_host.setdefault(urlparse(url).netloc.lower(), []).append(index)
+        queues = list(by_host.values())
+        order = []
+        for position in range(max(map(len, queues), default=0)):
+            order.extend(queue[position] for queue in queues if position < len(queue))
+        return order
+
+
+class ConcurrentFetcher:
+    """Run a blocking fetch function over many URLs on a bounded worker pool."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT):
+        self.max_workers = max(1, max_workers)
+        self.host_limiter = HostLimiter(per_host_limit)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="repo-fetch"
+        )
+
+    def fetch_all(self, urls: List[str], fetch: Callable[[str], Any], default: Any = None) -> List[Any]:
+        """
+        Fetch every URL concurrently and return the results in input order.
+        A fetch that raises yields `default` so one bad repo can't sink the cycle.
+        """
+        futures = [None] * len(urls)
+        for index in self.host_limiter.interleave(urls):
+            # Wait for the host slot here rather than on a worker, which would idle it
+            slot = self.host_limiter.acquire(urls[index])
+            try:
+                futures[index] = self._executor.submit(fetch, urls[index])
+            except BaseException:
+                slot.release()
+                raise
+            futures[index].add_done_callback(lambda _, slot=slot: slot.release())
+        results = []
+        for url, future in zip(urls, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Error fetching {url}: {str(e)}")
+                results.append(default)
+        return results
+
+    def shutdown(self):
+        """Stop the worker pool, waiting for in-flight fetches to finish."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,219 @@
+"""
+Opt-in sampling profiler for poll cycles, repository checks and web requests.
+Off by default. With a sample rate above 0, that fraction of traced
+operations is profiled. While a profiled operation runs, a background
+thread samples its thread's stack every interval with sys._current_frames(),
+so the profiled code itself runs untouched. The time it spends in each
+phase (fetch, parse, db, serialize) is timed by phase() blocks placed in the
+code, and each phase's time excludes the phases nested inside it.
+
+The slowest traces are kept per process and can be read as summaries or as
+collapsed stacks ("frame;frame;frame count" lines) for flamegraph.pl or
+speedscope. A process without a web server (the poller) dump()s them to
+files instead. Operations that aren't sampled cost one random() call, and a
+phase() outside a profiled operation costs one thread-local lookup.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_INTERVAL = 0.005  # seconds between stack samples
+DEFAULT_KEEP = 20  # Slowest traces kept
+MAX_STACK_DEPTH = 64  # Frames kept per sample, counted from the innermost frame
+
+
+class Trace:
+    """One profiled operation: its phase times and stack samples."""
+
+    def __init__(self, trace_id: int, kind: str, name: str):
+        self.id = trace_id
+        self.kind = kind  # "poll_cycle", "repository" or "request"
+        self.name = name
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.phases: Dict[str, float] = {}
+        self.samples: Counter = Counter()  # collapsed stack -> samples
+        self._phase_stack: List[List] = []  # [phase, time it last (re)started] for the open phases
+
+    def summary(self) -> Dict:
+        phases = {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()}
+        phases["other"] = round(max(0.0, self.duration - sum(self.phases.values())) * 1000, 2)
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2),
+            "phases_ms": phases,
+            "samples": sum(self.samples.values()),
+        }
+
+
+def _collapse(frame) -> str:
+    """A stack as "outermost;...;innermost" frames of "file:function"."""
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class Profiler:
+    """Samples a fraction of operations and keeps the slowest traces."""
+
+    def __init__(self, sample_rate: float = 0.0, interval: float = DEFAULT_INTERVAL, keep: int = DEFAULT_KEEP):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.keep = keep
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._active: Dict[int, Trace] = {}  # trace ID -> trace being sampled
+        self._slowest: List = []  # min-heap of (duration, id, trace)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def configure(self, sample_rate: Optional[float] = None, interval: Optional[float] = None,
+                  keep: Optional[int] = None):
+        """Change settings at runtime; a sample rate of 0 turns profiling off."""
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        if interval is not None:
+            self.interval = max(interval, 0.001)
+        if keep is not None:
+            self.keep = max(keep, 1)
+            with self._lock:
+                while len(self._slowest) > self.keep:
+                    heapq.heappop(self._slowest)
+
+    # Tracing
+
+    def begin(self, kind: str, name: str) -> Optional[Trace]:
+        """Start a trace on this thread if the operation is sampled (and none is running here)."""
+        if self.sample_rate <= 0 or getattr(self._local, "trace", None) is not None:
+            return None
+        if random.random() >= self.sample_rate:
+            return None
+        trace = Trace(next(self._ids), kind, name)
+        self._local.trace = trace
+        with self._lock:
+            self._active[trace.id] = trace
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, daemon=True, name="profiler")
+                self._sampler.start()
+        self._wake.set()
+        return trace
+
+    def end(self, trace: Optional[Trace]):
+        """Finish a trace from begin() and keep it if it's among the slowest."""
+        if trace is None:
+            return
+        trace.duration = time.perf_counter() - trace.start
+        self._local.trace = None
+        with self._lock:
+            self._active.pop(trace.id, None)
+            heapq.heappush(self._slowest, (trace.duration, trace.id, trace))
+            if len(self._slowest) > self.keep:
+                heapq.heappop(self._slowest)
+
+    @contextmanager
+    def trace(self, kind: str, name: str) -> Iterator[Optional[Trace]]:
+        """begin() and end() around a block."""
+        trace = self.begin(kind, name)
+        try:
+            yield trace
+        finally:
+            self.end(trace)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block as one phase of the trace running on this thread, if any."""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            yield
+            return
+        stack = trace._phase_stack
+        now = time.perf_counter()
+        if stack:
+            # Pause the enclosing phase so each phase's time is its own
+            outer = stack[-1]
+            trace.phases[outer[0]] = trace.phases.get(outer[0], 0.0) + now - outer[1]
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            phase, started = stack.pop()
+            trace.phases[phase] = trace.phases.get(phase, 0.0) + now - started
+            if stack:
+                stack[-1][1] = now
+
+    def _sample(self):
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wake.clear()  # Under the lock, so a begin() can't slip in unseen
+            if not active:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            stacks = [(trace, _collapse(frames[trace.thread_id])) for trace in active if trace.thread_id in frames]
+            del frames
+            with self._lock:
+                for trace, stack in stacks:
+                    if trace.id in self._active:  # Finished traces are read without the lock
+                        trace.samples[stack] += 1
+            time.sleep(self.interval)
+
+    # Results
+
+    def traces(self) -> List[Trace]:
+        """The kept traces, slowest first."""
+        with self._lock:
+            return [trace for _, _, trace in sorted(self._slowest, reverse=True)]
+
+    def collapsed(self, trace_id: Optional[int] = None, kind: Optional[str] = None) -> str:
+        """
+        Collapsed stacks of the kept traces (or one trace, or one kind), each
+        rooted at a "kind:name" frame so a flamegraph groups them by operation.
+        """
+        stacks: Counter = Counter()
+        for trace in self.traces():
+            if (trace_id is not None and trace.id != trace_id) or (kind is not None and trace.kind != kind):
+                continue
+            root = f"{trace.kind}:{trace.name}".replace(";", ",")
+            for stack, count in trace.samples.items():
+                stacks[f"{root};{stack}"] += count
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def dump(self, prefix: str):
+        """Write status() to prefix.json and collapsed() to prefix.folded, each replaced atomically."""
+        for suffix, content in ((".json", json.dumps(self.status(), indent=2)), (".folded", self.collapsed())):
+            tmp_path = f"{prefix}{suffix}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(content)
+            os.replace(tmp_path, prefix + suffix)
+
+    def status(self) -> Dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "keep": self.keep,
+            "traces": [trace.summary() for trace in self.traces()],
+        }
+
+
+PROFILER = Profiler()  # Shared by the tracker and the web app; configured from PROFILING_CONFIG in app.py
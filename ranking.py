@@ -0,0 +1,292 @@
+"""
+Incremental ranking index for the leaderboard.
+Teams are kept in an indexable skip list ordered by
+(most commits, earliest to reach that count, team name), so a team's total
+changing is an O(log n) remove + insert, and rank lookups, top-K and
+"around this team" queries are O(log n + k). Rank changes are recorded per
+team so the leaderboard can show who moved up or down over the last N minutes.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Defaults
+RANK_HISTORY_MINUTES = 60  # How far back rank deltas can be asked for
+MAX_LEVELS = 16  # Skip list height; comfortably covers tens of thousands of teams
+
+
+class _Largest:
+    """Sentinel key that sorts after every real key."""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+    def __ge__(self, other):
+        return True
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkipList:
+    """
+    Sorted list of unique keys with O(log n) insert, remove, index lookup and
+    positional access. Each link stores how many bottom-level steps it skips.
+    """
+
+    def __init__(self, max_levels: int = MAX_LEVELS):
+        self.max_levels = max_levels
+        self.size = 0
+        tail = _Node(_Largest(), 0)
+        self.head = _Node(None, max_levels)
+        self.head.next = [tail] * max_levels
+
+    def __len__(self):
+        return self.size
+
+    def _random_level(self) -> int:
+        return min(self.max_levels, 1 - int(math.log(1.0 - random.random(), 2.0)))
+
+    def insert(self, key):
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self.head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_level()
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.max_levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * self.max_levels
+        node = self.head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if isinstance(target.key, _Largest) or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.max_levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def index(self, key) -> int:
+        """Return the 0-based position of key."""
+        node = self.head
+        position = 0
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        candidate = node.next[0]
+        if isinstance(candidate.key, _Largest) or candidate.key != key:
+            raise KeyError(key)
+        return position
+
+    def __getitem__(self, i: int):
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        node = self.head
+        remaining = i + 1
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.key
+
+    def slice(self, start: int, stop: int) -> List:
+        """Return keys[start:stop], walking the bottom level after one O(log n) seek."""
+        start = max(0, start)
+        stop = min(self.size, stop)
+        if start >= stop:
+            return []
+        node = self.head
+        remaining = start + 1
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class RankingIndex:
+    """
+    Leaderboard ranking that updates incrementally as team totals change.
+    Ties are broken by who reached the count first, then by team name.
+    """
+
+    def __init__(self, history_minutes: float = RANK_HISTORY_MINUTES):
+        self.history_seconds = history_minutes * 60
+        self._list = IndexableSkipList()
+        self._keys: Dict[str, Tuple] = {}  # team_name -> current key
+        self._rank_history: Dict[str, deque] = {}  # team_name -> deque of (time, rank)
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(team_name: str, total: int, reached_at: str) -> Tuple:
+        return (-total, reached_at, team_name)
+
+    def load(self, rows: List[Dict]):
+        """Replace the index with rows of team_name, total_commits and reached_at."""
+        with self._lock:
+            self._list = IndexableSkipList()
+            self._keys = {}
+            self._rank_history = {}
+            for row in rows:
+                key = self._key(row['team_name'], row['total_commits'] or 0, row['reached_at'] or '')
+                self._keys[row['team_name']] = key
+                self._list.insert(key)
+            now = time.time()
+            for rank, key in enumerate(self._list.slice(0, len(self._list)), start=1):
+                self._rank_history[key[2]] = deque([(now, rank)])
+
+    def sync(self, rows: List[Dict]):
+        """
+        Bring the index in line with rows of team_name, total_commits and
+        reached_at, updating only the teams that changed so rank history is kept.
+        """
+        with self._lock:
+            seen = set()
+            for row in rows:
+                seen.add(row['team_name'])
+                self.update(row['team_name'], row['total_commits'] or 0, row['reached_at'] or '')
+            for team_name in set(self._keys) - seen:
+                self.remove(team_name)
+
+    def _record_ranks(self, start: int, stop: int, now: float):
+        """Record the current rank of every team in positions [start, stop)."""
+        for offset, key in enumerate(self._list.slice(start, stop)):
+            history = self._rank_history.setdefault(key[2], deque())
+            rank = start + offset + 1
+            if not history or history[-1][1] != rank:
+                history.append((now, rank))
+            # Keep one entry older than the window as the baseline
+            while len(history) > 1 and history[1][0] <= now - self.history_seconds:
+                history.popleft()
+
+    def update(self, team_name: str, total: int, reached_at: str):
+        """Set a team's total. Only the teams whose rank moved get history entries."""
+        with self._lock:
+            now = time.time()
+            old_key = self._keys.get(team_name)
+            new_key = self._key(team_name, total, reached_at)
+            if old_key == new_key:
+                return
+            if old_key is not None:
+                old_position = self._list.index(old_key)
+                self._list.remove(old_key)
+            else:
+                old_position = len(self._list)
+            self._list.insert(new_key)
+            self._keys[team_name] = new_key
+
+            new_position = self._list.index(new_key)
+            low, high = sorted((old_position, new_position))
+            self._record_ranks(low, min(high + 1, len(self._list)), now)
+
+    def add_commits(self, team_name: str, new_commits: int, reached_at: str):
+        """Add new commits to a team's total."""
+        with self._lock:
+            key = self._keys.get(team_name)
+            current = -key[0] if key else 0
+            self.update(team_name, current + new_commits, reached_at)
+
+    def remove(self, team_name: str):
+        with self._lock:
+            key = self._keys.pop(team_name, None)
+            if key is None:
+                return
+            position = self._list.index(key)
+            self._list.remove(key)
+            self._rank_history.pop(team_name, None)
+            self._record_ranks(position, len(self._list), time.time())
+
+    def _rank_change(self, team_name: str, rank: int, since: float) -> int:
+        """Positive when the team has moved up since the given time."""
+        history = self._rank_history.get(team_name)
+        if not history:
+            return 0
+        previous = history[0][1]
+        for timestamp, past_rank in history:
+            if timestamp > since:
+                break
+            previous = past_rank
+        return previous - rank
+
+    def _entries(self, start: int, stop: int, since_minutes: float) -> List[Dict]:
+        start = max(0, start)
+        since = time.time() - since_minutes * 60
+        entries = []
+        for offset, key in enumerate(self._list.slice(start, stop)):
+            rank = start + offset + 1
+            entries.append({
+                "rank": rank,
+                "team_name": key[2],
+                "total_commits": -key[0],
+                "rank_change": self._rank_change(key[2], rank, since),
+            })
+        return entries
+
+    def top(self, k: int, since_minutes: float = 10) -> List[Dict]:
+        """Return the top k teams with their rank change over the last since_minutes."""
+        with self._lock:
+            return self._entries(0, k, since_minutes)
+
+    def around(self, team_name: str, radius: int, since_minutes: float = 10) -> List[Dict]:
+        """Return the team plus up to radius teams either side of it."""
+        with self._lock:
+            key = self._keys.get(team_name)
+            if key is None:
+                return []
+            position = self._list.index(key)
+            return self._entries(position - radius, position + radius + 1, since_minutes)
+
+    def rank(self, team_name: str) -> Optional[int]:
+        """Return a team's 1-based rank."""
+        with self._lock:
+            key = self._keys.get(team_name)
+            return self._list.index(key) + 1 if key is not None else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._list)
@@ -0,0 +1,74 @@
+"""
+Versioned read model for the JSON API.
+Each registered view is built once per data version and kept as serialized
+response bytes with a strong ETag. Serving a request is a version check and a
+dict lookup; the SQL and JSON encoding only run again after the tracker
+writes something new. Compressed bodies are cached on the snapshot too, so
+each version is compressed at most once per encoding.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from compression import compress
+from profiling import PROFILER
+
+
+class Snapshot:
+    """Serialized response body for one version of a view."""
+
+    def __init__(self, version: Hashable, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body compressed with a Content-Encoding, compressed on first use."""
+        body = self._encoded.get(encoding)
+        if body is None:
+            # Two requests racing here both compress; either result is correct
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+
+class ReadModel:
+    """Cache of serialized API responses, rebuilt when the data version changes."""
+
+    def __init__(self):
+        self._views: Dict[str, Dict[str, Callable]] = {}
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, builder: Callable[[], Any], version: Callable[[], Hashable]):
+        """Register a view: builder() returns the JSON-able data, version() its current version."""
+        self._views[name] = {"builder": builder, "version": version}
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Snapshot:
+        """Return the snapshot for a view, rebuilding it if the data has changed."""
+        view = self._views[name]
+        version = view["version"]()
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        # One rebuild per view at a time; other requests wait and reuse it
+        with self._locks[name]:
+            snapshot = self._snapshots.get(name)
+            if snapshot is None or snapshot.version != version:
+                data = view["builder"]()
+                with PROFILER.phase("serialize"):
+                    body = json.dumps(data, separators=(',', ':'), sort_keys=True).encode()
+                snapshot = Snapshot(version, body)
+                self._snapshots[name] = snapshot
+            return snapshot
+
+    def invalidate(self, name: str = None):
+        """Drop one cached view, or all of them."""
+        if name is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(name, None)
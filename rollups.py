@@ -0,0 +1,118 @@
+"""
+Pre-aggregated commit time series.
+Every activity row is also added to per-team, per-minute and per-hour rollup
+tables in the same transaction, so a timeline query reads one row per bucket
+per team instead of scanning activity_history. Buckets are keyed by their
+start time in the same local-time ISO format as activity_history.timestamp,
+and the rollups can be rebuilt from activity_history at any time. Retention
+(maintenance.py) archives activity rows in whole hours and leaves their
+buckets here, so the timeline outlives the raw rows.
+
+Rebuild: python rollups.py
+"""
+
+import sqlite3
+from typing import Dict, List, Optional
+
+# bucket name -> (rollup table, strftime format of the bucket start), finest first
+BUCKETS = {
+    "minute": ("activity_rollup_minute", "%Y-%m-%dT%H:%M:00"),
+    "hour": ("activity_rollup_hour", "%Y-%m-%dT%H:00:00"),
+}
+MAX_TIMELINE_POINTS = 5000  # Cap on points one timeline query returns (coarser buckets are tried first)
+
+
+def record_activity(cursor: sqlite3.Cursor, team_name: str, commit_count: int, timestamp: str):
+    """Add commits to the team's buckets (call in the transaction that writes the activity row)."""
+    for table, bucket_format in BUCKETS.values():
+        cursor.execute(f"""
+            INSERT INTO {table} (team_name, bucket_start, commits)
+            VALUES (?, strftime('{bucket_format}', ?), ?)
+            ON CONFLICT (team_name, bucket_start) DO UPDATE SET commits = commits + excluded.commits
+        """, (team_name, timestamp, commit_count))
+
+
+def rebuild(cursor: sqlite3.Cursor) -> Dict[str, int]:
+    """
+    Recompute the rollups from activity_history. Returns the number of buckets
+    rebuilt per table. Buckets before the hour of the oldest activity row are
+    kept, as their rows may have been archived.
+    """
+    cursor.execute(f"SELECT strftime('{BUCKETS['hour'][1]}', MIN(timestamp)) FROM activity_history")
+    kept_before = cursor.fetchone()[0]
+    counts = {}
+    for bucket, (table, bucket_format) in BUCKETS.items():
+        if kept_before is None:
+            counts[bucket] = 0  # No raw rows left to rebuild from
+            continue
+        cursor.execute(f"DELETE FROM {table} WHERE bucket_start >= ?", (kept_before,))
+        cursor.execute(f"""
+            INSERT INTO {table} (team_name, bucket_start, commits)
+            SELECT team_name, strftime('{bucket_format}', timestamp), SUM(commit_count)
+            FROM activity_history
+            WHERE event_type = 'new_commits' AND commit_count > 0
+            GROUP BY 1, 2
+        """)
+        counts[bucket] = cursor.rowcount
+    return counts
+
+
+def timeline(conn: sqlite3.Connection, bucket: str, start: str, end: str,
+             team_name: Optional[str] = None, limit: int = MAX_TIMELINE_POINTS) -> Dict:
+    """
+    Commits per bucket in [start, end), oldest first, as {"bucket", "points",
+    "truncated"}. Buckets without commits are omitted. If the range has more
+    than limit buckets with commits, the next coarser bucket is used instead;
+    if even the coarsest doesn't fit, the oldest limit points are returned
+    with truncated set, and the caller can page on from the last bucket_start.
+    """
+    buckets = list(BUCKETS)
+    for coarser in buckets[buckets.index(bucket):]:
+        points = _timeline_points(conn, coarser, start, end, team_name, limit + 1)
+        if len(points) <= limit:
+            return {"bucket": coarser, "points": points, "truncated": False}
+    return {"bucket": coarser, "points": points[:limit], "truncated": True}
+
+
+def _timeline_points(conn: sqlite3.Connection, bucket: str, start: str, end: str,
+                     team_name: Optional[str], limit: int) -> List[Dict]:
+    """
+    At most limit buckets of one size. For one team this is a range scan of
+    its primary key; for all teams, of the bucket_start index, summed per bucket.
+    """
+    table, _ = BUCKETS[bucket]
+    cursor = conn.cursor()
+    if team_name is not None:
+        cursor.execute(f"""
+            SELECT bucket_start, commits
+            FROM {table}
+            WHERE team_name = ? AND bucket_start >= ? AND bucket_start < ?
+            ORDER BY bucket_start
+            LIMIT ?
+        """, (team_name, start, end, limit))
+    else:
+        cursor.execute(f"""
+            SELECT bucket_start, SUM(commits) as commits
+            FROM {table}
+            WHERE bucket_start >= ? AND bucket_start < ?
+            GROUP BY bucket_start
+            ORDER BY bucket_start
+            LIMIT ?
+        """, (start, end, limit))
+    return [{"bucket_start": bucket_start, "commits": commits} for bucket_start, commits in cursor.fetchall()]
+
+
+def main():
+    from github_commit_tracker import DB_PATH
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    counts = rebuild(conn.cursor())
+    conn.execute("COMMIT")
+    conn.close()
+    for bucket, count in counts.items():
+        print(f"Rebuilt {count} {bucket} buckets")
+
+
+if __name__ == '__main__':
+    main()
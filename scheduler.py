@@ -0,0 +1,178 @@
+"""
+Rate-limit-aware scheduling for the GitHub tracker.
+
+RateLimitBudget is a token bucket fed from GitHub's rate-limit response
+headers. RepoScheduler keeps every repository in a priority queue ordered by
+when it is next due: repos that just received commits are polled at the
+minimum interval, idle repos back off exponentially up to a cap.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Defaults
+DEFAULT_RATE_LIMIT_RESERVE = 50  # Calls we never spend, kept for manual/API use
+DEFAULT_BACKOFF_FACTOR = 2.0  # Interval multiplier for each idle poll
+
+
+class RateLimitBudget:
+    """
+    Token bucket mirroring the GitHub rate limit.
+    The bucket holds whatever X-RateLimit-Remaining last reported, less what
+    we've spent since, and refills to X-RateLimit-Limit once the reset time
+    passes. Until the first header arrives the budget is unknown and nothing
+    is throttled.
+    """
+
+    def __init__(self, reserve: int = DEFAULT_RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0  # Unix time the window resets
+        self.blocked_until = 0.0  # Set by Retry-After / secondary rate limits
+        self._lock = threading.Lock()
+
+    def update_from_headers(self, headers, status_code: int = 200):
+        """Update the bucket from a response's rate-limit headers."""
+        now = time.time()
+        with self._lock:
+            limit = headers.get('X-RateLimit-Limit')
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset = headers.get('X-RateLimit-Reset')
+            retry_after = headers.get('Retry-After')
+
+            if limit is not None and limit.isdigit():
+                self.limit = int(limit)
+            if remaining is not None and remaining.isdigit():
+                self.remaining = int(remaining)
+            if reset is not None and reset.isdigit():
+                self.reset_at = float(reset)
+
+            if retry_after is not None and retry_after.isdigit():
+                self.blocked_until = max(self.blocked_until, now + int(retry_after))
+            elif status_code in (403, 429) and remaining == '0':
+                self.blocked_until = max(self.blocked_until, self.reset_at)
+
+    def _refill(self, now: float):
+        if self.reset_at and now >= self.reset_at:
+            # Without a known limit, go back to "unknown" until the next header
+            self.remaining = self.limit
+            self.reset_at = 0.0
+
+    def available(self, now: Optional[float] = None) -> Optional[int]:
+        """Return how many calls we may spend right now, or None if the budget is unknown."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            if now < self.blocked_until:
+                return 0
+            self._refill(now)
+            if self.remaining is None:
+                return None
+            return max(0, self.remaining - self.reserve)
+
+    def consume(self, calls: int):
+        """Spend calls from the bucket ahead of the next header update."""
+        with self._lock:
+            if self.remaining is not None:
+                self.remaining = max(0, self.remaining - calls)
+
+    def resume_at(self) -> float:
+        """Return the Unix time at which spending can resume."""
+        with self._lock:
+            return max(self.blocked_until, self.reset_at)
+
+
+class RepoScheduler:
+    """
+    Priority queue of repositories ordered by next-due time.
+    Uses lazy deletion: stale heap entries are skipped when popped.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff_factor = backoff_factor
+        self._heap = []
+        self._next_due: Dict[int, float] = {}
+        self._intervals: Dict[int, float] = {}
+        self._counter = itertools.count()  # Tie-breaker keeps equal due times in insertion order
+        self._lock = threading.Lock()
+
+    def _push(self, repo_id: int, due: float):
+        self._next_due[repo_id] = due
+        heapq.heappush(self._heap, (due, next(self._counter), repo_id))
+
+    def sync(self, repo_ids: Iterable[int], now: Optional[float] = None,
+             first_due: Optional[Dict[int, float]] = None):
+        """
+        Add newly tracked repositories and drop removed ones. New repositories
+        are due immediately, or at their first_due time if one is given.
+        """
+        now = now if now is not None else time.time()
+        first_due = first_due or {}
+        repo_ids = set(repo_ids)
+        with self._lock:
+            for repo_id in repo_ids - set(self._next_due):
+                self._intervals[repo_id] = self.min_interval
+                self._push(repo_id, max(now, first_due.get(repo_id, now)))
+            for repo_id in set(self._next_due) - repo_ids:
+                del self._next_due[repo_id]
+                del self._intervals[repo_id]
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[int]:
+        """Pop up to `limit` due repositories, most overdue first."""
+        now = now if now is not None else time.time()
+        due = []
+        with self._lock:
+            while self._heap and (limit is None or len(due) < limit):
+                due_at, _, repo_id = self._heap[0]
+                if self._next_due.get(repo_id) != due_at:
+                    heapq.heappop(self._heap)  # Stale entry
+                    continue
+                if due_at > now:
+                    break
+                heapq.heappop(self._heap)
+                due.append(repo_id)
+        return due
+
+    def reschedule(self, repo_id: int, new_commits: int, now: Optional[float] = None):
+        """Schedule a repository's next poll based on whether it just had commits."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            if repo_id not in self._intervals:
+                return
+            if new_commits > 0:
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, self._intervals[repo_id] * self.backoff_factor)
+            self._intervals[repo_id] = interval
+            self._push(repo_id, now + interval)
+
+    def defer(self, repo_ids: Iterable[int], until: float):
+        """Put popped repositories back without changing their interval."""
+        with self._lock:
+            for repo_id in repo_ids:
+                if repo_id in self._intervals:
+                    self._push(repo_id, until)
+
+    def lag(self, now: Optional[float] = None) -> float:
+        """How long the most overdue repository has been waiting (0 if none is due)."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            while self._heap and self._next_due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)  # Stale entry
+            if not self._heap:
+                return 0.0
+            return max(0.0, now - self._heap[0][0])
+
+    def interval(self, repo_id: int) -> Optional[float]:
+        with self._lock:
+            return self._intervals.get(repo_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._next_due)
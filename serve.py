@@ -0,0 +1,80 @@
+"""
+Production entry point: one poller process plus a multi-worker web tier.
+
+Starts poller.py (the only process that polls GitHub and registers teams)
+and gunicorn serving wsgi:app with SERVE_CONFIG's workers and threads. If
+any of them exits, the rest are stopped too, so a supervisor (systemd,
+Docker) can restart the set. Extra pollers started against the same
+database wait as standbys. With tokens listed in GITHUB_TOKENS, one
+sharded poller is started per token instead, splitting the repositories.
+Each poller serves its own /metrics, from POLLER_METRICS_PORT upwards.
+Static assets are fingerprinted and precompressed (assets.py) before the
+web workers start, so each worker loads the same build.
+
+Run: python serve.py
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from assets import build as build_assets
+from config import SERVE_CONFIG
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHUTDOWN_TIMEOUT = 15  # seconds to wait for a child to exit before killing it
+
+
+def main():
+    build_assets(os.path.join(BASE_DIR, "static"))
+    tokens = SERVE_CONFIG["poller_tokens"]
+    if tokens:
+        # One sharded poller per token, each with its own rate limit
+        metrics_port = SERVE_CONFIG["poller_metrics_port"]
+        poller_envs = [
+            dict(os.environ, GITHUB_TOKEN=token, POLLER_INSTANCE_ID=f"{socket.gethostname()}-poller-{i}",
+                 POLLER_METRICS_PORT=str(metrics_port + i if metrics_port else 0))
+            for i, token in enumerate(tokens)
+        ]
+    else:
+        poller_envs = [None]
+    print(f"Starting {len(poller_envs)} poller(s) and {SERVE_CONFIG['workers']} web workers "
+          f"on {SERVE_CONFIG['bind']}...")
+    processes = [subprocess.Popen([sys.executable, "poller.py"], cwd=BASE_DIR, env=env) for env in poller_envs]
+    processes.append(
+        subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], cwd=BASE_DIR)
+    )
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Wait for any process to exit, then take the others down with it
+    exit_code = None
+    while exit_code is None:
+        for process in processes:
+            if process.poll() is not None:
+                exit_code = process.returncode
+                break
+        else:
+            time.sleep(0.5)
+    stop(None, None)
+
+    for process in processes:
+        try:
+            process.wait(timeout=SHUTDOWN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    print("Application closed.")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ const eventsFeed = document.getElementById('events-feed');
 // Polling intervals (in milliseconds)
 const LEADERBOARD_POLL_INTERVAL = 5000;  // 5 seconds
 const EVENTS_POLL_INTERVAL = 2000;       // 2 seconds
+const STREAM_RETRY_INTERVAL = 60000;     // 1 minute before trying the stream again after the server turned it away
 
 // GitHub repository and polling interval
 const GITHUB_REPO = "timf34/HackIrelandLeaderboard";
@@ -266,16 +267,21 @@ async function fetchLeaderboard() {
     }
 }
 
+// Cursor into the event log; null until the first poll tells us where the log ends
+let eventsCursor = null;
+
 // Fetch new events
 async function fetchEvents() {
     try {
-        const response = await fetch('/api/events');
+        const url = eventsCursor === null ? '/api/events' : `/api/events?since_id=${eventsCursor}`;
+        const response = await fetch(url);
         if (!response.ok) throw new Error('Failed to fetch events');
         
-        const events = await response.json();
+        const page = await response.json();
+        eventsCursor = page.next_since_id;
         
         // Add each new event to the feed
-        events.forEach(event => {
+        page.events.forEach(event => {
             addEvent(event);
         });
     } catch (error) {
@@ -283,6 +289,43 @@ async function fetchEvents() {
     }
 }
 
+// Poll for leaderboard updates and events; returns a function that stops polling
+function startPolling() {
+    const timers = [
+        setInterval(fetchLeaderboard, LEADERBOARD_POLL_INTERVAL),
+        setInterval(fetchEvents, EVENTS_POLL_INTERVAL),
+    ];
+    return () => timers.forEach(clearInterval);
+}
+
+// Subscribe to the server's event stream for commits and leaderboard updates.
+// The browser reconnects on its own and sends Last-Event-ID so missed commits are replayed.
+function connectStream() {
+    const source = new EventSource('/api/stream');
+    
+    source.addEventListener('leaderboard', (e) => {
+        updateLeaderboard(JSON.parse(e.data));
+    });
+    
+    source.addEventListener('commit', (e) => {
+        addEvent(JSON.parse(e.data));
+    });
+    
+    source.onerror = () => {
+        if (source.readyState !== EventSource.CLOSED) {
+            console.warn('Event stream disconnected, reconnecting...');
+            return;
+        }
+        // Refused outright (e.g. a 503 when the server has too many streams open): poll for a while instead
+        console.warn('Event stream unavailable, polling instead');
+        const stopPolling = startPolling();
+        setTimeout(() => {
+            stopPolling();
+            connectStream();
+        }, STREAM_RETRY_INTERVAL);
+    };
+}
+
 // Add this function to fetch star count
 async function updateStarCount() {
     try {
@@ -311,9 +354,12 @@ function init() {
     updateStarCount();
     setInterval(updateStarCount, GITHUB_POLL_INTERVAL);
     
-    // Set up polling for updates
-    setInterval(fetchLeaderboard, LEADERBOARD_POLL_INTERVAL);
-    setInterval(fetchEvents, EVENTS_POLL_INTERVAL);
+    // Get pushed updates, falling back to polling if the browser has no EventSource
+    if (window.EventSource) {
+        connectStream();
+    } else {
+        startPolling();
+    }
     
     // Update timestamps every minute
     setInterval(updateTimestamps, 60000);
@@ -0,0 +1,173 @@
+"""
+Hot reload of teams.csv.
+TeamsWatcher polls the file's mtime and size. Once a change has held still
+for one interval (so a half-saved file isn't read), it re-reads the file,
+diffs it against the teams and repositories tables, validates only the
+repository URLs that aren't tracked yet, and applies the additions, URL
+changes and removals in one transaction. Polling and the web tier carry on
+throughout; the poller picks up the new repository set on its next cycle.
+URLs whose validation failed for a passing reason (a rate limit, a network
+error) are validated again after a backoff, without re-reading unchanged rows.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config import read_team_rows, team_name, validate_github_urls, CACHEABLE_VALIDATION_MESSAGES
+
+logger = logging.getLogger("github-tracker")
+
+DEFAULT_RELOAD_INTERVAL = 5  # seconds between checks of the file
+DEFAULT_RETRY_DELAY = 60  # seconds before re-validating URLs that failed for a passing reason; doubles per failure
+MAX_RETRY_DELAY = 900
+
+
+class TeamDiff(NamedTuple):
+    add_repos: List[Tuple[str, str]]  # (team name, repo URL)
+    remove_repo_ids: List[int]
+    remove_teams: List[str]
+    added_teams: List[str]
+    changed_teams: List[str]  # Teams whose repository URLs changed
+
+    def __bool__(self):
+        return bool(self.add_repos or self.remove_repo_ids or self.remove_teams)
+
+    def summary(self) -> str:
+        return (f"{len(self.added_teams)} teams added, {len(self.changed_teams)} changed, "
+                f"{len(self.remove_teams)} removed; {len(self.add_repos)} repositories added, "
+                f"{len(self.remove_repo_ids)} removed")
+
+
+def diff_teams(desired: Dict[str, List[str]], current: Dict[str, Dict[str, int]],
+               validation: Dict[str, Tuple[bool, str]]) -> TeamDiff:
+    """
+    Diff the desired teams ({team name: repo URLs}) against the tracked ones
+    ({team name: {repo URL: repo ID}}). New URLs are only added if validation
+    passed; a team left with no valid URLs keeps the repositories it has.
+    """
+    add_repos, remove_repo_ids, added_teams, changed_teams = [], [], [], []
+    for name, urls in desired.items():
+        tracked = current.get(name, {})
+        new_urls = [url for url in dict.fromkeys(urls) if url not in tracked]
+        valid_new = []
+        for url in new_urls:
+            is_valid, message = validation[url]
+            if is_valid:
+                valid_new.append(url)
+            else:
+                logger.warning(f"{name} repository ({url}) is invalid: {message}")
+        wanted = set(urls)
+        stale = [repo_id for url, repo_id in tracked.items() if url not in wanted]
+
+        if not valid_new and len(stale) == len(tracked) and tracked:
+            logger.warning(f"{name} has no valid repositories in the teams file, keeping the current ones")
+            continue
+        add_repos.extend((name, url) for url in valid_new)
+        remove_repo_ids.extend(stale)
+        if name not in current:
+            if valid_new:
+                added_teams.append(name)
+        elif valid_new or stale:
+            changed_teams.append(name)
+
+    remove_teams = [name for name in current if name not in desired]
+    for name in remove_teams:
+        remove_repo_ids.extend(current[name].values())
+    return TeamDiff(add_repos, remove_repo_ids, remove_teams, added_teams, changed_teams)
+
+
+class TeamsWatcher:
+    """Keeps the tracker's teams and repositories in line with the teams file."""
+
+    def __init__(self, tracker, path: str, interval: float = DEFAULT_RELOAD_INTERVAL,
+                 retry_delay: float = DEFAULT_RETRY_DELAY):
+        self.tracker = tracker
+        self.path = path
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self._applied: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the file last applied
+        self._seen: Optional[Tuple[int, int]] = None  # ... and as of the last check
+        self._retry_at: Optional[float] = None  # When to re-validate URLs that failed for a passing reason
+        self._retry_delay = retry_delay  # Current backoff
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> Optional[TeamDiff]:
+        """Read the file and apply any difference from the database. Returns the diff applied, if any."""
+        with self._lock:
+            self._applied = self._seen = self._stat()  # A broken file is retried once it changes again
+            try:
+                rows = read_team_rows(self.path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Could not read {self.path}, keeping the current teams: {str(e)}")
+                return None
+            if not rows:
+                logger.warning(f"{self.path} lists no teams, keeping the current teams")
+                return None
+
+            desired: Dict[str, List[str]] = {}
+            for team_number, repo_url in rows:
+                desired.setdefault(team_name(team_number), []).append(repo_url)
+            current = self.tracker.get_team_repositories()
+
+            # Only URLs the database doesn't already track need validating
+            tracked_urls = {url for repos in current.values() for url in repos}
+            new_urls = [url for urls in desired.values() for url in urls if url not in tracked_urls]
+            validation = validate_github_urls(new_urls) if new_urls else {}
+            # A URL can move between teams; it's only "new" to its new team
+            for url in tracked_urls:
+                validation.setdefault(url, (True, "Already tracked"))
+
+            diff = diff_teams(desired, current, validation)
+            failed = [url for url, (is_valid, message) in validation.items()
+                      if not is_valid and message not in CACHEABLE_VALIDATION_MESSAGES]
+            if failed:
+                # Rate limit or network error: the rest is applied; only these are validated again
+                self._retry_at = time.time() + self._retry_delay
+                logger.warning(f"Validating {len(failed)} repositories failed, retrying in {self._retry_delay:.0f}s")
+                self._retry_delay = min(self._retry_delay * 2, MAX_RETRY_DELAY)
+            else:
+                self._retry_at = None
+                self._retry_delay = self.retry_delay
+            if diff:
+                self.tracker.apply_team_changes(diff.add_repos, diff.remove_repo_ids, diff.remove_teams)
+                logger.info(f"Applied {self.path}: {diff.summary()}")
+            return diff
+
+    def check(self) -> Optional[TeamDiff]:
+        """
+        Reload if the file changed and has stayed the same since the previous
+        check, or if URLs that failed validation are due to be retried.
+        """
+        stat = self._stat()
+        previous, self._seen = self._seen, stat
+        if stat is None or stat != previous:
+            return None
+        if stat == self._applied and (self._retry_at is None or time.time() < self._retry_at):
+            return None
+        return self.reload()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error reloading {self.path}: {str(e)}")
+
+    def start(self):
+        """Watch the file in a background thread (a no-op if the interval is 0)."""
+        if self.interval > 0:
+            threading.Thread(target=self._run, daemon=True, name="teams-watcher").start()
+
+    def stop(self):
+        self._stop.set()
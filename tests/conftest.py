@@ -0,0 +1,40 @@
+"""
+Shared setup for the test suite: a throwaway database and the environment
+config.py and app.py read at import, set before either is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))  # fake_github, the local GitHub stand-in
+
+TEST_DIR = tempfile.mkdtemp(prefix="tracker-tests-")
+
+os.environ.update({
+    "GITHUB_TOKEN": "test-token",
+    "GITHUB_WEBHOOK_SECRET": "test-secret",
+    "COUNT_SOURCE": "scrape",
+    "TEAMS_RELOAD_INTERVAL": "0",
+    "ARCHIVE_DIR": "",
+})
+
+import github_commit_tracker  # noqa: E402
+
+github_commit_tracker.DB_PATH = os.path.join(TEST_DIR, "tracker.db")
+
+import pytest  # noqa: E402
+
+from database import Database  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh, fully migrated database of the test's own, outside the app's tracker."""
+    database = Database(str(tmp_path / "test.db"))
+    database.write(migrate)
+    yield database
+    database.close()
@@ -0,0 +1,105 @@
+"""
+Fingerprinted, precompressed static assets: the build, serving the current
+and previous builds from /assets/, and the per-encoding ETags of the cached
+JSON views.
+"""
+
+import gzip
+import hashlib
+import json
+
+import pytest
+
+import app as app_module
+from app import app
+from assets import StaticAssets, build
+
+STYLE = b"body { color: #222; }\n" * 100
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_bytes(STYLE)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    return tmp_path
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_build_fingerprints_and_precompresses(static_dir):
+    manifest = build(str(static_dir))
+
+    style = manifest["css/style.css"]
+    assert style == f"css/style.{hashlib.sha256(STYLE).hexdigest()[:12]}.css"
+    built = static_dir / "dist" / style
+    assert built.read_bytes() == STYLE
+    assert gzip.decompress((static_dir / "dist" / (style + ".gz")).read_bytes()) == STYLE
+    # Only text formats are compressed
+    assert not (static_dir / "dist" / (manifest["logo.png"] + ".gz")).exists()
+    assert json.loads((static_dir / "dist" / "manifest.json").read_text()) == manifest
+    assert not (static_dir / "dist" / "manifest.previous.json").exists()
+
+
+def test_an_edit_gets_a_new_name_and_the_old_build_is_still_served(static_dir):
+    old = build(str(static_dir))
+    (static_dir / "css" / "style.css").write_bytes(STYLE + b"a { color: red; }\n")
+    new = build(str(static_dir))
+
+    assert new["css/style.css"] != old["css/style.css"]
+    assert new["logo.png"] == old["logo.png"]
+    assert json.loads((static_dir / "dist" / "manifest.previous.json").read_text()) == old
+
+    assets = StaticAssets(str(static_dir))
+    assert assets.load()
+    assert assets.url_path("css/style.css") == new["css/style.css"]
+    assert assets.variants(old["css/style.css"])[None] == STYLE
+    assert assets.variants("css/style.000000000000.css") is None
+
+
+def test_without_a_build_nothing_is_served(static_dir):
+    assets = StaticAssets(str(static_dir))
+    assert not assets.load()
+    assert assets.url_path("css/style.css") is None
+
+
+def test_assets_are_served_precompressed_and_cached_for_good(static_dir, client, monkeypatch):
+    name = build(str(static_dir))["css/style.css"]
+    assets = StaticAssets(str(static_dir))
+    assets.load()
+    monkeypatch.setattr(app_module, "static_assets", assets)
+
+    response = client.get(f"/assets/{name}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == STYLE
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    plain = client.get(f"/assets/{name}", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data == STYLE
+
+    assert client.get("/assets/css/style.000000000000.css").status_code == 404
+
+
+def test_each_encoding_of_a_view_has_its_own_etag(client, monkeypatch):
+    monkeypatch.setitem(app_module.WEB_CONFIG, "compress_min_bytes", 0)
+    compressed = client.get("/api/repositories", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/api/repositories", headers={"Accept-Encoding": "identity"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    assert compressed.headers["Vary"] == plain.headers["Vary"] == "Accept-Encoding"
+
+    revalidated = client.get("/api/repositories", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == compressed.headers["ETag"]
+    # The gzip ETag doesn't validate the uncompressed body
+    assert client.get("/api/repositories", headers={
+        "Accept-Encoding": "identity", "If-None-Match": compressed.headers["ETag"]}).status_code == 200
@@ -0,0 +1,96 @@
+"""
+Per-commit ingestion against the local GitHub stand-in: histories longer
+than one poll's page cap are backfilled on later polls.
+"""
+
+import itertools
+
+import pytest
+
+from app import tracker
+from commit_ingest import CommitIngester
+from fake_github import FakeGitHub, repo_name
+from http_client import HttpClient
+from scheduler import RateLimitBudget
+
+_repo_numbers = itertools.count()
+
+
+@pytest.fixture(scope="module")
+def github():
+    fake = FakeGitHub(10, latency_ms=0, jitter_ms=0)
+    base_url = fake.start()
+    yield fake, base_url
+    fake.stop()
+
+
+@pytest.fixture
+def fake(github, monkeypatch):
+    """The fake server, with the tracker ingesting from it one page (100 commits) per poll."""
+    fake, base_url = github
+    ingester = CommitIngester("test-token", tracker.validator_cache, api_url=base_url, max_pages=1,
+                              http=HttpClient(max_retries=0))
+    monkeypatch.setattr(tracker, "ingester", ingester)
+    return fake
+
+
+@pytest.fixture
+def repo(fake):
+    i = next(_repo_numbers)
+    owner, name = repo_name(i)
+    team_id = tracker.add_team(f"Ingest {owner}")
+    tracker.add_repository(team_id, f"https://github.com/{owner}/{name}")
+    return dict(tracker.find_repository(owner, name), fake_key=(owner, name))
+
+
+def poll(repo):
+    tracker.check_repository(repo["id"])
+    return tracker._get_repository(repo["id"])["total_commits"]
+
+
+def backfill_cursor(repo):
+    with tracker.db.read() as conn:
+        return conn.execute("SELECT backfill_sha FROM repositories WHERE id = ?", (repo["id"],)).fetchone()[0]
+
+
+def test_first_ingest_backfills_history_beyond_the_page_cap(fake, repo):
+    fake.commits[repo["fake_key"]] = 250
+
+    assert poll(repo) == 199  # The newest page, then the first backfill page (sharing one commit)
+    assert backfill_cursor(repo) is not None
+    assert poll(repo) == 250  # Head unchanged (304); the backfill reaches the root
+    assert backfill_cursor(repo) is None
+    assert poll(repo) == 250
+
+
+def test_a_burst_larger_than_the_page_cap_is_backfilled(fake, repo):
+    fake.commits[repo["fake_key"]] = 50
+    assert poll(repo) == 50
+
+    fake.push(repo["fake_key"], 180)
+
+    assert poll(repo) == 230  # 100 newest, then down to the last commit seen before the burst
+    assert backfill_cursor(repo) is None
+
+
+def test_walks_stop_at_the_rate_limit_budget(monkeypatch):
+    fake = FakeGitHub(0, latency_ms=0, jitter_ms=0, rate_limit=4)  # Four calls per window
+    base_url = fake.start()
+    try:
+        owner, name = repo_name(next(_repo_numbers))
+        fake.commits[(owner, name)] = 450
+        tracker.add_repository(tracker.add_team(f"Ingest {owner}"), f"https://github.com/{owner}/{name}")
+        repo = tracker.find_repository(owner, name)
+        monkeypatch.setattr(tracker, "rate_limit", RateLimitBudget(reserve=0))
+        tracker.rate_limit.update_from_headers({"X-RateLimit-Limit": "4", "X-RateLimit-Remaining": "2"})
+        monkeypatch.setattr(tracker, "ingester", CommitIngester(
+            "budget-token", tracker.validator_cache, rate_limit=tracker.rate_limit, api_url=base_url,
+            max_pages=5, http=HttpClient(max_retries=0)
+        ))
+
+        # Two head pages, then two backfill pages once the headers show what's left
+        assert poll(repo) == 399
+        assert fake.requests == 4
+        assert backfill_cursor(repo) is not None
+    finally:
+        fake.stop()
@@ -0,0 +1,127 @@
+"""
+The GraphQL count source against the local GitHub stand-in: batching,
+partial errors, the circuit breaker and the fallback to scraping.
+"""
+
+import sqlite3
+
+import pytest
+
+from count_sources import GraphQLCountSource, ScrapeCountSource, create_count_source
+from fake_github import FakeGitHub, repo_name
+from http_cache import ValidatorCache
+from http_client import CircuitBreaker, HttpClient
+from migrations import migrate
+from polling import ConcurrentFetcher
+from scheduler import RateLimitBudget
+
+REPOS = 120
+
+
+@pytest.fixture(scope="module")
+def github():
+    fake = FakeGitHub(REPOS, latency_ms=0, jitter_ms=0)
+    base_url = fake.start()
+    yield fake, base_url
+    fake.stop()
+
+
+@pytest.fixture
+def fake(github):
+    fake, _ = github
+    fake.graphql_batches.clear()
+    fake.graphql_missing.clear()
+    fake.graphql_status = 200
+    fake.page_fetches.clear()
+    return fake
+
+
+@pytest.fixture
+def base_url(github):
+    return github[1]
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = ConcurrentFetcher(4, 4)
+    yield fetcher
+    fetcher.shutdown()
+
+
+@pytest.fixture
+def validator_cache():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    return ValidatorCache(conn)
+
+
+def make_source(fake, base_url, validator_cache, fallback=True, batch_size=50):
+    http = HttpClient(max_retries=0)
+    scraper = ScrapeCountSource("test-token", validator_cache, http=http) if fallback else None
+    source = GraphQLCountSource("test-token", fallback=scraper, batch_size=batch_size,
+                                endpoint=f"{base_url}/graphql", http=http)
+    source.breaker = CircuitBreaker(failure_threshold=1)
+    if scraper is not None:
+        scraper.breaker = source.breaker
+    return source
+
+
+def test_batches_repositories_into_aliased_queries(fake, base_url, validator_cache, fetcher):
+    source = make_source(fake, base_url, validator_cache)
+    urls = [fake.url(base_url, i) for i in range(REPOS)]
+
+    counts = source.get_total_commits_batch(urls, fetcher)
+
+    assert counts == [fake.commits[repo_name(i)] for i in range(REPOS)]
+    assert fake.graphql_batches == [50, 50, 20]
+    assert source.calls_for(REPOS) == 3
+    assert not fake.page_fetches  # Nothing needed the scraper
+
+
+def test_partial_errors_count_as_failures_without_a_fallback(fake, base_url, validator_cache, fetcher):
+    source = make_source(fake, base_url, validator_cache, fallback=False)
+    fake.graphql_missing.update({repo_name(1), repo_name(3)})
+    urls = [fake.url(base_url, i) for i in range(5)] + [f"{base_url}/owner999/repo999"]
+
+    counts = source.get_total_commits_batch(urls, fetcher)
+
+    assert counts == [fake.commits[repo_name(0)], 0, fake.commits[repo_name(2)], 0,
+                      fake.commits[repo_name(4)], 0]
+    assert fake.graphql_batches == [6]
+    parked = {url for url in urls if not source.breaker.allow(url)}
+    assert parked == {urls[1], urls[3], urls[5]}
+
+
+def test_unresolved_repositories_fall_back_to_scraping(fake, base_url, validator_cache, fetcher):
+    source = make_source(fake, base_url, validator_cache)
+    fake.graphql_missing.update({repo_name(2), repo_name(7)})
+    urls = [fake.url(base_url, i) for i in range(10)]
+
+    counts = source.get_total_commits_batch(urls, fetcher)
+
+    assert counts == [fake.commits[repo_name(i)] for i in range(10)]
+    assert set(fake.page_fetches) == {repo_name(2), repo_name(7)}
+    assert all(source.breaker.allow(url) for url in urls)
+
+
+def test_failed_query_falls_back_to_scraping_everything(fake, base_url, validator_cache, fetcher):
+    source = make_source(fake, base_url, validator_cache)
+    fake.graphql_status = 502
+    urls = [fake.url(base_url, i) for i in range(60)]
+
+    counts = source.get_total_commits_batch(urls, fetcher)
+
+    assert counts == [fake.commits[repo_name(i)] for i in range(60)]
+    assert fake.graphql_batches == [50, 10]
+    assert len(fake.page_fetches) == 60
+
+
+def test_create_count_source_wires_the_breaker_and_rate_limit(validator_cache):
+    rate_limit = RateLimitBudget()
+    breaker = CircuitBreaker()
+    source = create_count_source("graphql", "test-token", validator_cache, graphql_endpoint="http://localhost/graphql",
+                                 rate_limit=rate_limit, breaker=breaker)
+
+    assert source.endpoint == "http://localhost/graphql"
+    assert source.breaker is breaker and source.fallback.breaker is breaker
+    assert source.rate_limit is rate_limit and source.fallback.rate_limit is rate_limit
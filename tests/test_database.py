@@ -0,0 +1,67 @@
+"""
+The database layer: one writer thread applying queued jobs in batched
+transactions with a savepoint each, and pooled read-only connections.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from database import Database
+
+
+def add_team(name):
+    return lambda conn: conn.execute("INSERT INTO teams (team_name) VALUES (?)", (name,)).lastrowid
+
+
+def team_names(db):
+    with db.read() as conn:
+        return [row[0] for row in conn.execute("SELECT team_name FROM teams ORDER BY id")]
+
+
+def test_writes_are_visible_to_readers_once_their_future_resolves(db):
+    team_id = db.write(add_team("Alpha"))
+    assert team_id == 1
+    assert team_names(db) == ["Alpha"]
+
+
+def test_a_failing_job_only_undoes_itself(db):
+    # Hold the writer so the three jobs are drained into one transaction
+    release = threading.Event()
+    blocker = db.submit(lambda conn: release.wait(5))
+    futures = [db.submit(add_team("Alpha")), db.submit(add_team("Alpha")), db.submit(add_team("Beta"))]
+    release.set()
+    blocker.result()
+
+    assert futures[0].result() and futures[2].result()
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result()
+    assert team_names(db) == ["Alpha", "Beta"]
+
+
+def test_jobs_outside_a_transaction_run_alone(db):
+    assert db.write(lambda conn: conn.in_transaction, transaction=False) is False
+    assert db.write(lambda conn: conn.in_transaction) is True
+
+
+def test_read_connections_are_read_only(db):
+    with db.read() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO teams (team_name) VALUES ('Nope')")
+
+
+def test_data_version_changes_with_every_commit(db):
+    before = db.data_version()
+    db.write(add_team("Alpha"))
+    assert db.data_version() != before
+
+
+def test_writer_starts_on_the_first_write(tmp_path):
+    fresh = Database(str(tmp_path / "lazy.db"))
+    try:
+        assert fresh._writer is None
+        fresh.write(lambda conn: conn.execute("CREATE TABLE t (x)"))
+        assert fresh._writer.is_alive()
+    finally:
+        fresh.close()
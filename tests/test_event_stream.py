@@ -0,0 +1,77 @@
+"""
+The SSE producer: leaderboard frames follow the tracker's data version,
+not just new events.
+"""
+
+import itertools
+import json
+import queue
+
+import pytest
+
+from app import build_leaderboard, tracker
+from event_stream import EventBroadcaster
+
+_teams = itertools.count()
+
+
+@pytest.fixture
+def broadcaster():
+    broadcaster = EventBroadcaster(tracker, build_leaderboard, heartbeat_interval=0.05)
+    broadcaster.start()
+    return broadcaster
+
+
+@pytest.fixture
+def repo():
+    name = f"stream-repo-{next(_teams)}"
+    team_id = tracker.add_team(f"Stream {name}")
+    tracker.add_repository(team_id, f"https://github.com/octo-org/{name}")
+    return tracker.find_repository("octo-org", name)
+
+
+def frames(client, timeout=2.0):
+    """Messages until the client's queue stays empty for a moment."""
+    messages = []
+    try:
+        while True:
+            messages.append(client.get(timeout=timeout if not messages else 0.3))
+    except queue.Empty:
+        return messages
+
+
+def leaderboard_totals(message):
+    assert message.startswith("event: leaderboard\n")
+    return {entry["team_name"]: entry["total_commits"] for entry in json.loads(message.split("data: ", 1)[1])}
+
+
+def test_new_commits_push_events_then_the_leaderboard(broadcaster, repo):
+    client = broadcaster.subscribe()
+    tracker._apply_commit_count(repo, 100000)
+
+    messages = frames(client)
+
+    assert "event: commit" in messages[0]
+    assert leaderboard_totals(messages[-1])[repo["team_name"]] == 100000
+
+
+def test_corrections_without_events_still_push_the_leaderboard(broadcaster, repo):
+    tracker._apply_commit_count(repo, 200000)
+    client = broadcaster.subscribe()
+    frames(client)
+
+    tracker._apply_commit_count(repo, 150000)  # A poll lowering a total records no event
+    messages = frames(client)
+
+    assert [message.split("\n", 1)[0] for message in messages] == ["event: leaderboard"]
+    assert leaderboard_totals(messages[0])[repo["team_name"]] == 150000
+
+
+def test_unchanged_standings_are_not_resent(broadcaster):
+    client = broadcaster.subscribe()
+    frames(client, timeout=0.5)
+
+    tracker.data_version += 1
+    tracker.new_commits_event.set()
+
+    assert frames(client, timeout=0.5) == []
@@ -0,0 +1,82 @@
+"""
+The streaming commit-count extractor against the sample repository pages in
+benchmarks/fixtures: current and legacy markup, decoys, pages with no count,
+and stopping as soon as the best selector matches.
+"""
+
+import json
+import os
+
+import pytest
+
+from html_extract import extract_commit_count, extract_from_response
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+with open(os.path.join(FIXTURES, "expected.json")) as f:
+    EXPECTED = json.load(f)
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def chunked(text, size):
+    return (text[start:start + size] for start in range(0, len(text), size))
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+@pytest.mark.parametrize("chunk_size", [1, 37, 1 << 20])
+def test_fixture_counts_survive_any_chunking(name, chunk_size):
+    count, _ = extract_commit_count(chunked(load(name), chunk_size))
+    assert count == EXPECTED[name]
+
+
+def test_current_markup_stops_at_the_count():
+    page = load("repo_page_current.html")
+    fed = []
+
+    def chunks():
+        for chunk in chunked(page, 64):
+            fed.append(chunk)
+            yield chunk
+
+    assert extract_commit_count(chunks()) == (1287, "fgColor-default")
+    assert len("".join(fed)) < len(page)  # The rest of the page is never parsed
+
+
+def test_legacy_markup_falls_back_to_the_commits_link():
+    assert extract_commit_count([load("repo_page_legacy.html")]) == (2046, "commits-link")
+
+
+def test_decoy_spans_without_a_count_are_skipped():
+    assert extract_commit_count([load("repo_page_decoy_span.html")]) == (58, "fgColor-default")
+
+
+def test_page_without_a_count():
+    assert extract_commit_count([load("repo_page_empty.html")]) == (None, None)
+
+
+class StreamedResponse:
+    """The parts of a streamed requests.Response the extractor uses."""
+
+    def __init__(self, body, encoding="utf-8"):
+        self.body = body
+        self.encoding = encoding
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        return (self.body[start:start + chunk_size] for start in range(0, len(self.body), chunk_size))
+
+    def close(self):
+        self.closed = True
+
+
+def test_response_is_decoded_across_chunk_boundaries_and_closed():
+    # A multi-byte character split between chunks must not garble the count
+    page = load("repo_page_current.html").replace("<body", "<body data-title=\"héllo ✓\"", 1)
+    response = StreamedResponse(page.encode("utf-8"))
+
+    assert extract_from_response(response, chunk_size=7) == (1287, "fgColor-default")
+    assert response.closed
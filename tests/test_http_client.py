@@ -0,0 +1,93 @@
+"""
+The shared HTTP client's retries against a scripted local server, and the
+per-repository circuit breaker.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+from http_client import CircuitBreaker, HttpClient
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """A server answering each request with the next (status, headers) in its script."""
+    monkeypatch.setattr(http_client, "BACKOFF_BASE", 0)  # Retry without waiting
+    script, served = [], []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            status, headers = script.pop(0) if script else (200, {})
+            served.append(status)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/", script, served
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_retries_server_errors_until_success(server):
+    url, script, served = server
+    script.extend([(502, {}), (503, {})])
+    assert HttpClient(max_retries=3).get(url).status_code == 200
+    assert served == [502, 503, 200]
+
+
+def test_gives_up_after_max_retries(server):
+    url, script, served = server
+    script.extend([(500, {})] * 5)
+    assert HttpClient(max_retries=2).get(url).status_code == 500
+    assert served == [500, 500, 500]
+
+
+def test_client_errors_are_not_retried(server):
+    url, script, served = server
+    script.append((404, {}))
+    assert HttpClient().get(url).status_code == 404
+    assert served == [404]
+
+
+def test_long_retry_after_is_left_to_the_rate_limit_budget(server):
+    url, script, served = server
+    script.append((429, {"Retry-After": str(http_client.BACKOFF_MAX + 60)}))
+    assert HttpClient().get(url).status_code == 429
+    assert served == [429]
+
+
+def test_connection_errors_are_retried_then_raised(monkeypatch):
+    monkeypatch.setattr(http_client, "BACKOFF_BASE", 0)
+    with pytest.raises(requests.ConnectionError):
+        HttpClient(timeout=1, max_retries=1).get("http://127.0.0.1:9/")
+
+
+def test_breaker_parks_after_repeated_failures_with_growing_cooldowns():
+    breaker = CircuitBreaker(failure_threshold=2, base_cooldown=100, max_cooldown=300)
+    breaker.record_failure("repo", now=0)
+    assert breaker.allow("repo", now=0)
+    breaker.record_failure("repo", now=0)
+    assert not breaker.allow("repo", now=50)
+    assert breaker.parked(now=50) == ["repo"]
+
+    # One trial fetch after the cooldown; failing it parks the repo again, for twice as long
+    assert breaker.allow("repo", now=100)
+    breaker.record_failure("repo", now=100)
+    assert not breaker.allow("repo", now=299)
+    assert breaker.allow("repo", now=300)
+
+    breaker.record_success("repo")
+    breaker.record_failure("repo", now=300)
+    assert breaker.allow("repo", now=300)  # Back to needing the full threshold
+    assert breaker.parked(now=300) == []
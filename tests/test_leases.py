@@ -0,0 +1,94 @@
+"""
+Repository leases for sharded polling: fair shares, rebalancing when
+instances join, taking over from an instance whose heartbeat lapsed, and
+never polling a repository within an interval of its previous owner.
+"""
+
+import types
+
+import pytest
+
+import leases
+from leases import RepoLeases
+
+POLL = 5
+TTL = 30
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(leases, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def repos(db):
+    def add(conn):
+        conn.execute("INSERT INTO teams (team_name) VALUES ('Team 1')")
+        conn.executemany("INSERT INTO repositories (team_id, repo_url, repo_name) VALUES (1, ?, ?)",
+                         [(f"https://github.com/octo-org/r{i}", f"r{i}") for i in range(10)])
+    db.write(add)
+    return list(range(1, 11))
+
+
+def instance(db, name):
+    return RepoLeases(db, name, POLL, heartbeat_interval=5, lease_ttl=TTL)
+
+
+def test_lease_ttl_must_outlast_a_heartbeat_and_a_poll(db):
+    with pytest.raises(ValueError):
+        RepoLeases(db, "a", POLL, heartbeat_interval=5, lease_ttl=10)
+
+
+def test_a_lone_instance_claims_everything(db, repos, clock):
+    a = instance(db, "a")
+    a.heartbeat()
+    assert sorted(a.owned()) == repos
+    assert set(a.owned().values()) == {clock[0]}  # Never polled before: straight away
+
+
+def test_instances_split_the_repositories(db, repos, clock):
+    a, b = instance(db, "a"), instance(db, "b")
+    a.heartbeat()
+    b.heartbeat()  # Nothing free yet; b only registers
+    assert b.owned() == {}
+
+    a.heartbeat()  # a sees two live instances and releases its surplus
+    assert len(a.owned()) == 5
+    clock[0] += 1
+    b.heartbeat()
+    assert sorted(a.owned()) + sorted(b.owned()) == repos
+    # b waits a full interval from the release before polling what a gave up
+    assert set(b.owned().values()) == {clock[0] - 1 + POLL}
+
+
+def test_a_dead_instances_repositories_are_taken_over(db, repos, clock):
+    a, b = instance(db, "a"), instance(db, "b")
+    a.heartbeat()
+    b.heartbeat()
+    a.heartbeat()
+    b.heartbeat()
+
+    # a stops heartbeating; its leases stay out of reach until its heartbeat is TTL old
+    clock[0] += TTL - 1
+    b.heartbeat()
+    assert len(b.owned()) == 5
+    clock[0] += 2
+    b.heartbeat()
+    assert sorted(b.owned()) == repos
+
+
+def test_an_instance_that_cannot_renew_stops_polling_first(db, repos, clock):
+    a = instance(db, "a")
+    a.heartbeat()
+    assert a.owned(now=clock[0] + TTL - POLL - 1)
+    assert a.owned(now=clock[0] + TTL - POLL + 1) == {}
+
+
+def test_removed_repositories_lose_their_leases(db, repos, clock):
+    a = instance(db, "a")
+    a.heartbeat()
+    db.write(lambda conn: conn.execute("DELETE FROM repositories WHERE id = 1"))
+    a.heartbeat()
+    assert sorted(a.owned()) == repos[1:]
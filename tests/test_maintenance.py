@@ -0,0 +1,97 @@
+"""
+Database maintenance: archiving expired events and activity rows to gzipped
+NDJSON, incremental vacuum and WAL truncation.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+
+import maintenance
+from maintenance import DatabaseMaintenance
+
+NOW = datetime(2024, 3, 21, 12, 30)
+
+
+def add_rows(db):
+    def add(conn):
+        conn.executemany("INSERT INTO events (event_type, entity_id, data, created_at) VALUES (?, ?, ?, ?)", [
+            ("new_commits", 1, json.dumps({"n": 1}), "2024-03-19T10:00:00"),
+            ("new_commits", 1, json.dumps({"n": 2}), "2024-03-20T08:00:00"),
+            ("new_commits", 1, json.dumps({"n": 3}), "2024-03-21T12:00:00"),
+        ])
+        conn.executemany("INSERT INTO activity_history (event_type, team_name, repo_name, commit_count, "
+                         "total_commits, timestamp) VALUES ('new_commits', 'Team 1', 'one', 1, ?, ?)", [
+                             (1, "2024-03-21T09:59:00"), (2, "2024-03-21T10:15:00"), (3, "2024-03-21T12:00:00"),
+                         ])
+    db.write(add)
+
+
+def count(db, table):
+    with db.read() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def read_archive(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_expired_rows_are_archived_by_day_then_deleted(db, tmp_path):
+    add_rows(db)
+    archive_dir = tmp_path / "archive"
+    runner = DatabaseMaintenance(db, event_retention_hours=24, activity_retention_hours=2,
+                                 archive_dir=str(archive_dir))
+
+    assert runner.archive_expired(NOW) == {"events": 2, "activity_history": 1}
+    assert count(db, "events") == 1
+    # The activity cutoff is rounded down to a whole hour (10:00), keeping the 10:15 row
+    assert count(db, "activity_history") == 2
+    assert sorted(os.listdir(archive_dir)) == ["activity_history-2024-03-21.ndjson.gz",
+                                               "events-2024-03-19.ndjson.gz", "events-2024-03-20.ndjson.gz"]
+    assert read_archive(archive_dir / "events-2024-03-20.ndjson.gz")[0]["data"] == {"n": 2}
+
+    # A later run appends to the day's file
+    add_rows(db)
+    runner.archive_expired(NOW)
+    assert len(read_archive(archive_dir / "events-2024-03-20.ndjson.gz")) == 2
+
+
+def test_activity_is_kept_by_default_and_without_an_archive_dir_rows_are_just_deleted(db):
+    add_rows(db)
+    runner = DatabaseMaintenance(db, event_retention_hours=24)
+    assert runner.archive_expired(NOW) == {"events": 2}
+    assert count(db, "activity_history") == 3
+
+
+def test_large_archives_run_in_batches(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(maintenance, "ARCHIVE_BATCH_SIZE", 2)
+    for _ in range(3):
+        add_rows(db)
+    runner = DatabaseMaintenance(db, event_retention_hours=24, archive_dir=str(tmp_path))
+    assert runner.archive("events", "2024-03-21T00:00:00") == 6
+    assert count(db, "events") == 3
+
+
+def test_vacuum_returns_free_pages_and_checkpoint_truncates_the_wal(db, monkeypatch):
+    monkeypatch.setattr(maintenance, "VACUUM_MIN_FREE_PAGES", 1)
+    runner = DatabaseMaintenance(db, event_retention_hours=24)
+    assert runner.enable_incremental_vacuum() is False  # New databases are created incremental
+
+    db.write(lambda conn: conn.executemany("INSERT INTO events (event_type, entity_id, data) VALUES ('x', 1, ?)",
+                                           [("x" * 2000,)] * 500))
+    db.write(lambda conn: conn.execute("DELETE FROM events"))
+    assert runner.vacuum() > 0
+    assert db.write(lambda conn: conn.execute("PRAGMA freelist_count").fetchone()[0], transaction=False) == 0
+
+    assert db.file_sizes()["wal_bytes"] > 0
+    assert runner.checkpoint() is True
+    assert db.file_sizes()["wal_bytes"] == 0
+
+
+def test_an_older_database_is_converted_to_incremental_vacuum(db):
+    db.write(lambda conn: conn.executescript("PRAGMA auto_vacuum = NONE; VACUUM;"), transaction=False)
+    runner = DatabaseMaintenance(db, event_retention_hours=24)
+    assert runner.enable_incremental_vacuum() is True
+    assert runner.enable_incremental_vacuum() is False
@@ -0,0 +1,75 @@
+"""
+Schema migrations: a new database reaches the latest version, and an
+existing pre-migration database is upgraded in place without losing rows.
+"""
+
+import sqlite3
+
+import pytest
+
+from migrations import LATEST_VERSION, MIGRATIONS, get_schema_version, migrate
+
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_versions_are_consecutive():
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, LATEST_VERSION + 1))
+
+
+def test_new_database_reaches_the_latest_version():
+    conn = sqlite3.connect(":memory:")
+    assert migrate(conn) == LATEST_VERSION
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert {"last_commit_sha", "last_push_sha", "backfill_sha", "announced_commits"} <= columns(conn, "repositories")
+    assert {"idx_repositories_team", "idx_commits_repo_hash", "idx_events_created_at"} <= indexes(conn)
+    assert migrate(conn) == LATEST_VERSION  # Nothing left to apply
+
+
+def test_pre_migration_database_is_upgraded_in_place():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn, target=1)
+    conn.execute("PRAGMA user_version = 0")  # As created before migrations existed
+    conn.execute("INSERT INTO teams (team_name) VALUES ('Team 1')")
+    conn.execute("INSERT INTO repositories (team_id, repo_url, repo_name, total_commits) "
+                 "VALUES (1, 'https://github.com/octo-org/one', 'one', 42)")
+    conn.execute("INSERT INTO activity_history (event_type, team_name, repo_name, commit_count, total_commits, "
+                 "timestamp) VALUES ('new_commits', 'Team 1', 'one', 5, 42, '2024-03-20T09:15:30')")
+
+    assert migrate(conn) == LATEST_VERSION
+    assert conn.execute("SELECT total_commits, announced_commits FROM repositories").fetchone() == (42, 42)
+    # The rollups are backfilled from the activity already recorded
+    assert conn.execute("SELECT bucket_start, commits FROM activity_rollup_hour").fetchall() == [
+        ("2024-03-20T09:00:00", 5)
+    ]
+
+
+def test_stops_at_the_target_version():
+    conn = sqlite3.connect(":memory:")
+    assert migrate(conn, target=3) == 3
+    assert "last_commit_sha" not in columns(conn, "repositories")
+    assert migrate(conn) == LATEST_VERSION
+    assert "last_commit_sha" in columns(conn, "repositories")
+
+
+def test_failed_migration_leaves_the_version_untouched():
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    migrate(conn, target=4)
+    conn.execute("ALTER TABLE repositories ADD COLUMN last_webhook_at TIMESTAMP")  # Migration 5 will clash
+    conn.execute("BEGIN")
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn)
+    conn.execute("ROLLBACK")
+    assert get_schema_version(conn) == 4
+
+
+def test_newer_database_is_refused():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"PRAGMA user_version = {LATEST_VERSION + 1}")
+    with pytest.raises(RuntimeError):
+        migrate(conn)
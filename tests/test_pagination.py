@@ -0,0 +1,84 @@
+"""
+Keyset pages with ?after=/?limit=, ?fields= projection and the NDJSON
+activity export, through the app's test client.
+"""
+
+import itertools
+import json
+
+import pytest
+
+from app import app, tracker
+
+_teams = itertools.count()
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def activity():
+    """A team with seven repositories and an activity row for each."""
+    n = next(_teams)
+    team_id = tracker.add_team(f"Paged {n}")
+    for i in range(7):
+        tracker.add_repository(team_id, f"https://github.com/octo-org/paged-{n}-{i}")
+        repo = tracker.find_repository("octo-org", f"paged-{n}-{i}")
+        tracker._apply_commit_count(repo, i + 1)
+
+
+def walk(client, path, **args):
+    """Every page of a keyset-paged endpoint, following next_after to the end."""
+    pages, after = [], None
+    while True:
+        query = dict(args, **({"after": after} if after is not None else {}))
+        body = client.get(path, query_string=query).get_json()
+        pages.append(body)
+        after = body["next_after"]
+        if after is None:
+            return pages
+
+
+def test_repository_pages_cover_every_repository_once(client):
+    pages = walk(client, "/api/repositories", limit=3)
+    ids = [row["id"] for page in pages for row in page["repositories"]]
+    assert ids == sorted(ids)
+    assert sorted(ids) == sorted(repo["id"] for repo in tracker.get_all_repositories())
+    assert all(len(page["repositories"]) == 3 for page in pages[:-1])
+
+
+def test_activity_pages_go_newest_first(client):
+    pages = walk(client, "/api/recent-activity", limit=4, fields="id,total_commits")
+    rows = [row for page in pages for row in page["activity"]]
+    assert [row["id"] for row in rows] == sorted((row["id"] for row in rows), reverse=True)
+    assert all(set(row) == {"id", "total_commits"} for row in rows)
+
+
+def test_fields_project_rows_and_the_cursor_still_works(client):
+    body = client.get("/api/repositories", query_string={"fields": "repo_name", "limit": 2}).get_json()
+    assert all(set(row) == {"repo_name"} for row in body["repositories"])
+    assert body["next_after"] is not None
+
+
+@pytest.mark.parametrize("path", ["/api/repositories", "/api/recent-activity", "/api/export/activity.ndjson"])
+def test_unknown_fields_are_rejected(client, path):
+    response = client.get(path, query_string={"fields": "repo_name,password"})
+    assert response.status_code == 400
+    assert "password" in response.get_json()["error"]
+
+
+def test_ndjson_export_streams_every_row_oldest_first(client, monkeypatch):
+    iter_activity = tracker.iter_activity
+    monkeypatch.setattr(tracker, "iter_activity", lambda after, fields: iter_activity(after, fields, batch_size=3))
+    response = client.get("/api/export/activity.ndjson")
+    assert response.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    with tracker.db.read() as conn:
+        assert [row["id"] for row in rows] == [row[0] for row in conn.execute("SELECT id FROM activity_history ORDER BY id")]
+
+    resumed = client.get("/api/export/activity.ndjson", query_string={"after": rows[-3]["id"], "fields": "id"})
+    assert [json.loads(line) for line in resumed.get_data(as_text=True).splitlines()] == [
+        {"id": row["id"]} for row in rows[-2:]
+    ]
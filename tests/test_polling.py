@@ -0,0 +1,40 @@
+"""
+The fetch pool: per-host caps are taken before a fetch is queued, so they
+never leave workers idle.
+"""
+
+import threading
+
+from polling import ConcurrentFetcher, HostLimiter
+
+
+def test_hosts_are_taken_in_turn():
+    urls = ["https://a/1", "https://a/2", "https://a/3", "https://b/1", "https://c/1", "https://b/2"]
+    assert [urls[i] for i in HostLimiter.interleave(urls)] == [
+        "https://a/1", "https://b/1", "https://c/1", "https://a/2", "https://b/2", "https://a/3"
+    ]
+
+
+def test_every_worker_fetches_while_a_host_is_at_its_cap():
+    fetcher = ConcurrentFetcher(max_workers=4, per_host_limit=2)
+    in_flight = threading.Barrier(4, timeout=5)  # Breaks unless four fetches run at once
+    per_host = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+    lock = threading.Lock()
+
+    def fetch(url):
+        host = url.split("/")[2]
+        with lock:
+            per_host[host] += 1
+            peak[host] = max(peak[host], per_host[host])
+        in_flight.wait()
+        with lock:
+            per_host[host] -= 1
+        return url
+
+    urls = [f"https://a/{i}" for i in range(4)] + [f"https://b/{i}" for i in range(4)]
+    try:
+        assert fetcher.fetch_all(urls, fetch) == urls
+    finally:
+        fetcher.shutdown()
+    assert peak == {"a": 2, "b": 2}
@@ -0,0 +1,73 @@
+"""
+The sampling profiler: which operations are traced, exclusive phase times,
+stack samples as collapsed stacks, and keeping only the slowest traces.
+"""
+
+import time
+
+from profiling import Profiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_off_by_default_and_phases_outside_a_trace_are_free():
+    profiler = Profiler()
+    with profiler.trace("request", "/") as trace:
+        with profiler.phase("db"):
+            pass
+    assert trace is None
+    assert profiler.traces() == []
+
+
+def test_nested_phases_count_only_their_own_time():
+    profiler = Profiler(sample_rate=1.0, interval=0.001)
+    with profiler.trace("repository", "octo-org/one") as trace:
+        with profiler.phase("fetch"):
+            busy(0.02)
+            with profiler.phase("parse"):
+                busy(0.03)
+        busy(0.01)
+
+    summary = trace.summary()
+    assert 15 <= summary["phases_ms"]["fetch"] < 45  # Including parse's time would be 50+
+    assert summary["phases_ms"]["parse"] >= 25
+    assert summary["phases_ms"]["other"] >= 5
+    assert summary["samples"] > 0
+    # Each collapsed stack is rooted at its operation and reaches the sampled function
+    lines = profiler.collapsed().splitlines()
+    assert lines and all(line.startswith("repository:octo-org/one;") for line in lines)
+    assert any("test_profiling.py:busy" in line for line in lines)
+
+
+def test_traces_do_not_nest_on_one_thread():
+    profiler = Profiler(sample_rate=1.0)
+    with profiler.trace("poll_cycle", "check_repositories") as outer:
+        with profiler.trace("repository", "octo-org/one") as inner:
+            pass
+    assert outer is not None and inner is None
+
+
+def test_only_the_slowest_traces_are_kept():
+    profiler = Profiler(sample_rate=1.0, keep=2)
+    for seconds in (0.001, 0.02, 0.005, 0.01):
+        with profiler.trace("request", f"{seconds}"):
+            busy(seconds)
+    assert [trace.name for trace in profiler.traces()] == ["0.02", "0.01"]
+    assert profiler.collapsed(kind="poll_cycle") == ""
+
+    profiler.configure(keep=1)
+    assert [trace.name for trace in profiler.traces()] == ["0.02"]
+
+
+def test_dump_writes_status_and_collapsed_stacks(tmp_path):
+    profiler = Profiler(sample_rate=1.0, interval=0.001)
+    with profiler.trace("poll_cycle", "check_repositories"):
+        busy(0.01)
+    prefix = str(tmp_path / "poller")
+    profiler.dump(prefix)
+    assert (tmp_path / "poller.json").read_text().startswith("{")
+    assert (tmp_path / "poller.folded").read_text() == profiler.collapsed()
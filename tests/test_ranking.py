@@ -0,0 +1,52 @@
+"""
+The ranked leaderboard: ?mode=ranked with ?limit= or ?around=&radius=,
+including the validation of those arguments.
+"""
+
+import pytest
+
+from app import app, tracker
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def teams():
+    names = [f"Ranked {i}" for i in range(5)]
+    for i, name in enumerate(names):
+        tracker.ranking.update(name, 1000000 + i, "")
+    yield names
+    for name in names:
+        tracker.ranking.remove(name)
+
+
+def ranked(client, **args):
+    return client.get("/api/leaderboard", query_string=dict(args, mode="ranked"))
+
+
+def test_top_k_in_rank_order(client, teams):
+    entries = ranked(client, limit=3).get_json()
+    assert [entry["team_name"] for entry in entries] == teams[::-1][:3]
+
+
+def test_around_a_team(client, teams):
+    entries = ranked(client, around=teams[2], radius=1).get_json()
+    assert [entry["team_name"] for entry in entries] == [teams[3], teams[2], teams[1]]
+    assert ranked(client, around="No such team").status_code == 404
+
+
+@pytest.mark.parametrize("args", [{"limit": -1}, {"radius": -1, "around": "Ranked 0"}, {"since_minutes": -5}])
+def test_negative_arguments_are_rejected(client, teams, args):
+    response = ranked(client, **args)
+    assert response.status_code == 400
+    assert "must not be negative" in response.get_json()["error"]
+
+
+def test_large_limits_are_clamped(client, teams, monkeypatch):
+    requested = []
+    monkeypatch.setattr(tracker.ranking, "top", lambda k, since_minutes: requested.append(k) or [])
+    assert ranked(client, limit=10 ** 9).status_code == 200
+    assert requested == [500]
@@ -0,0 +1,44 @@
+"""
+Timeline queries over the rollup tables: coarsening and truncation.
+"""
+
+import sqlite3
+
+import pytest
+
+import rollups
+from migrations import migrate
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    cursor = conn.cursor()
+    for minute in range(90):  # One commit a minute from 10:00 to 11:29
+        rollups.record_activity(cursor, "Team 1", 1, f"2024-03-20T{10 + minute // 60:02d}:{minute % 60:02d}:30")
+    return conn
+
+
+def test_fitting_range_keeps_the_requested_bucket(conn):
+    result = rollups.timeline(conn, "minute", "2024-03-20T10:00:00", "2024-03-20T12:00:00", limit=100)
+
+    assert result["bucket"] == "minute" and not result["truncated"]
+    assert len(result["points"]) == 90
+
+
+def test_too_many_minutes_fall_back_to_hours(conn):
+    result = rollups.timeline(conn, "minute", "2024-03-20T10:00:00", "2024-03-20T12:00:00", "Team 1", limit=50)
+
+    assert result["bucket"] == "hour" and not result["truncated"]
+    assert result["points"] == [
+        {"bucket_start": "2024-03-20T10:00:00", "commits": 60},
+        {"bucket_start": "2024-03-20T11:00:00", "commits": 30},
+    ]
+
+
+def test_too_many_hours_are_truncated(conn):
+    result = rollups.timeline(conn, "hour", "2024-03-20T10:00:00", "2024-03-20T12:00:00", limit=1)
+
+    assert result["bucket"] == "hour" and result["truncated"]
+    assert result["points"] == [{"bucket_start": "2024-03-20T10:00:00", "commits": 60}]
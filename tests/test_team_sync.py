@@ -0,0 +1,110 @@
+"""
+Hot reload of teams.csv: diffs applied in place, repositories moving
+between teams, and retries of validations that failed for a passing reason.
+"""
+
+import itertools
+import types
+
+import pytest
+
+import team_sync
+from app import tracker
+from team_sync import TeamsWatcher, diff_teams
+
+_teams = itertools.count()
+
+
+@pytest.fixture
+def teams():
+    """Two teams; the first tracks a repository polled at 40 commits with one ingested commit."""
+    n = next(_teams)
+    first, second = f"Sync {n}a", f"Sync {n}b"
+    url = f"https://github.com/octo-org/sync-repo-{n}"
+    tracker.add_repository(tracker.add_team(first), url)
+    tracker.add_team(second)
+    repo = tracker.find_repository("octo-org", f"sync-repo-{n}")
+    tracker._apply_commit_count(repo, 40)
+    tracker.db.write(lambda conn: conn.execute(
+        "INSERT INTO commits (repo_id, commit_hash) VALUES (?, ?)", (repo["id"], "a" * 40)
+    ))
+    return first, second, repo
+
+
+def test_moving_a_repository_keeps_its_history(teams):
+    first, second, repo = teams
+    other_url = repo["repo_url"] + "-next"
+    current = {name: repos for name, repos in tracker.get_team_repositories().items() if name in (first, second)}
+    desired = {first: [other_url], second: [repo["repo_url"]]}
+    diff = diff_teams(desired, current, {other_url: (True, "ok"), repo["repo_url"]: (True, "Already tracked")})
+
+    tracker.apply_team_changes(diff.add_repos, diff.remove_repo_ids, diff.remove_teams)
+
+    moved = tracker._get_repository(repo["id"])
+    assert moved["team_name"] == second
+    assert moved["total_commits"] == 40
+    with tracker.db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM commits WHERE repo_id = ?", (repo["id"],)).fetchone()[0] == 1
+    # The next poll finds nothing new for the team it moved to
+    assert tracker._apply_commit_count(moved, 40) == 0
+    totals = {entry["team_name"]: entry["total_commits"] for entry in tracker.ranking.top(10000)}
+    assert totals[second] == 40 and totals[first] == 0
+
+
+class FakeTracker:
+    """Just the tables the watcher reads and writes."""
+
+    def __init__(self):
+        self.teams = {}
+        self.applied = []
+
+    def get_team_repositories(self):
+        return {name: dict(repos) for name, repos in self.teams.items()}
+
+    def apply_team_changes(self, add_repos, remove_repo_ids, remove_teams):
+        self.applied.append(add_repos)
+        for name, url in add_repos:
+            self.teams.setdefault(name, {})[url] = len(self.applied)
+
+
+def test_failed_validations_are_retried_after_a_backoff(tmp_path, monkeypatch):
+    path = tmp_path / "teams.csv"
+    path.write_text("team_number,repository_url\n"
+                    "1,https://github.com/octo-org/ok\n"
+                    "2,https://github.com/octo-org/limited\n")
+    validated = []
+    outcome = {"https://github.com/octo-org/limited": (False, "Rate limit exceeded or access denied")}
+
+    def validate(urls):
+        validated.append(sorted(urls))
+        return {url: outcome.get(url, (True, "Repository exists and is accessible")) for url in urls}
+
+    monkeypatch.setattr(team_sync, "validate_github_urls", validate)
+    fake = FakeTracker()
+    watcher = TeamsWatcher(fake, str(path), interval=0, retry_delay=60)
+    now = [1000.0]
+    monkeypatch.setattr(team_sync, "time", types.SimpleNamespace(time=lambda: now[0]))
+
+    watcher.reload()
+    assert fake.applied == [[("Team 1", "https://github.com/octo-org/ok")]]
+
+    # The file hasn't changed and the retry isn't due: nothing is validated
+    assert watcher.check() is None
+    now[0] += 30
+    assert watcher.check() is None
+    assert len(validated) == 1
+
+    # Once due, only the failed URL is validated again; the backoff doubles
+    now[0] += 31
+    watcher.check()
+    assert validated[-1] == ["https://github.com/octo-org/limited"]
+    now[0] += 61
+    assert watcher.check() is None
+
+    del outcome["https://github.com/octo-org/limited"]
+    now[0] += 60
+    watcher.check()
+    assert fake.applied[-1] == [("Team 2", "https://github.com/octo-org/limited")]
+    now[0] += 1000
+    assert watcher.check() is None
+    assert len(validated) == 3
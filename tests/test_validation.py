@@ -0,0 +1,74 @@
+"""
+Team validation against the local GitHub stand-in: concurrent checks, the
+on-disk cache of lasting outcomes, and reading teams.csv.
+"""
+
+import json
+
+import pytest
+
+import config
+from config import read_team_rows, validate_github_urls
+from fake_github import FakeGitHub, repo_name
+
+
+@pytest.fixture(scope="module")
+def github():
+    fake = FakeGitHub(20, latency_ms=0, jitter_ms=0, rate_limit=0)
+    base_url = fake.start()
+    yield fake, base_url
+    fake.stop()
+
+
+@pytest.fixture
+def fake(github, monkeypatch, tmp_path):
+    fake, base_url = github
+    fake.error_rate = 0.0
+    monkeypatch.setattr(config, "GITHUB_API_URL", base_url)
+    monkeypatch.setattr(config, "VALIDATION_CACHE_PATH", str(tmp_path / "validation.json"))
+    return fake
+
+
+def url(i):
+    return "https://github.com/{}/{}".format(*repo_name(i))
+
+
+def test_validates_concurrently_and_caches_lasting_outcomes(fake):
+    urls = [url(i) for i in range(10)] + ["https://github.com/owner999/repo999", "https://gitlab.com/a/b",
+                                          "https://github.com/just-an-owner"]
+    results = validate_github_urls(urls)
+
+    assert all(results[url(i)] == (True, "Repository exists and is accessible") for i in range(10))
+    assert results["https://github.com/owner999/repo999"] == (False, "Repository not found")
+    assert results["https://gitlab.com/a/b"] == (False, "Not a GitHub URL")
+    assert not results["https://github.com/just-an-owner"][0]
+    with open(config.VALIDATION_CACHE_PATH) as f:
+        cached = json.load(f)
+    assert set(cached) == {url(i) for i in range(10)} | {"https://github.com/owner999/repo999"}
+
+    # A second run is answered from the cache
+    requests = fake.requests
+    assert validate_github_urls(urls[:11]) == {u: results[u] for u in urls[:11]}
+    assert fake.requests == requests
+
+
+def test_passing_failures_are_not_cached(fake):
+    fake.error_rate = 1.0
+    assert validate_github_urls([url(12)]) == {url(12): (False, "HTTP Error: 502")}
+
+    fake.error_rate = 0.0
+    assert validate_github_urls([url(12)]) == {url(12): (True, "Repository exists and is accessible")}
+
+
+def test_stale_cache_entries_are_checked_again(fake, monkeypatch):
+    validate_github_urls([url(13)])
+    monkeypatch.setattr(config, "VALIDATION_CACHE_TTL", 0)
+    requests = fake.requests
+    validate_github_urls([url(13)])
+    assert fake.requests == requests + 1
+
+
+def test_reads_team_rows_without_validating(tmp_path):
+    path = tmp_path / "teams.csv"
+    path.write_text("team_number,repository_url\n 7 , https://github.com/octo-org/seven/ \n12,https://github.com/octo-org/twelve\n")
+    assert read_team_rows(str(path)) == [(7, "https://github.com/octo-org/seven"), (12, "https://github.com/octo-org/twelve")]
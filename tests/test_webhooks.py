@@ -0,0 +1,189 @@
+"""
+Recorded push webhooks replayed against the app's test client: signature
+checks, redeliveries, force-pushes and reconciliation with polled totals.
+"""
+
+import hashlib
+import hmac
+import itertools
+import json
+import os
+
+import pytest
+
+from app import app, tracker
+from github_commit_tracker import GitHubTracker
+from webhooks import parse_push
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SECRET = os.environ["GITHUB_WEBHOOK_SECRET"]
+_repo_numbers = itertools.count()
+_deliveries = itertools.count()
+
+
+def load_push(repo, fixture="push.json", **changes):
+    """A recorded push payload, retargeted at one of the test's repositories."""
+    with open(os.path.join(FIXTURES, fixture)) as f:
+        payload = json.load(f)
+    payload["repository"]["name"] = repo["repo_name"]
+    payload["repository"]["full_name"] = f"octo-org/{repo['repo_name']}"
+    payload.update(changes)
+    return payload
+
+
+def deliver(client, payload, secret=SECRET, delivery_id=None):
+    body = json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post("/webhooks/github", data=body, headers={
+        "Content-Type": "application/json",
+        "X-GitHub-Event": "push",
+        "X-GitHub-Delivery": delivery_id or f"delivery-{next(_deliveries)}",
+        "X-Hub-Signature-256": signature,
+    })
+
+
+def total(repo):
+    return tracker._get_repository(repo["id"])["total_commits"]
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def repo():
+    """A newly tracked repository, so every test starts from a zero total."""
+    name = f"webhook-repo-{next(_repo_numbers)}"
+    team_id = tracker.add_team(f"Webhook {name}")
+    tracker.add_repository(team_id, f"https://github.com/octo-org/{name}")
+    return tracker.find_repository("octo-org", name)
+
+
+@pytest.fixture
+def chained(client, repo):
+    """A repository polled at 10 commits whose webhook chain starts at push.json's after SHA."""
+    tracker._apply_commit_count(repo, 10)
+    assert deliver(client, load_push(repo)).get_json()["status"] == "rechecking"
+    return repo
+
+
+def test_rejects_bad_and_missing_signatures(client, repo):
+    payload = load_push(repo)
+    assert deliver(client, payload, secret="wrong-secret").status_code == 401
+    response = client.post("/webhooks/github", json=payload, headers={"X-GitHub-Event": "push"})
+    assert response.status_code == 401
+    assert total(repo) == 0
+
+
+def test_first_push_starts_the_chain_without_counting(client, repo):
+    # The poll may already have counted these commits; only a re-check can tell
+    tracker._apply_commit_count(repo, 10)
+    response = deliver(client, load_push(repo))
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "rechecking", "new_commits": 0}
+    assert deliver(client, load_push(repo)).get_json()["status"] == "duplicate"
+    assert total(repo) == 10
+
+    # The reconciliation poll still sees 10
+    assert tracker._apply_commit_count(repo, 10) == 0
+    assert total(repo) == 10
+
+
+def test_chained_push_is_applied_once(client, chained):
+    push = load_push(chained, before=load_push(chained)["after"], after="5e4b9e5c2d4a6fd1bcad9e8f7a6b5c4d3e2f1a0b")
+    first = deliver(client, push, delivery_id="72d3162e-cc78-11e3-81ab-4c9367dc0958")
+    assert first.get_json() == {"status": "applied", "new_commits": 3}
+    assert total(chained) == 13
+
+    redelivery = deliver(client, push, delivery_id="72d3162e-cc78-11e3-81ab-4c9367dc0958")
+    assert redelivery.get_json() == {"status": "duplicate", "new_commits": 0}
+    assert total(chained) == 13
+
+
+def test_gap_in_the_chain_rechecks(client, chained):
+    # A push whose before SHA isn't the last one applied: a delivery was missed, or arrived late
+    push = load_push(chained, before="6f5c0f6d3e5b7ae2cdbe0f9a8b7c6d5e4f3a2b1c",
+                     after="7a6d1a7e4f6c8bf3decf1a0b9c8d7e6f5a4b3c2d")
+    assert deliver(client, push).get_json()["status"] == "rechecking"
+    assert total(chained) == 10
+
+
+def test_force_push_rechecks_and_moves_the_chain(client, chained):
+    forced = load_push(chained, "push_forced.json")
+    assert deliver(client, forced).get_json() == {"status": "rechecking", "new_commits": 0}
+    assert total(chained) == 10
+
+    # The next ordinary push carries on from the force-pushed head
+    push = load_push(chained, before=forced["after"], after="8b7e2b8f5a7d9ca4efd02b1c0d9e8f7a6b5c4d3e")
+    assert deliver(client, push).get_json() == {"status": "applied", "new_commits": 3}
+    assert total(chained) == 13
+
+
+def test_poll_corrects_a_total_webhooks_took_too_high(client, chained):
+    push = load_push(chained, before=load_push(chained)["after"], after="9c8f3c9a6b8eadb5f0e13c2d1e0f9a8b7c6d5e4f")
+    deliver(client, push)
+    assert total(chained) == 13
+
+    # The poll counts the whole history, so its lower total wins
+    assert tracker._apply_commit_count(chained, 11) == 0
+    assert total(chained) == 11
+    team = next(entry for entry in tracker.ranking.top(1000) if entry["team_name"] == chained["team_name"])
+    assert team["total_commits"] == 11
+
+
+def test_untracked_repository_is_ignored(client):
+    payload = load_push({"repo_name": "not-tracked"})
+    response = deliver(client, payload)
+    assert response.status_code == 202
+    assert response.get_json()["status"] == "ignored"
+
+
+def test_recheck_requests_reach_the_poller(client, repo):
+    # The web worker that received the push only records the request; the poller takes it
+    assert deliver(client, load_push(repo)).get_json()["status"] == "rechecking"
+    assert tracker._take_rechecks({repo["id"]}) == [repo["id"]]
+    assert tracker._take_rechecks({repo["id"]}) == []
+
+
+def announced_commits(repo):
+    """Commits announced for the repo's team in the activity feed and the minute rollup."""
+    with tracker.db.read() as conn:
+        activity = conn.execute("SELECT COALESCE(SUM(commit_count), 0) FROM activity_history WHERE team_name = ?",
+                                (repo["team_name"],)).fetchone()[0]
+        rollup = conn.execute("SELECT COALESCE(SUM(commits), 0) FROM activity_rollup_minute WHERE team_name = ?",
+                              (repo["team_name"],)).fetchone()[0]
+    return activity, rollup
+
+
+def test_corrected_total_climbing_back_is_not_announced_twice(client, chained):
+    push = load_push(chained, before=load_push(chained)["after"], after="ad9f4dab7c9fbec6a1f24d3e2f1a0b9c8d7e6f5a")
+    deliver(client, push)
+    assert tracker._apply_commit_count(chained, 11) == 0
+    assert announced_commits(chained) == (13, 13)
+
+    # Back up to the total the webhook already announced: nothing new
+    assert tracker._apply_commit_count(chained, 13) == 0
+    assert total(chained) == 13
+    assert announced_commits(chained) == (13, 13)
+
+    assert tracker._apply_commit_count(chained, 15) == 2
+    assert announced_commits(chained) == (15, 15)
+    team = next(entry for entry in tracker.ranking.top(1000) if entry["team_name"] == chained["team_name"])
+    assert team["total_commits"] == 15
+
+
+def test_web_tier_tracker_records_pushes_without_polling_machinery(chained):
+    web = GitHubTracker("test-token", poller=False)
+    try:
+        assert web.fetcher is None and web.count_source is None and web.maintenance is None
+        assert web.db._writer is None  # The schema is current, so nothing was written yet
+
+        push = load_push(chained, before=load_push(chained)["after"], after="be0a5ebc8dafcfd7b2f35e4f3a2b1c0d9e8f7a6b")
+        assert web.apply_push("octo-org", chained["repo_name"], parse_push(push)) == {"status": "applied", "new_commits": 3}
+        assert total(chained) == 13
+        with pytest.raises(RuntimeError):
+            web.start()
+    finally:
+        web.stop()
+        web.close()
@@ -0,0 +1,58 @@
+"""
+GitHub push webhook handling.
+Verifies the X-Hub-Signature-256 HMAC on each delivery and reduces a push
+payload to what the tracker needs: which repository, how many new commits
+landed on its default branch, and the before/after SHAs the tracker chains
+deliveries on, so a redelivered push is never counted twice.
+"""
+
+import hashlib
+import hmac
+from typing import Dict, Optional
+
+SIGNATURE_HEADER = 'X-Hub-Signature-256'
+EVENT_HEADER = 'X-GitHub-Event'
+MAX_PUSH_COMMITS = 2048  # GitHub truncates the commits array of a push payload at this length
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a delivery's sha256=<hexdigest> signature against the shared secret."""
+    if not secret or not signature or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def parse_push(payload: Dict) -> Optional[Dict]:
+    """
+    Summarise a push event as {owner, name, new_commits, before, after,
+    reliable}, or None if it isn't a push to the repository's default
+    branch. before and after are the branch head SHAs either side of the
+    push. reliable is False
+    when the payload can't be trusted as a delta (force-push, deleted branch,
+    truncated commit list) and the repository should be re-checked instead.
+    """
+    repository = payload.get('repository') or {}
+    full_name = repository.get('full_name') or ''
+    owner, _, name = full_name.partition('/')
+    if not owner or not name:
+        return None
+
+    default_branch = repository.get('default_branch') or repository.get('master_branch')
+    if payload.get('ref') != f"refs/heads/{default_branch}":
+        return None
+
+    commits = payload.get('commits') or []
+    # Every commit between before and after is new to the default branch, even ones
+    # already pushed to another branch (distinct=false)
+    new_commits = len(commits)
+    reliable = not (payload.get('forced') or payload.get('deleted') or len(commits) >= MAX_PUSH_COMMITS)
+
+    return {
+        "owner": owner,
+        "name": name,
+        "new_commits": new_commits,
+        "before": payload.get('before'),
+        "after": payload.get('after'),
+        "reliable": reliable,
+    }
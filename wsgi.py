@@ -0,0 +1,20 @@
+"""
+WSGI entry point for the production web tier.
+Each worker serves the Flask app without polling GitHub: the poller process
+(poller.py) writes to the shared database, and every worker follows those
+writes to keep its snapshots, ranking and event stream current. Workers
+build a web-tier tracker, which only writes to record push webhooks and the
+re-checks they ask the poller for.
+
+Run: gunicorn -c gunicorn.conf.py wsgi:app (or python serve.py)
+"""
+
+import os
+
+os.environ["TRACKER_ROLE"] = "web"  # Read by config, before app builds the tracker
+
+from app import app, tracker  # noqa: E402
+
+__all__ = ["app"]
+
+tracker.follow_changes()